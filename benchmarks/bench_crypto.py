@@ -0,0 +1,114 @@
+"""
+Бенчмарк шифрования частей MTProto в нескольких потоках
+
+Повторяет mtproto.pack Pyrogram для частей по 512 КБ (sha256 для msg_key,
+kdf, AES-256-IGE через TgCrypto) и прогоняет его через ShardedCryptoExecutor
+с разным числом потоков. Каждое "соединение" держит в полете PART_WORKERS
+частей, как PartUploader; проверяется, что пакеты одного соединения
+шифруются в порядке отправки. Сеть не участвует - измеряется только
+предел скорости шифрования (МБ/с) и его рост с числом ядер.
+
+Запуск:
+    python benchmarks/bench_crypto.py --connections 8 --workers 1 2 4 8
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from hashlib import sha256
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.crypto_pool import ShardedCryptoExecutor  # noqa: E402
+from core.part_source import PART_SIZE  # noqa: E402
+
+try:
+    import tgcrypto
+except ImportError:
+    tgcrypto = None
+
+
+PART_WORKERS = 4
+AUTH_KEY = os.urandom(256)
+AUTH_KEY_ID = sha256(AUTH_KEY).digest()[-8:]
+
+
+def kdf(msg_key: bytes) -> tuple:
+    """Ключ и IV AES для исходящего сообщения (как mtproto.kdf)"""
+    sha256_a = sha256(msg_key + AUTH_KEY[0:36]).digest()
+    sha256_b = sha256(AUTH_KEY[40:76] + msg_key).digest()
+    aes_key = sha256_a[:8] + sha256_b[8:24] + sha256_a[24:32]
+    aes_iv = sha256_b[:8] + sha256_a[8:24] + sha256_b[24:32]
+    return aes_key, aes_iv
+
+
+def pack(payload: bytes, salt: int, session_id: bytes, auth_key: bytes, auth_key_id: bytes) -> bytes:
+    """Шифрует сообщение с частью файла (имя и аргументы как у mtproto.pack)"""
+    data = salt.to_bytes(8, "little") + session_id + payload
+    padding = os.urandom(-(len(data) + 12) % 16 + 12)
+    msg_key = sha256(auth_key[88:120] + data + padding).digest()[8:24]
+    aes_key, aes_iv = kdf(msg_key)
+    return auth_key_id + msg_key + tgcrypto.ige256_encrypt(data + padding, aes_key, aes_iv)
+
+
+async def run_connection(executor: ShardedCryptoExecutor, parts: int, payload: bytes) -> int:
+    """Шифрует части одного соединения, проверяя порядок завершения"""
+    loop = asyncio.get_running_loop()
+    session_id = os.urandom(8)
+    completed: List[int] = []
+    in_flight = asyncio.Semaphore(PART_WORKERS)
+
+    async def send(index: int) -> None:
+        async with in_flight:
+            await loop.run_in_executor(executor, pack, payload, index, session_id, AUTH_KEY, AUTH_KEY_ID)
+            completed.append(index)
+
+    await asyncio.gather(*(send(index) for index in range(parts)))
+    if completed != sorted(completed):
+        raise RuntimeError("Пакеты соединения зашифрованы не в порядке отправки")
+    return parts * len(payload)
+
+
+async def measure(workers: int, connections: int, parts: int) -> float:
+    """Скорость шифрования, МБ/с"""
+    executor = ShardedCryptoExecutor(workers)
+    payload = os.urandom(PART_SIZE)
+    try:
+        started = time.perf_counter()
+        sizes = await asyncio.gather(*(
+            run_connection(executor, parts, payload) for _ in range(connections)
+        ))
+        elapsed = time.perf_counter() - started
+    finally:
+        executor.shutdown()
+    return sum(sizes) / (1024 * 1024) / elapsed
+
+
+def main(argv=None) -> int:
+    """Точка входа бенчмарка"""
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Бенчмарк шифрования частей в нескольких потоках")
+    parser.add_argument("--connections", type=int, default=8, help="Одновременные соединения (файлы)")
+    parser.add_argument("--parts", type=int, default=64, help="Частей по 512 КБ на соединение")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, 4, 8, cores}), help="Количество потоков шифрования")
+    args = parser.parse_args(argv)
+
+    if tgcrypto is None:
+        print("❌ TgCrypto не установлен (pip install TgCrypto): без него шифрование держит GIL")
+        return 2
+
+    print(f"Ядер: {cores}, соединений: {args.connections}, "
+          f"данных: {args.connections * args.parts * PART_SIZE / (1024 * 1024):.0f} МБ")
+    baseline = None
+    for workers in args.workers:
+        speed = asyncio.run(measure(workers, args.connections, args.parts))
+        baseline = baseline or speed
+        print(f"  потоков {workers:>3}: {speed:8.1f} МБ/с  (x{speed / baseline:.2f})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
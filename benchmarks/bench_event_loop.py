@@ -0,0 +1,177 @@
+"""
+Бенчмарк реализаций цикла событий: asyncio и uvloop
+
+Локальный стенд: TCP-сервер в том же цикле принимает кадры
+(4 байта длины + данные) и отвечает коротким подтверждением, как сервер
+Telegram на запрос. Измеряются:
+    rpc   - задержка последовательных маленьких запросов (p50/p99, мкс)
+    parts - скорость отправки частей по 512 КБ несколькими соединениями,
+            по PART_WORKERS частей в полете на соединение (МБ/с)
+
+Каждая реализация запускается в отдельном процессе. Недоступная
+реализация (uvloop не установлен или Windows) пропускается.
+
+Запуск:
+    python benchmarks/bench_event_loop.py
+    python benchmarks/bench_event_loop.py --rpcs 5000 --connections 16 --parts 128
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import loop_policy  # noqa: E402
+from core.part_source import PART_SIZE  # noqa: E402
+
+
+PART_WORKERS = 4
+ACK = b"\x00" * 8
+IMPLEMENTATIONS = (loop_policy.LOOP_ASYNCIO, loop_policy.LOOP_UVLOOP)
+
+
+async def handle_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """Сервер стенда: читает кадры и подтверждает каждый"""
+    try:
+        while True:
+            header = await reader.readexactly(4)
+            await reader.readexactly(int.from_bytes(header, "little"))
+            writer.write(ACK)
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+def frame(payload: bytes) -> bytes:
+    """Кадр запроса: длина + данные"""
+    return len(payload).to_bytes(4, "little") + payload
+
+
+async def measure_rpc(port: int, count: int) -> List[float]:
+    """Задержки последовательных маленьких запросов, мкс"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    request = frame(os.urandom(64))
+    timings = []
+    try:
+        for _ in range(count):
+            started = time.perf_counter()
+            writer.write(request)
+            await reader.readexactly(len(ACK))
+            timings.append((time.perf_counter() - started) * 1_000_000)
+    finally:
+        writer.close()
+        await writer.wait_closed()
+    return timings
+
+
+async def send_parts(port: int, parts: int, payload: bytes) -> int:
+    """Отправляет части одного соединения, держа PART_WORKERS в полете"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    in_flight = asyncio.Semaphore(PART_WORKERS)
+
+    async def read_acks() -> None:
+        for _ in range(parts):
+            await reader.readexactly(len(ACK))
+            in_flight.release()
+
+    acks = asyncio.ensure_future(read_acks())
+    try:
+        for _ in range(parts):
+            await in_flight.acquire()
+            writer.write(payload)
+            await writer.drain()
+        await acks
+    finally:
+        acks.cancel()
+        writer.close()
+        await writer.wait_closed()
+    return parts * (len(payload) - 4)
+
+
+async def measure_parts(port: int, connections: int, parts: int) -> float:
+    """Скорость отправки частей, МБ/с"""
+    payload = frame(os.urandom(PART_SIZE))
+    started = time.perf_counter()
+    sizes = await asyncio.gather(*(send_parts(port, parts, payload) for _ in range(connections)))
+    return sum(sizes) / (1024 * 1024) / (time.perf_counter() - started)
+
+
+async def run_stand(rpcs: int, connections: int, parts: int) -> Dict[str, Any]:
+    """Запускает сервер стенда и оба измерения в текущем цикле"""
+    server = await asyncio.start_server(handle_connection, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        timings = await measure_rpc(port, rpcs)
+        speed = await measure_parts(port, connections, parts)
+    finally:
+        server.close()
+        await server.wait_closed()
+    timings.sort()
+    return {
+        'rpc_p50_us': statistics.median(timings),
+        'rpc_p99_us': timings[min(len(timings) - 1, int(len(timings) * 0.99))],
+        'parts_mb_s': speed,
+    }
+
+
+def run_child(implementation: str, args: argparse.Namespace) -> Optional[Dict[str, Any]]:
+    """Запускает измерение реализации в отдельном процессе"""
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", implementation,
+         "--rpcs", str(args.rpcs), "--connections", str(args.connections), "--parts", str(args.parts)],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        tail = result.stderr.strip().splitlines()[-1:] or ["неизвестная ошибка"]
+        print(f"  {implementation:<8} ❌ {tail[0]}")
+        return None
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None) -> int:
+    """Точка входа бенчмарка"""
+    parser = argparse.ArgumentParser(description="Бенчмарк реализаций цикла событий")
+    parser.add_argument("--rpcs", type=int, default=2000, help="Последовательных запросов для задержки")
+    parser.add_argument("--connections", type=int, default=8, help="Соединений для отправки частей")
+    parser.add_argument("--parts", type=int, default=64, help="Частей по 512 КБ на соединение")
+    parser.add_argument("--child", choices=IMPLEMENTATIONS, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        loop_policy.configure(args.child)
+        if loop_policy.implementation() != args.child:
+            raise SystemExit(f"{args.child} недоступен")
+        print(json.dumps(loop_policy.run(run_stand(args.rpcs, args.connections, args.parts))))
+        return 0
+
+    print(f"Запросов: {args.rpcs}, соединений: {args.connections}, "
+          f"данных: {args.connections * args.parts * PART_SIZE / (1024 * 1024):.0f} МБ")
+    print(f"  {'цикл':<8} {'RPC p50, мкс':>13} {'RPC p99, мкс':>13} {'части, МБ/с':>12}")
+    results = {}
+    for implementation in IMPLEMENTATIONS:
+        if implementation == loop_policy.LOOP_UVLOOP and not loop_policy.uvloop_available():
+            print(f"  {implementation:<8} пропущен: не установлен (pip install uvloop) или Windows")
+            continue
+        result = run_child(implementation, args)
+        if result is None:
+            continue
+        results[implementation] = result
+        print(f"  {implementation:<8} {result['rpc_p50_us']:13.1f} {result['rpc_p99_us']:13.1f} "
+              f"{result['parts_mb_s']:12.1f}")
+
+    if len(results) == len(IMPLEMENTATIONS):
+        base, fast = results[loop_policy.LOOP_ASYNCIO], results[loop_policy.LOOP_UVLOOP]
+        print(f"uvloop: задержка RPC x{base['rpc_p50_us'] / fast['rpc_p50_us']:.2f}, "
+              f"скорость частей x{fast['parts_mb_s'] / base['parts_mb_s']:.2f} относительно asyncio")
+    return 0 if results else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""
+Бенчмарк чтения частей файла при параллельной загрузке
+
+Сравнивает три способа подготовки частей при N одновременных загрузках:
+    bytes - как Client.save_file: fp.read() на каждую часть и двойная
+            сериализация запроса (len + pack)
+    pool  - FilePartSource + BufferPool: readinto в переиспользуемые
+            буферы, одна сериализация
+    mmap  - MmapPartSource: срезы отображения, одна сериализация
+
+Сеть имитируется задержкой, в течение которой часть удерживается
+в памяти (как до подтверждения сервером). Каждый режим запускается
+в отдельном процессе, чтобы пиковый RSS не смешивался. В режиме mmap
+RSS включает прочитанные страницы файла: они разделяемые и вытесняются
+ядром, но на графиках мониторинга выглядят как рост памяти процесса.
+
+Запуск:
+    python benchmarks/bench_part_reader.py --size-mb 256 --uploads 8
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.part_source import PART_SIZE, BufferPool, FilePartSource, MmapPartSource  # noqa: E402
+
+
+PART_WORKERS = 4
+MODES = ("bytes", "pool", "mmap")
+
+
+def serialize_part(data) -> bytes:
+    """Повторяет сериализацию TL Bytes: длина + данные + выравнивание"""
+    length = len(data)
+    padding = -(length + 4) % 4
+    return b"\xfe" + length.to_bytes(3, "little") + data + bytes(padding)
+
+
+async def upload_file(path: str, mode: str, buffers: BufferPool, latency: float, counters: dict) -> None:
+    """Имитирует загрузку одного файла PART_WORKERS воркерами"""
+    loop = asyncio.get_running_loop()
+    if mode == "bytes":
+        fp = open(path, "rb")
+        total_parts = -(-os.path.getsize(path) // PART_SIZE)
+    else:
+        source = MmapPartSource(path) if mode == "mmap" else FilePartSource(path)
+        total_parts = source.total_parts
+    parts = iter(range(total_parts))
+
+    async def worker():
+        for index in parts:
+            buffer = None
+            if mode == "bytes":
+                fp.seek(index * PART_SIZE)
+                data = await loop.run_in_executor(None, fp.read, PART_SIZE)
+                counters["part_allocations"] += 1
+                # Pyrogram вызывает write() для len(body) и еще раз для упаковки
+                serialize_part(data)
+                payload = serialize_part(data)
+                counters["part_allocations"] += 2
+            else:
+                if source.needs_buffer:
+                    buffer = await buffers.acquire()
+                data = await loop.run_in_executor(None, source.read_part, index, buffer)
+                payload = serialize_part(data)
+                counters["part_allocations"] += 1
+
+            # Часть "в полете" до подтверждения сервером
+            await asyncio.sleep(latency)
+            del payload, data
+            if buffer is not None:
+                buffers.release(buffer)
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(PART_WORKERS)))
+    finally:
+        if mode == "bytes":
+            fp.close()
+        else:
+            source.close()
+
+
+async def run_mode(paths, mode: str, latency: float) -> dict:
+    """Запускает параллельную загрузку всех файлов в одном режиме"""
+    counters = {"part_allocations": 0}
+    buffers = BufferPool(len(paths) * PART_WORKERS, PART_SIZE)
+    started = time.perf_counter()
+    await asyncio.gather(*(upload_file(path, mode, buffers, latency, counters) for path in paths))
+    counters["seconds"] = round(time.perf_counter() - started, 3)
+    return counters
+
+
+def child(args) -> None:
+    """Замер одного режима (в отдельном процессе)"""
+    if args.trace:
+        tracemalloc.start()
+    result = asyncio.run(run_mode(args.paths, args.mode, args.latency))
+    if args.trace:
+        result["traced_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 1)
+        tracemalloc.stop()
+    # ru_maxrss: КБ в Linux, байты в macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    result["max_rss_mb"] = round(maxrss / (2 ** 20 if sys.platform == "darwin" else 1024), 1)
+    print(json.dumps(result))
+
+
+def make_files(directory: str, count: int, size_mb: int):
+    """Создает тестовые файлы"""
+    paths = []
+    block = os.urandom(1024 * 1024)
+    for i in range(count):
+        path = os.path.join(directory, f"video_{i}.bin")
+        with open(path, "wb") as f:
+            for _ in range(size_mb):
+                f.write(block)
+        paths.append(path)
+    return paths
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uploads", type=int, default=8, help="Количество одновременных загрузок")
+    parser.add_argument("--size-mb", type=int, default=64, help="Размер каждого файла в МБ")
+    parser.add_argument("--latency", type=float, default=0.005, help="Имитация времени подтверждения части, сек")
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--trace", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("paths", nargs="*", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        child(args)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = make_files(directory, args.uploads, args.size_mb)
+        print(f"{args.uploads} загрузок по {args.size_mb} МБ, части по {PART_SIZE // 1024} КБ\n")
+        print(f"{'режим':<8}{'аллокаций частей':>18}{'пик tracemalloc, МБ':>22}{'max RSS, МБ':>14}{'время, с':>10}")
+        for mode in MODES:
+            results = {}
+            for trace in (False, True):
+                command = [sys.executable, os.path.abspath(__file__), "--mode", mode,
+                           "--latency", str(args.latency)]
+                if trace:
+                    command.append("--trace")
+                output = subprocess.run(command + paths, capture_output=True, text=True, check=True).stdout
+                results[trace] = json.loads(output.strip().splitlines()[-1])
+            plain, traced = results[False], results[True]
+            print(f"{mode:<8}{plain['part_allocations']:>18}{traced['traced_peak_mb']:>22}"
+                  f"{plain['max_rss_mb']:>14}{plain['seconds']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Бенчмарк времени запуска: импорт модулей до показа окна
+
+Запускает `python -X importtime -c "import main"` в отдельном процессе
+несколько раз, суммирует собственное время импорта всех модулей и берет
+медиану. Результат сравнивается с бюджетом из startup_budget.json:
+    max_import_ms - предел суммарного времени импорта
+    forbidden     - пакеты, которые не должны загружаться до показа окна
+                    (Pyrogram и moviepy загружаются в фоне после отрисовки)
+
+Код завершения 1, если бюджет превышен - скрипт можно запускать в CI.
+
+Запуск:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --module ui.controller --runs 10 --top 15
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "startup_budget.json")
+
+
+def measure_once(module: str) -> Tuple[float, Dict[str, Tuple[int, int]]]:
+    """
+    Импортирует модуль в новом процессе с -X importtime
+
+    Args:
+        module: Имя импортируемого модуля
+
+    Returns:
+        Суммарное собственное время импорта (мс) и словарь
+        модуль -> (собственное время, накопленное время) в мкс
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        tail = result.stderr.strip().splitlines()[-1:] or ["неизвестная ошибка"]
+        raise RuntimeError(f"Не удалось импортировать {module}: {tail[0]}")
+
+    modules: Dict[str, Tuple[int, int]] = {}
+    total_us = 0
+    for line in result.stderr.splitlines():
+        # Формат: "import time:      self [us] |  cumulative | imported package"
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            self_us, cumulative_us = int(self_us), int(cumulative_us)
+        except ValueError:
+            continue
+        modules[name.strip()] = (self_us, cumulative_us)
+        total_us += self_us
+    return total_us / 1000, modules
+
+
+def top_modules(modules: Dict[str, Tuple[int, int]], count: int) -> List[Tuple[str, int]]:
+    """Самые дорогие пакеты верхнего уровня по накопленному времени"""
+    packages: Dict[str, int] = {}
+    for name, (_, cumulative_us) in modules.items():
+        top = name.split(".")[0]
+        packages[top] = max(packages.get(top, 0), cumulative_us)
+    return sorted(packages.items(), key=lambda item: -item[1])[:count]
+
+
+def load_budget(path: str) -> dict:
+    """Читает бюджет запуска"""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main(argv=None) -> int:
+    """Точка входа бенчмарка"""
+    parser = argparse.ArgumentParser(description="Бенчмарк времени импорта при запуске")
+    parser.add_argument("--module", help="Модуль для импорта (по умолчанию - из бюджета)")
+    parser.add_argument("--runs", type=int, default=5, help="Количество запусков")
+    parser.add_argument("--top", type=int, default=10, help="Сколько самых дорогих пакетов показать")
+    parser.add_argument("--budget", default=BUDGET_PATH, help="Файл бюджета")
+    args = parser.parse_args(argv)
+
+    budget = load_budget(args.budget)
+    module = args.module or budget.get("module", "main")
+
+    timings = []
+    modules: Dict[str, Tuple[int, int]] = {}
+    try:
+        for _ in range(max(1, args.runs)):
+            total_ms, modules = measure_once(module)
+            timings.append(total_ms)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return 2
+
+    median_ms = statistics.median(timings)
+    print(f"Импорт {module}: медиана {median_ms:.1f} мс "
+          f"(мин {min(timings):.1f}, макс {max(timings):.1f}, запусков {len(timings)})")
+    print("Самые дорогие пакеты (накопленное время):")
+    for name, cumulative_us in top_modules(modules, args.top):
+        print(f"  {name:<30} {cumulative_us / 1000:8.1f} мс")
+
+    failed = False
+    max_import_ms = budget.get("max_import_ms")
+    if max_import_ms is not None and median_ms > max_import_ms:
+        print(f"❌ Бюджет превышен: {median_ms:.1f} мс > {max_import_ms} мс")
+        failed = True
+
+    loaded_top = {name.split(".")[0] for name in modules}
+    eager = sorted(set(budget.get("forbidden", [])) & loaded_top)
+    if eager:
+        print(f"❌ До показа окна загружаются: {', '.join(eager)}")
+        failed = True
+
+    if not failed:
+        print(f"✅ В бюджете ({max_import_ms} мс, без {', '.join(budget.get('forbidden', []))})")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""
+Консольный запуск загрузки видео без графического интерфейса
+
+Параметры API и целевой чат по умолчанию берутся из settings.json,
+сессия - та же, что у графического приложения (uploader_session).
+Дополнительные аккаунты пула загрузки (участники того же чата)
+добавляются командой --add-account и используются автоматически.
+
+Пример:
+    python cli.py /path/to/videos --order largest_first --concurrency 8
+    python cli.py /path/to/batch.tar
+    python cli.py --add-account +79991234567
+"""
+import argparse
+import os
+import sys
+
+# Добавляем текущую директорию в путь для импорта модулей
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config.settings import Settings
+from core import loop_policy, metrics, tracing
+from core.accounts import accounts_from_settings, session_name_for_phone
+from core.bandwidth import BandwidthSchedule
+from core.ordering import ORDER_POLICIES
+from core.upload_options import UploadOptions
+from core.uploader import VideoUploader
+from utils.archive import is_archive
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Создает парсер аргументов командной строки"""
+    parser = argparse.ArgumentParser(description="Загрузка видео из папки в Telegram")
+    parser.add_argument("folder", nargs="?", help="Папка с видео файлами или архив (zip, tar)")
+    parser.add_argument("--chat-id", type=int, help="ID чата (по умолчанию - выбранный в приложении)")
+    parser.add_argument("--api-id", type=int, help="API ID (по умолчанию - из настроек)")
+    parser.add_argument("--api-hash", help="API Hash (по умолчанию - из настроек)")
+    parser.add_argument("--order", choices=sorted(ORDER_POLICIES),
+                        help="Порядок загрузки (по умолчанию - из настроек)")
+    parser.add_argument("--recursive", action="store_true", help="Искать видео во вложенных папках")
+    parser.add_argument("--no-archives", action="store_true",
+                        help="Не искать видео в архивах (zip, tar) в папке")
+    parser.add_argument("--concurrency", type=int, default=4, help="Количество параллельных загрузок")
+    parser.add_argument("--workers", type=int,
+                        help="Количество процессов-загрузчиков (0 - в основном процессе; "
+                             "по умолчанию - из настроек). Прерванная передача файла "
+                             "в процессах начинается заново")
+    parser.add_argument("--delay", type=int, default=1, help="Задержка между загрузками, сек")
+    parser.add_argument("--prefix", default="", help="Префикс для названий файлов")
+    parser.add_argument("--limit-mb", type=float,
+                        help="Лимит скорости, МБ/с (0 - без ограничения; по умолчанию - из настроек)")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="Записать трассировку этапов в JSON (chrome://tracing, ui.perfetto.dev)")
+    parser.add_argument("--metrics-port", type=int,
+                        help="Порт локального эндпоинта метрик /metrics и /metrics.json "
+                             "(0 - выключен; по умолчанию - из настроек)")
+    parser.add_argument("--add-account", metavar="PHONE",
+                        help="Авторизовать дополнительный аккаунт пула загрузки (код вводится в консоли)")
+    parser.add_argument("--account-limit-mb", type=float, default=0,
+                        help="Собственный лимит скорости добавляемого аккаунта, МБ/с (0 - без ограничения)")
+    parser.add_argument("--list-accounts", action="store_true",
+                        help="Показать дополнительные аккаунты пула загрузки")
+    parser.add_argument("--loop", choices=loop_policy.LOOP_IMPLEMENTATIONS,
+                        help="Реализация цикла событий (по умолчанию - из настроек)")
+    parser.add_argument("--settings", default="settings.json", help="Файл настроек")
+    return parser
+
+
+async def add_account(api_id: int, api_hash: str, phone: str, limit_mb: float, settings: Settings) -> int:
+    """
+    Авторизует дополнительный аккаунт в собственном файле сессии и добавляет его в пул
+
+    Args:
+        api_id: API ID Telegram
+        api_hash: API Hash Telegram
+        phone: Номер телефона аккаунта
+        limit_mb: Лимит скорости аккаунта, МБ/с (0 - без ограничения)
+        settings: Настройки приложения
+
+    Returns:
+        Код завершения процесса
+    """
+    from pyrogram import Client
+
+    session = session_name_for_phone(phone)
+    # Client.start запрашивает код и пароль 2FA в консоли
+    async with Client(session, api_id=api_id, api_hash=api_hash, phone_number=phone) as client:
+        me = await client.get_me()
+
+    accounts = [entry for entry in settings.get("upload_accounts", []) or []
+                if (entry if isinstance(entry, str) else entry.get("session")) != session]
+    accounts.append({"session": session, "limit_mb": max(0.0, limit_mb), "enabled": True})
+    settings.set("upload_accounts", accounts)
+    print(f"✅ Аккаунт {me.first_name} (ID: {me.id}) добавлен в пул загрузки: {session}")
+    return 0
+
+
+def list_accounts(settings: Settings) -> int:
+    """Выводит дополнительные аккаунты пула"""
+    accounts = accounts_from_settings(settings)
+    if not accounts:
+        print("Дополнительных аккаунтов нет (добавить: --add-account PHONE)")
+        return 0
+    for entry in accounts:
+        exists = os.path.exists(f"{entry['session']}.session")
+        limit = f"{entry['limit_mb']:g} МБ/с" if entry['limit_mb'] else "без ограничения"
+        print(f"  {entry['session']:<28} {limit:<18} {'' if exists else '(нет файла сессии)'}")
+    return 0
+
+
+def main(argv=None) -> int:
+    """
+    Точка входа консольного режима
+
+    Args:
+        argv: Аргументы командной строки (None - sys.argv)
+
+    Returns:
+        Код завершения процесса
+    """
+    args = build_parser().parse_args(argv)
+    settings = Settings(args.settings)
+
+    api_id = args.api_id or settings.get("api_id")
+    api_hash = args.api_hash or settings.get("api_hash")
+    chat_id = args.chat_id or settings.get("selected_chat_id")
+    if args.list_accounts:
+        return list_accounts(settings)
+    if not api_id or not api_hash:
+        print("❌ Не указаны API ID / API Hash (--api-id, --api-hash или настройки приложения)")
+        return 2
+    if args.loop:
+        loop_policy.configure(args.loop)
+    else:
+        loop_policy.configure_from_settings(settings)
+    if args.add_account:
+        try:
+            return loop_policy.run(add_account(int(api_id), api_hash, args.add_account,
+                                               args.account_limit_mb, settings))
+        except ValueError as e:
+            print(f"❌ {e}")
+            return 2
+    if not args.folder:
+        print("❌ Не указана папка с видео файлами")
+        return 2
+    if not chat_id:
+        print("❌ Не указан чат (--chat-id или выбранный в приложении чат)")
+        return 2
+    if not os.path.isdir(args.folder) and not (os.path.isfile(args.folder) and is_archive(args.folder)):
+        print(f"❌ Папка или архив не найдены: {args.folder}")
+        return 2
+
+    tracing.configure_from_settings(settings)
+    if args.trace:
+        tracing.tracer.configure(True)
+    if args.metrics_port is not None:
+        metrics.start_metrics_server(args.metrics_port)
+    else:
+        metrics.start_from_settings(settings)
+
+    options = UploadOptions.from_settings(settings)
+    if args.order:
+        options.order_policy = args.order
+    if args.recursive:
+        options.scan_subfolders = True
+    if args.no_archives:
+        options.scan_archives = False
+    if args.limit_mb is not None:
+        # Явный лимит из командной строки заменяет расписание из настроек
+        options.bandwidth_schedule = BandwidthSchedule(args.limit_mb)
+    if args.workers is not None:
+        options.worker_processes = max(0, args.workers)
+
+    uploader = VideoUploader(
+        int(api_id), api_hash, int(chat_id), args.folder,
+        args.delay, max(1, args.concurrency), args.prefix,
+        options=options
+    )
+
+    result = {'success': False, 'message': ""}
+    uploader.status_updated.connect(print)
+    uploader.file_uploaded.connect(lambda filename: print(f"✅ {filename}"))
+    uploader.finished.connect(lambda success, message: result.update(success=success, message=message))
+
+    print(f"🚀 Загрузка из {args.folder} (порядок: {options.order_policy})")
+    try:
+        loop_policy.run(uploader.upload_videos())
+    except KeyboardInterrupt:
+        print("⏹️ Загрузка прервана")
+        return 130
+    finally:
+        if args.trace:
+            tracing.tracer.export_chrome_trace(args.trace)
+
+    print(result['message'])
+    return 0 if result['success'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
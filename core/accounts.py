@@ -0,0 +1,224 @@
+"""
+Модуль пула аккаунтов для параллельной загрузки в один чат
+"""
+import asyncio
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+from core.bandwidth import TokenBucket
+from core.metrics import ACCOUNT_FLOOD_WAITS
+
+
+# Сессия основного аккаунта (авторизуется в графическом приложении)
+DEFAULT_SESSION = "uploader_session"
+
+# Лимиты размера файла для обычного и Premium аккаунта
+DEFAULT_MAX_FILE_BYTES = 2000 * 1024 * 1024
+PREMIUM_MAX_FILE_BYTES = 4000 * 1024 * 1024
+
+
+def session_name_for_phone(phone: str) -> str:
+    """
+    Имя файла сессии дополнительного аккаунта
+
+    Args:
+        phone: Номер телефона аккаунта
+
+    Returns:
+        Имя сессии Pyrogram (без расширения .session)
+    """
+    digits = re.sub(r"\D", "", phone)
+    if not digits:
+        raise ValueError(f"Некорректный номер телефона: {phone}")
+    return f"account_{digits}"
+
+
+def accounts_from_settings(settings) -> List[Dict[str, Any]]:
+    """
+    Читает дополнительные аккаунты из настроек
+
+    Args:
+        settings: Настройки (ключ upload_accounts - список
+            {"session": "account_7999...", "limit_mb": 0, "enabled": true})
+
+    Returns:
+        Включенные аккаунты с уникальными именами сессий
+    """
+    accounts = []
+    seen = {DEFAULT_SESSION}
+    for entry in settings.get("upload_accounts", []) or []:
+        if isinstance(entry, str):
+            entry = {"session": entry}
+        session = (entry.get("session") or "").strip()
+        if not session or session in seen or not entry.get("enabled", True):
+            continue
+        seen.add(session)
+        accounts.append({"session": session, "limit_mb": float(entry.get("limit_mb", 0) or 0)})
+    return accounts
+
+
+class UploadAccount:
+    """
+    Аккаунт пула: клиент, собственный ограничитель скорости и состояние FloodWait
+
+    FloodWait относится к аккаунту, а не ко всей загрузке: пока аккаунт
+    ждет, новые файлы распределяются по остальным.
+    """
+
+    def __init__(self, session_name: str, limit_mb: float = 0):
+        """
+        Инициализация аккаунта
+
+        Args:
+            session_name: Имя сессии Pyrogram
+            limit_mb: Собственный лимит скорости аккаунта, МБ/с (0 - без ограничения)
+        """
+        self.session_name = session_name
+        self.client = None
+        self.me = None
+        self.target_peer = None
+        self.max_file_bytes = DEFAULT_MAX_FILE_BYTES
+        self.rate_limiter = TokenBucket(limit_mb * 1024 * 1024 if limit_mb > 0 else None)
+        self.flood_until = 0.0
+        self.active = 0
+
+    @property
+    def label(self) -> str:
+        """Имя аккаунта для сообщений"""
+        if self.me is not None:
+            return self.me.first_name or self.session_name
+        return self.session_name
+
+    def attach(self, client, me) -> None:
+        """
+        Привязывает подключенный клиент
+
+        Args:
+            client: Подключенный клиент Telegram
+            me: Результат client.get_me()
+        """
+        self.client = client
+        self.me = me
+        is_premium = bool(getattr(me, 'is_premium', False))
+        self.max_file_bytes = PREMIUM_MAX_FILE_BYTES if is_premium else DEFAULT_MAX_FILE_BYTES
+
+    def flood_remaining(self) -> float:
+        """Сколько секунд аккаунт еще ограничен FloodWait"""
+        return max(0.0, self.flood_until - time.monotonic())
+
+    def penalize(self, seconds: float) -> None:
+        """
+        Отмечает FloodWait аккаунта
+
+        Args:
+            seconds: Время ожидания, требуемое сервером
+        """
+        until = time.monotonic() + max(0.0, seconds)
+        if until > self.flood_until:
+            self.flood_until = until
+        ACCOUNT_FLOOD_WAITS.inc(account=self.session_name)
+        print(f"[ACCOUNTS] {self.label}: FloodWait {seconds:.0f} сек, новые файлы - другим аккаунтам")
+
+
+class AccountPool:
+    """
+    Распределение файлов по аккаунтам пула
+
+    Файл получает свободный от FloodWait аккаунт с наименьшим числом
+    загрузок в работе. Если все подходящие аккаунты ограничены, ожидание
+    длится до ближайшего снятия ограничения. Файлы больше лимита обычного
+    аккаунта направляются только аккаунтам, которым этот размер доступен.
+    """
+
+    def __init__(self, accounts: List[UploadAccount]):
+        """
+        Инициализация пула
+
+        Args:
+            accounts: Аккаунты пула (первый - основной)
+        """
+        if not accounts:
+            raise ValueError("Пул аккаунтов пуст")
+        self.accounts = list(accounts)
+
+    @property
+    def primary(self) -> UploadAccount:
+        """Основной аккаунт"""
+        return self.accounts[0]
+
+    @property
+    def max_file_bytes(self) -> int:
+        """Наибольший размер файла, который может отправить хотя бы один аккаунт"""
+        return max(account.max_file_bytes for account in self.accounts)
+
+    def __len__(self) -> int:
+        return len(self.accounts)
+
+    def for_client(self, client) -> Optional[UploadAccount]:
+        """
+        Находит аккаунт по клиенту
+
+        Args:
+            client: Клиент Telegram
+
+        Returns:
+            Аккаунт или None, если клиент не из пула
+        """
+        for account in self.accounts:
+            if account.client is client:
+                return account
+        return None
+
+    async def acquire(self, size: int, pinned: Optional[UploadAccount] = None) -> UploadAccount:
+        """
+        Выбирает аккаунт для загрузки файла
+
+        Args:
+            size: Размер файла в байтах
+            pinned: Аккаунт, который обязательно нужно использовать
+
+        Returns:
+            Аккаунт (освобождается через release)
+        """
+        needed = min(size, self.max_file_bytes)
+        candidates = [pinned] if pinned else [
+            account for account in self.accounts if account.max_file_bytes >= needed
+        ]
+        announced = False
+        while True:
+            ready = [account for account in candidates if account.flood_remaining() <= 0]
+            if ready:
+                account = min(ready, key=lambda item: item.active)
+                account.active += 1
+                return account
+
+            # Все подходящие аккаунты ждут FloodWait - ждем ближайший
+            wait = min(account.flood_remaining() for account in candidates)
+            if not announced:
+                print(f"[ACCOUNTS] Все подходящие аккаунты ограничены FloodWait, ожидание {wait:.0f} сек")
+                announced = True
+            await asyncio.sleep(wait)
+
+    def release(self, account: UploadAccount) -> None:
+        """
+        Возвращает аккаунт в пул
+
+        Args:
+            account: Аккаунт, полученный через acquire
+        """
+        account.active = max(0, account.active - 1)
+
+    def report_flood(self, account: UploadAccount, seconds: float) -> bool:
+        """
+        Отмечает FloodWait аккаунта
+
+        Args:
+            account: Аккаунт, получивший FloodWait
+            seconds: Время ожидания
+
+        Returns:
+            True, если есть другой аккаунт без ограничения (файл можно отдать ему сразу)
+        """
+        account.penalize(seconds)
+        return any(other.flood_remaining() <= 0 for other in self.accounts if other is not account)
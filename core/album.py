@@ -0,0 +1,87 @@
+"""
+Модуль группировки загруженных видео в альбомы
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.upload_queue import UploadJob
+
+
+# Максимальное количество элементов в альбоме Telegram
+MAX_ALBUM_SIZE = 10
+
+
+class AlbumBatcher:
+    """
+    Собирает подготовленные видео в альбомы по порядку файлов
+
+    Файлы разбиваются на группы до 10 штук в исходном порядке. Группа
+    готова к отправке, когда каждый ее файл либо загружен, либо
+    окончательно завершился ошибкой.
+    """
+
+    def __init__(self, jobs: List[UploadJob], group_size: int = MAX_ALBUM_SIZE):
+        """
+        Инициализация группировки
+
+        Args:
+            jobs: Задания, отправляемые альбомами (в исходном порядке)
+            group_size: Размер альбома (не больше 10)
+        """
+        group_size = max(2, min(group_size, MAX_ALBUM_SIZE))
+        self._groups: List[List[UploadJob]] = [
+            jobs[i:i + group_size] for i in range(0, len(jobs), group_size)
+        ]
+        self._group_of: Dict[int, int] = {}
+        for group_index, group in enumerate(self._groups):
+            for job in group:
+                self._group_of[job.index] = group_index
+        self._ready: Dict[int, Tuple[Any, str]] = {}
+        self._discarded: set = set()
+        self._sent: set = set()
+
+    def contains(self, job: UploadJob) -> bool:
+        """Проверяет, отправляется ли файл в составе альбома"""
+        return job.index in self._group_of
+
+    def add(self, job: UploadJob, media: Any, caption: str) -> Optional[List[Tuple[UploadJob, Any, str]]]:
+        """
+        Добавляет подготовленное видео
+
+        Args:
+            job: Задание
+            media: InputMediaDocument
+            caption: Подпись
+
+        Returns:
+            Элементы альбома (задание, медиа, подпись), если группа готова
+        """
+        self._ready[job.index] = (media, caption)
+        return self._take_if_complete(self._group_of[job.index])
+
+    def discard(self, job: UploadJob) -> Optional[List[Tuple[UploadJob, Any, str]]]:
+        """
+        Исключает окончательно неудавшийся файл из альбома
+
+        Args:
+            job: Задание
+
+        Returns:
+            Элементы альбома, если после исключения группа стала готовой
+        """
+        self._discarded.add(job.index)
+        return self._take_if_complete(self._group_of[job.index])
+
+    def _take_if_complete(self, group_index: int) -> Optional[List[Tuple[UploadJob, Any, str]]]:
+        """Возвращает группу один раз, когда все ее элементы завершены"""
+        if group_index in self._sent:
+            return None
+
+        group = self._groups[group_index]
+        if not all(job.index in self._ready or job.index in self._discarded for job in group):
+            return None
+
+        self._sent.add(group_index)
+        return [
+            (job, *self._ready[job.index])
+            for job in group if job.index in self._ready
+        ]
@@ -2,21 +2,30 @@
 Модуль для авторизации в Telegram
 """
 import asyncio
-import threading
 from typing import Optional
-from PyQt5.QtCore import QThread, pyqtSignal
+from PyQt5.QtCore import pyqtSignal
 from pyrogram import Client
-from pyrogram.errors import SessionPasswordNeeded, PhoneCodeInvalid
+from pyrogram.errors import SessionPasswordNeeded, PhoneCodeInvalid, Unauthorized
+from core.accounts import DEFAULT_SESSION
+from core.auth_cache import user_snapshot
+from core.loop import LoopTask, event_loop
+from core.metrics import AUTH_CHECKS
+from core.tracing import span
 
 
-class TelegramAuth(QThread):
-    """Поток для авторизации в Telegram"""
+# Сколько ждать ввода кода подтверждения, с
+CODE_WAIT_TIMEOUT = 120
+
+
+class TelegramAuth(LoopTask):
+    """Задача авторизации в Telegram (в общем цикле событий)"""
     
     step_completed = pyqtSignal(str, str, str)  # step, status, data
     error_occurred = pyqtSignal(str)
     code_requested = pyqtSignal()  # Сигнал для запроса кода от пользователя
+    user_verified = pyqtSignal(dict)  # Данные пользователя для кэша (user_snapshot)
     
-    def __init__(self, api_id: int, api_hash: str, phone: str):
+    def __init__(self, api_id: int, api_hash: str, phone: str, session_name: str = DEFAULT_SESSION):
         """
         Инициализация авторизации
         
@@ -24,14 +33,16 @@ class TelegramAuth(QThread):
             api_id: API ID Telegram
             api_hash: API Hash Telegram  
             phone: Номер телефона
+            session_name: Имя файла сессии аккаунта
         """
         super().__init__()
         self.api_id = api_id
         self.api_hash = api_hash
         self.phone = phone
+        self.session_name = session_name
         self.user_code: Optional[str] = None
         self.user_password: Optional[str] = None
-        self.code_event: Optional[threading.Event] = None
+        self.code_event: Optional[asyncio.Event] = None
         self.client: Optional[Client] = None
         self.phone_code_hash: Optional[str] = None
         
@@ -44,7 +55,8 @@ class TelegramAuth(QThread):
         """
         self.user_code = code
         if self.code_event:
-            self.code_event.set()
+            # Событие принадлежит общему циклу - устанавливаем его в потоке цикла
+            event_loop.call_soon(self.code_event.set)
     
     def set_password(self, password: str) -> None:
         """
@@ -55,35 +67,36 @@ class TelegramAuth(QThread):
         """
         self.user_password = password
         
-    def run(self) -> None:
-        """Запуск потока авторизации"""
-        asyncio.set_event_loop(asyncio.new_event_loop())
-        loop = asyncio.get_event_loop()
+    async def run(self) -> None:
+        """Запуск задачи авторизации"""
         try:
-            loop.run_until_complete(self.full_authorization_flow())
+            await self.full_authorization_flow()
         except Exception as e:
             self.error_occurred.emit(str(e))
-        finally:
-            loop.close()
     
     async def full_authorization_flow(self) -> None:
-        """Полный цикл авторизации в одном потоке"""
+        """Полный цикл авторизации в одной задаче"""
         try:
             print(f"[AUTH] Начинаем авторизацию для {self.phone}")
             
             self.client = Client(
-                "uploader_session",
+                self.session_name,
                 api_id=self.api_id,
                 api_hash=self.api_hash,
                 phone_number=self.phone
             )
             
-            await self.client.connect()
+            with span("connect", "auth"):
+                await self.client.connect()
             
             # Проверяем, авторизованы ли мы уже
-            if await self.client.get_me():
+            with span("get_me", "auth"):
+                authorized = await self.client.get_me()
+            if authorized:
                 print("[AUTH] Уже авторизованы!")
+                AUTH_CHECKS.inc(result="authorized")
                 user = await self.client.get_me()
+                self.user_verified.emit(user_snapshot(user))
                 self.step_completed.emit("already_authorized", "success", 
                                        f"{user.first_name} {user.last_name or ''}")
                 return
@@ -93,20 +106,24 @@ class TelegramAuth(QThread):
             
         try:
             # Отправляем код
-            sent_code = await self.client.send_code(self.phone)
+            with span("send_code", "auth"):
+                sent_code = await self.client.send_code(self.phone)
             self.phone_code_hash = sent_code.phone_code_hash
             print(f"[AUTH] Код отправлен на {self.phone}")
             
             self.step_completed.emit("code_sent", "success", "Код отправлен")
             
             # Ждем код от пользователя
-            await self.wait_for_user_code()
+            with span("wait_user_code", "auth"):
+                await self.wait_for_user_code()
             
             # Подтверждаем код
-            await self.confirm_code_in_same_session()
+            with span("sign_in", "auth"):
+                await self.confirm_code_in_same_session()
             
         except Exception as e:
             print(f"[AUTH] Ошибка авторизации: {e}")
+            AUTH_CHECKS.inc(result="error")
             self.error_occurred.emit(str(e))
         finally:
             if self.client:
@@ -115,20 +132,17 @@ class TelegramAuth(QThread):
     async def wait_for_user_code(self) -> None:
         """Ждем ввода кода от пользователя"""
         print("[AUTH] Ждем ввод кода от пользователя...")
-        self.code_requested.emit()
-        
-        self.code_event = threading.Event()
-        
-        # Ждем пока пользователь не введет код (с таймаутом 120 секунд)
-        loop = asyncio.get_event_loop()
-        
-        def wait_for_code():
-            return self.code_event.wait(timeout=120)
         
-        # Запускаем ожидание в отдельном потоке, чтобы не блокировать event loop
-        code_received = await loop.run_in_executor(None, wait_for_code)
+        # Событие создается до запроса кода, чтобы не пропустить быстрый ввод
+        self.code_event = asyncio.Event()
+        if self.user_code:
+            self.code_event.set()
+        self.code_requested.emit()
         
-        if not code_received:
+        # Ожидание не занимает поток: задача просто спит до set_code или отмены
+        try:
+            await asyncio.wait_for(self.code_event.wait(), CODE_WAIT_TIMEOUT)
+        except asyncio.TimeoutError:
             raise Exception("Время ожидания кода истекло")
             
         print(f"[AUTH] Получен код от пользователя: {self.user_code}")
@@ -143,6 +157,8 @@ class TelegramAuth(QThread):
             )
             
             print(f"[AUTH] Успешная авторизация для {user.first_name}")
+            AUTH_CHECKS.inc(result="signed_in")
+            self.user_verified.emit(user_snapshot(user))
             self.step_completed.emit("auth_success", "success", 
                                    f"{user.first_name} {user.last_name or ''}")
             
@@ -154,6 +170,8 @@ class TelegramAuth(QThread):
                 try:
                     user = await self.client.check_password(self.user_password)
                     print(f"[AUTH] Успешная авторизация с 2FA для {user.first_name}")
+                    AUTH_CHECKS.inc(result="signed_in")
+                    self.user_verified.emit(user_snapshot(user))
                     self.step_completed.emit("auth_success", "success", 
                                            f"{user.first_name} {user.last_name or ''}")
                 except Exception as e:
@@ -167,13 +185,20 @@ class TelegramAuth(QThread):
             raise Exception(f"Ошибка подтверждения кода: {e}")
 
 
-class TelegramAuthChecker(QThread):
-    """Отдельный поток только для проверки авторизации"""
+class TelegramAuthChecker(LoopTask):
+    """
+    Отдельная задача только для проверки авторизации
+    
+    Отличает отозванную сессию (шаг not_authorized) от недоступной сети
+    (шаг check_failed): во втором случае сохраненное состояние остается
+    в силе.
+    """
     
     step_completed = pyqtSignal(str, str, str)
     error_occurred = pyqtSignal(str)
+    user_verified = pyqtSignal(dict)
     
-    def __init__(self, api_id: int, api_hash: str, phone: str):
+    def __init__(self, api_id: int, api_hash: str, phone: str, session_name: str = DEFAULT_SESSION):
         """
         Инициализация проверки авторизации
         
@@ -181,47 +206,56 @@ class TelegramAuthChecker(QThread):
             api_id: API ID Telegram
             api_hash: API Hash Telegram
             phone: Номер телефона
+            session_name: Имя файла сессии аккаунта
         """
         super().__init__()
         self.api_id = api_id
         self.api_hash = api_hash
         self.phone = phone
+        self.session_name = session_name
     
-    def run(self) -> None:
-        """Запуск потока проверки"""
-        asyncio.set_event_loop(asyncio.new_event_loop())
-        loop = asyncio.get_event_loop()
+    async def run(self) -> None:
+        """Запуск задачи проверки"""
         try:
-            loop.run_until_complete(self.check_authorization())
+            await self.check_authorization()
         except Exception as e:
             self.error_occurred.emit(str(e))
-        finally:
-            loop.close()
     
     async def check_authorization(self) -> None:
         """Проверяет авторизацию"""
         client = None
         try:
             client = Client(
-                "uploader_session",
+                self.session_name,
                 api_id=self.api_id,
                 api_hash=self.api_hash,
                 phone_number=self.phone
             )
             
-            await client.connect()
-            user = await client.get_me()
+            with span("connect", "auth"):
+                await client.connect()
+            with span("get_me", "auth"):
+                user = await client.get_me()
             
             if user:
                 print(f"[CHECK_AUTH] Авторизован как: {user.first_name} {user.last_name or ''}")
+                AUTH_CHECKS.inc(result="authorized")
+                self.user_verified.emit(user_snapshot(user))
                 self.step_completed.emit("already_authorized", "success", 
                                        f"{user.first_name} {user.last_name or ''}")
             else:
+                AUTH_CHECKS.inc(result="not_authorized")
                 self.step_completed.emit("not_authorized", "info", "Не авторизован")
                 
-        except Exception as e:
+        except Unauthorized as e:
+            AUTH_CHECKS.inc(result="not_authorized")
             print(f"[CHECK_AUTH] Не авторизован: {e}")
             self.step_completed.emit("not_authorized", "info", "Не авторизован")
+        except Exception as e:
+            # Сеть недоступна или сервер не ответил - авторизацию подтвердить нельзя
+            AUTH_CHECKS.inc(result="check_failed")
+            print(f"[CHECK_AUTH] Не удалось проверить авторизацию: {e}")
+            self.step_completed.emit("check_failed", "warning", str(e))
         finally:
             if client:
                 await client.disconnect()
\ No newline at end of file
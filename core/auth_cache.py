@@ -0,0 +1,163 @@
+"""
+Модуль кэша последнего известного состояния авторизации
+"""
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+class AuthCache:
+    """
+    Кэш пользователя и списка чатов, сохраняемый между запусками
+
+    Позволяет сразу после запуска показать состояние "авторизован"
+    и последний список чатов, не дожидаясь подключения к Telegram.
+    Проверка в сети выполняется параллельно и сбрасывает кэш, только
+    если сессия действительно недействительна. Записи хранятся
+    отдельно для каждой пары API ID + номер телефона.
+    """
+
+    _lock = threading.Lock()
+
+    def __init__(self, filename: str = "auth_cache.json"):
+        """
+        Инициализация кэша
+
+        Args:
+            filename: Имя файла кэша
+        """
+        self.filename = filename
+
+    def load(self, api_id: Any, phone: str) -> Optional[Dict[str, Any]]:
+        """
+        Возвращает сохраненное состояние аккаунта
+
+        Args:
+            api_id: API ID Telegram
+            phone: Номер телефона
+
+        Returns:
+            Словарь с ключами user, chats, verified_at или None
+        """
+        with self._lock:
+            entry = self._load().get(self._key(api_id, phone))
+        if not entry or not entry.get('user'):
+            return None
+        return entry
+
+    def save_user(self, api_id: Any, phone: str, user: Dict[str, Any]) -> None:
+        """
+        Запоминает пользователя после успешной проверки авторизации
+
+        Args:
+            api_id: API ID Telegram
+            phone: Номер телефона
+            user: Данные пользователя (см. user_snapshot)
+        """
+        with self._lock:
+            data = self._load()
+            entry = data.setdefault(self._key(api_id, phone), {})
+            # Список чатов принадлежит аккаунту - при смене пользователя он устарел
+            if entry.get('user', {}).get('id') != user.get('id'):
+                entry.pop('chats', None)
+            entry['user'] = user
+            entry['verified_at'] = time.time()
+            self._save(data)
+
+    def save_chats(self, api_id: Any, phone: str, chats: List[Dict[str, Any]]) -> None:
+        """
+        Запоминает последний загруженный список чатов
+
+        Args:
+            api_id: API ID Telegram
+            phone: Номер телефона
+            chats: Список чатов в формате ChatLoader
+        """
+        with self._lock:
+            data = self._load()
+            entry = data.get(self._key(api_id, phone))
+            if entry is None:
+                return
+            entry['chats'] = chats
+            self._save(data)
+
+    def forget(self, api_id: Any, phone: str) -> None:
+        """
+        Удаляет состояние аккаунта (сессия оказалась недействительной)
+
+        Args:
+            api_id: API ID Telegram
+            phone: Номер телефона
+        """
+        with self._lock:
+            data = self._load()
+            if data.pop(self._key(api_id, phone), None) is not None:
+                self._save(data)
+
+    def clear(self) -> None:
+        """Удаляет кэш авторизации"""
+        with self._lock:
+            try:
+                if os.path.exists(self.filename):
+                    os.remove(self.filename)
+            except Exception as e:
+                print(f"[AUTH_CACHE] Ошибка удаления кэша авторизации: {e}")
+
+    @staticmethod
+    def _key(api_id: Any, phone: str) -> str:
+        """Ключ записи аккаунта"""
+        return f"{str(api_id).strip()}|{phone.strip()}"
+
+    def _load(self) -> Dict[str, Any]:
+        """Загружает кэш из файла"""
+        try:
+            if os.path.exists(self.filename):
+                with open(self.filename, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            print(f"[AUTH_CACHE] Ошибка загрузки кэша авторизации: {e}")
+        return {}
+
+    def _save(self, data: Dict[str, Any]) -> None:
+        """Сохраняет кэш в файл (через временный файл)"""
+        tmp_path = self.filename + ".tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.filename)
+        except Exception as e:
+            print(f"[AUTH_CACHE] Ошибка сохранения кэша авторизации: {e}")
+
+
+def user_snapshot(user) -> Dict[str, Any]:
+    """
+    Извлекает из пользователя Pyrogram данные для кэша
+
+    Args:
+        user: Результат client.get_me()
+
+    Returns:
+        Словарь с ключами id, first_name, last_name, username, is_premium
+    """
+    return {
+        'id': user.id,
+        'first_name': user.first_name or "",
+        'last_name': user.last_name or "",
+        'username': getattr(user, 'username', None),
+        'is_premium': bool(getattr(user, 'is_premium', False))
+    }
+
+
+def display_name(user: Dict[str, Any]) -> str:
+    """
+    Имя пользователя для строки статуса (как в сообщениях авторизации)
+
+    Args:
+        user: Данные пользователя из кэша
+
+    Returns:
+        Имя и фамилия
+    """
+    return f"{user.get('first_name', '')} {user.get('last_name') or ''}"
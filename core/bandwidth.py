@@ -0,0 +1,229 @@
+"""
+Модуль ограничения скорости загрузки (token bucket) с недельным расписанием
+"""
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+
+# Как часто пересчитывается лимит по расписанию, сек
+SCHEDULE_CHECK_INTERVAL = 30.0
+
+# Максимальный сон за один шаг ожидания: изменение лимита применяется не позже
+MAX_WAIT_STEP = 0.5
+
+
+class TokenBucket:
+    """
+    Ведро токенов: байты расходуются из запаса, который пополняется со скоростью rate
+
+    Лимит можно менять на лету; ожидающие пересчитывают задержку
+    не реже раза в MAX_WAIT_STEP секунд.
+    """
+
+    def __init__(self, rate: Optional[float] = None, burst_seconds: float = 1.0):
+        """
+        Инициализация ведра
+
+        Args:
+            rate: Скорость в байтах/сек (None или 0 - без ограничения)
+            burst_seconds: Размер запаса в секундах передачи
+        """
+        self.burst_seconds = burst_seconds
+        self.rate: Optional[float] = None
+        self._tokens = 0.0
+        self._updated = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+        self.set_rate(rate)
+
+    def set_rate(self, rate: Optional[float]) -> None:
+        """
+        Меняет лимит скорости
+
+        Args:
+            rate: Скорость в байтах/сек (None или 0 - без ограничения)
+        """
+        self._refill()
+        self.rate = rate if rate and rate > 0 else None
+        if self.rate is not None:
+            self._tokens = min(self._tokens, self._capacity(0))
+
+    async def acquire(self, size: int) -> None:
+        """
+        Ждет, пока в ведре наберется size байт, и расходует их
+
+        Args:
+            size: Количество байт
+        """
+        if self.rate is None:
+            return
+
+        # Блокировка создается внутри цикла событий, в котором идет загрузка
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.rate is None:
+                    return
+                if self._tokens >= size:
+                    self._tokens -= size
+                    return
+                wait = (size - self._tokens) / self.rate
+                await asyncio.sleep(min(wait, MAX_WAIT_STEP))
+
+    def _capacity(self, size: int) -> float:
+        """Максимальный запас токенов"""
+        return max(self.rate * self.burst_seconds, size)
+
+    def _refill(self) -> None:
+        """Пополняет запас за прошедшее время"""
+        now = time.monotonic()
+        if self.rate is not None:
+            elapsed = now - self._updated
+            self._tokens = min(self._tokens + elapsed * self.rate, self._capacity(512 * 1024))
+        self._updated = now
+
+
+class BandwidthSchedule:
+    """
+    Недельное расписание лимита скорости
+
+    Правило: дни недели (0 - понедельник), интервал времени и лимит в МБ/с.
+    Интервал может переходить через полночь (например, 22:00-06:00).
+    Вне правил действует лимит по умолчанию; 0 означает без ограничения.
+    """
+
+    def __init__(self, default_mb_per_sec: float = 0, rules: Optional[List[Dict[str, Any]]] = None):
+        """
+        Инициализация расписания
+
+        Args:
+            default_mb_per_sec: Лимит вне правил, МБ/с (0 - без ограничения)
+            rules: Список правил вида
+                {"days": [0, 1, 2, 3, 4], "start": "09:00", "end": "18:00", "mb_per_sec": 5}
+        """
+        self.default_mb_per_sec = default_mb_per_sec
+        self.rules = []
+        for rule in rules or []:
+            try:
+                self.rules.append({
+                    'days': set(rule.get('days', range(7))),
+                    'start': self._parse_time(rule['start']),
+                    'end': self._parse_time(rule['end']),
+                    'mb_per_sec': float(rule.get('mb_per_sec', 0)),
+                })
+            except (KeyError, ValueError, TypeError) as e:
+                print(f"[BANDWIDTH] Пропущено некорректное правило расписания {rule}: {e}")
+
+    @staticmethod
+    def _parse_time(value: str) -> int:
+        """Переводит 'ЧЧ:ММ' в минуты от начала суток"""
+        hours, minutes = value.split(":")
+        return int(hours) * 60 + int(minutes)
+
+    def rate_at(self, moment: Optional[datetime] = None) -> Optional[float]:
+        """
+        Возвращает лимит на указанный момент
+
+        Args:
+            moment: Момент времени (по умолчанию - сейчас)
+
+        Returns:
+            Лимит в байтах/сек или None без ограничения
+        """
+        moment = moment or datetime.now()
+        minute = moment.hour * 60 + moment.minute
+        weekday = moment.weekday()
+        mb_per_sec = self.default_mb_per_sec
+
+        for rule in self.rules:
+            start, end = rule['start'], rule['end']
+            if start <= end:
+                active = weekday in rule['days'] and start <= minute < end
+            elif minute >= start:
+                active = weekday in rule['days']
+            else:
+                # Хвост интервала после полуночи относится к предыдущему дню
+                active = (weekday - 1) % 7 in rule['days'] and minute < end
+            if active:
+                mb_per_sec = rule['mb_per_sec']
+                break
+
+        return mb_per_sec * 1024 * 1024 if mb_per_sec and mb_per_sec > 0 else None
+
+
+class BandwidthLimiter:
+    """Общий для всех загрузок лимит скорости с учетом расписания"""
+
+    def __init__(self, schedule: Optional[BandwidthSchedule] = None, share: float = 1.0):
+        """
+        Инициализация ограничителя
+
+        Args:
+            schedule: Расписание лимита (None - без ограничения)
+            share: Доля лимита расписания (для процессов-загрузчиков,
+                делящих общий лимит)
+        """
+        self.schedule = schedule or BandwidthSchedule()
+        self.share = share
+        self._bucket = TokenBucket(self._scheduled_rate())
+        self._checked = time.monotonic()
+
+    @property
+    def rate(self) -> Optional[float]:
+        """Текущий лимит в байтах/сек"""
+        return self._bucket.rate
+
+    def set_schedule(self, schedule: BandwidthSchedule) -> None:
+        """
+        Заменяет расписание (применяется сразу, в том числе к ожидающим частям)
+
+        Args:
+            schedule: Новое расписание
+        """
+        self.schedule = schedule
+        self._apply_schedule()
+
+    async def acquire(self, size: int) -> None:
+        """
+        Ждет разрешения на отправку size байт
+
+        Args:
+            size: Размер части в байтах
+        """
+        if time.monotonic() - self._checked >= SCHEDULE_CHECK_INTERVAL:
+            self._apply_schedule()
+        await self._bucket.acquire(size)
+
+    def _apply_schedule(self) -> None:
+        """Пересчитывает лимит по расписанию"""
+        self._checked = time.monotonic()
+        rate = self._scheduled_rate()
+        if rate != self._bucket.rate:
+            label = f"{rate / (1024 * 1024):.1f} МБ/с" if rate else "без ограничения"
+            print(f"[BANDWIDTH] Лимит скорости: {label}")
+            self._bucket.set_rate(rate)
+
+    def _scheduled_rate(self) -> Optional[float]:
+        """Лимит по расписанию с учетом доли, байт/сек"""
+        rate = self.schedule.rate_at()
+        return rate * self.share if rate else None
+
+
+def schedule_from_settings(settings) -> BandwidthSchedule:
+    """
+    Создает расписание из настроек
+
+    Args:
+        settings: Настройки приложения (ключи bandwidth_limit_mb, bandwidth_schedule)
+
+    Returns:
+        Расписание лимита
+    """
+    try:
+        default_mb = float(settings.get("bandwidth_limit_mb", 0) or 0)
+    except (TypeError, ValueError):
+        default_mb = 0
+    return BandwidthSchedule(default_mb, settings.get("bandwidth_schedule", []))
@@ -1,58 +1,64 @@
 """
 Модуль для загрузки списка чатов
 """
-import asyncio
+import time
 from typing import List, Dict, Any
-from PyQt5.QtCore import QThread, pyqtSignal
+from PyQt5.QtCore import pyqtSignal
 from pyrogram import Client
 from pyrogram.enums import ChatType
+from core.accounts import DEFAULT_SESSION
+from core.loop import LoopTask
+from core.metrics import CHAT_LOAD_SECONDS, CHAT_LOADS, CHATS_LOADED
+from core.peer_cache import PeerCache, make_peer_entry
+from core.tracing import span
 
 
-class ChatLoader(QThread):
-    """Поток для загрузки списка чатов"""
+class ChatLoader(LoopTask):
+    """Задача загрузки списка чатов (в общем цикле событий)"""
     
     chats_loaded = pyqtSignal(list)  # Список чатов
     error_occurred = pyqtSignal(str)
     progress_updated = pyqtSignal(str)  # Статус загрузки
     
-    def __init__(self, api_id: int, api_hash: str):
+    def __init__(self, api_id: int, api_hash: str, session_name: str = DEFAULT_SESSION):
         """
         Инициализация загрузчика чатов
         
         Args:
             api_id: API ID Telegram
             api_hash: API Hash Telegram
+            session_name: Имя файла сессии аккаунта
         """
         super().__init__()
         self.api_id = api_id
         self.api_hash = api_hash
+        self.session_name = session_name
     
-    def run(self) -> None:
-        """Запуск потока загрузки"""
-        asyncio.set_event_loop(asyncio.new_event_loop())
-        loop = asyncio.get_event_loop()
+    async def run(self) -> None:
+        """Запуск задачи загрузки"""
         try:
-            loop.run_until_complete(self.load_chats())
+            await self.load_chats()
         except Exception as e:
             self.error_occurred.emit(str(e))
-        finally:
-            loop.close()
     
     async def load_chats(self) -> None:
         """Загружает список доступных чатов"""
         client = None
+        started = time.monotonic()
         try:
             client = Client(
-                "uploader_session",
+                self.session_name,
                 api_id=self.api_id,
                 api_hash=self.api_hash
             )
             
-            await client.connect()
+            with span("connect", "chats"):
+                await client.connect()
             
             # Проверяем авторизацию
             try:
-                me = await client.get_me()
+                with span("get_me", "chats"):
+                    me = await client.get_me()
                 if not me:
                     raise Exception("Пользователь не авторизован")
                 print(f"[CHAT_LOADER] Загружаем чаты для: {me.first_name}")
@@ -62,34 +68,55 @@ class ChatLoader(QThread):
             self.progress_updated.emit("Получаем список диалогов...")
             
             chats = []
+            peers = {}
             dialog_count = 0
             
             # Получаем все диалоги
-            async for dialog in client.get_dialogs():
-                dialog_count += 1
-                
-                if dialog_count % 50 == 0:
-                    self.progress_updated.emit(f"Обработано диалогов: {dialog_count}")
-                
-                chat = dialog.chat
-                
-                # Фильтруем чаты
-                if not self._should_include_chat(chat):
-                    continue
-                
-                # Подготавливаем информацию о чате
-                chat_info = self._prepare_chat_info(chat)
-                chats.append(chat_info)
-                
-                print(f"[CHAT_LOADER] Добавлен чат: {chat_info['title']}")
+            with span("get_dialogs", "chats") as dialogs_span:
+                async for dialog in client.get_dialogs():
+                    dialog_count += 1
+                    
+                    if dialog_count % 50 == 0:
+                        self.progress_updated.emit(f"Обработано диалогов: {dialog_count}")
+                    
+                    chat = dialog.chat
+                    
+                    # Фильтруем чаты
+                    if not self._should_include_chat(chat):
+                        continue
+                    
+                    # Подготавливаем информацию о чате
+                    chat_info = self._prepare_chat_info(chat)
+                    chats.append(chat_info)
+                    
+                    # Запоминаем пир для загрузчика (разрешается локально из сессии)
+                    try:
+                        input_peer = await client.resolve_peer(chat.id)
+                        peers[chat.id] = make_peer_entry(
+                            input_peer, self._get_peer_type(chat), getattr(chat, 'username', None)
+                        )
+                    except Exception as e:
+                        print(f"[CHAT_LOADER] Не удалось получить пир для {chat.id}: {e}")
+                    
+                    print(f"[CHAT_LOADER] Добавлен чат: {chat_info['title']}")
+                dialogs_span.set(dialogs=dialog_count, chats=len(chats))
             
             # Сортируем чаты по названию
             chats.sort(key=lambda x: x['title'].lower())
             
             print(f"[CHAT_LOADER] Загружено {len(chats)} чатов из {dialog_count} диалогов")
+            
+            # Сохраняем кэш пиров, чтобы загрузчик не сканировал диалоги
+            with span("save_peer_cache", "chats"):
+                PeerCache().update(me.id, peers)
+            print(f"[CHAT_LOADER] Кэш пиров обновлен: {len(peers)} записей")
+            CHAT_LOADS.inc(result="ok")
+            CHAT_LOAD_SECONDS.observe(time.monotonic() - started)
+            CHATS_LOADED.set(len(chats))
             self.chats_loaded.emit(chats)
             
         except Exception as e:
+            CHAT_LOADS.inc(result="error")
             print(f"[CHAT_LOADER] Ошибка загрузки чатов: {e}")
             self.error_occurred.emit(str(e))
         finally:
@@ -126,6 +153,26 @@ class ChatLoader(QThread):
         
         return False
     
+    def _get_peer_type(self, chat) -> str:
+        """
+        Определяет тип пира в терминах хранилища Pyrogram
+        
+        Args:
+            chat: Объект чата
+            
+        Returns:
+            Тип пира: user, bot, group, channel или supergroup
+        """
+        if chat.type == ChatType.BOT:
+            return "bot"
+        if chat.type == ChatType.GROUP:
+            return "group"
+        if chat.type == ChatType.SUPERGROUP:
+            return "supergroup"
+        if chat.type == ChatType.CHANNEL:
+            return "channel"
+        return "user"
+    
     def _prepare_chat_info(self, chat) -> Dict[str, Any]:
         """
         Подготавливает информацию о чате для отображения
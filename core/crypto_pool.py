@@ -0,0 +1,165 @@
+"""
+Модуль пула потоков шифрования MTProto
+"""
+import concurrent.futures
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class ShardedCryptoExecutor(concurrent.futures.Executor):
+    """
+    Исполнитель шифрования с отдельной очередью (полосой) на каждый поток
+
+    Pyrogram шифрует и расшифровывает пакеты (AES-IGE, для обфусцированного
+    транспорта - AES-CTR) в одном потоке pyrogram.crypto_executor на все
+    соединения, и при многих параллельных загрузках этот поток становится
+    пределом скорости. TgCrypto и hashlib отпускают GIL, поэтому несколько
+    потоков шифруют действительно параллельно.
+
+    Пакеты одного соединения должны уходить в порядке вызова, поэтому
+    задачи одного соединения (session_id для pack/unpack, состояние потока
+    для CTR) попадают в одну полосу, пока у него есть незавершенные задачи.
+    Свободное соединение получает наименее загруженную полосу, так что
+    разные соединения шифруются в разных потоках.
+    """
+
+    def __init__(self, workers: int):
+        """
+        Инициализация исполнителя
+
+        Args:
+            workers: Количество потоков шифрования
+        """
+        self._lock = threading.Lock()
+        self._lanes: List[concurrent.futures.ThreadPoolExecutor] = []
+        self._pending: List[int] = []
+        # Ключ соединения -> [полоса, незавершенные задачи]
+        self._owners: Dict[Any, List[int]] = {}
+        self._shutdown = False
+        self.resize(workers)
+
+    @property
+    def workers(self) -> int:
+        """Количество потоков шифрования"""
+        return len(self._lanes)
+
+    def resize(self, workers: int) -> None:
+        """
+        Добавляет потоки (уменьшение не требуется - лишние полосы простаивают)
+
+        Args:
+            workers: Нужное количество потоков
+        """
+        with self._lock:
+            while len(self._lanes) < max(1, workers):
+                self._lanes.append(concurrent.futures.ThreadPoolExecutor(
+                    1, thread_name_prefix=f"CryptoWorker-{len(self._lanes)}"
+                ))
+                self._pending.append(0)
+
+    def submit(self, fn: Callable, *args, **kwargs) -> concurrent.futures.Future:
+        """Ставит задачу в полосу ее соединения"""
+        key = _order_key(fn, args)
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("Исполнитель шифрования остановлен")
+            owner = self._owners.get(key) if key is not None else None
+            if owner is not None:
+                lane = owner[0]
+                owner[1] += 1
+            else:
+                lane = min(range(len(self._lanes)), key=self._pending.__getitem__)
+                if key is not None:
+                    self._owners[key] = [lane, 1]
+            self._pending[lane] += 1
+            future = self._lanes[lane].submit(fn, *args, **kwargs)
+        future.add_done_callback(lambda _: self._task_done(lane, key))
+        return future
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        """Останавливает все потоки"""
+        with self._lock:
+            self._shutdown = True
+            lanes = list(self._lanes)
+        for lane in lanes:
+            lane.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+    def _task_done(self, lane: int, key: Any) -> None:
+        """Освобождает полосу соединения, когда у него не осталось задач"""
+        with self._lock:
+            self._pending[lane] -= 1
+            owner = self._owners.get(key) if key is not None else None
+            if owner is not None:
+                owner[1] -= 1
+                if owner[1] <= 0:
+                    del self._owners[key]
+
+
+def _order_key(fn: Callable, args: Tuple) -> Optional[Any]:
+    """
+    Ключ соединения, задачи которого нельзя переставлять
+
+    Args:
+        fn: Функция шифрования Pyrogram
+        args: Ее аргументы
+
+    Returns:
+        session_id для mtproto.pack/unpack, объект состояния для AES-CTR,
+        None для прочих задач (любая свободная полоса)
+    """
+    name = getattr(fn, "__name__", "")
+    if name == "pack" and len(args) >= 3:
+        # pack(message, salt, session_id, auth_key, auth_key_id)
+        return args[2]
+    if name == "unpack" and len(args) >= 2:
+        # unpack(b, session_id, auth_key, auth_key_id)
+        return args[1]
+    if name.startswith("ctr256_") and len(args) >= 3:
+        # ctr256_encrypt(data, key, iv, state): iv изменяется на месте и у
+        # каждого направления соединения свой
+        return id(args[2])
+    return None
+
+
+def default_crypto_workers(concurrency: int) -> int:
+    """
+    Количество потоков шифрования по умолчанию
+
+    Args:
+        concurrency: Количество одновременно загружаемых файлов (соединений)
+
+    Returns:
+        Не больше числа ядер и не больше числа соединений
+    """
+    return max(1, min(os.cpu_count() or 1, concurrency))
+
+
+def install_crypto_executor(workers: int) -> ShardedCryptoExecutor:
+    """
+    Заменяет однопоточный исполнитель шифрования Pyrogram на многопоточный
+
+    Повторный вызов только добавляет потоки, уже установленный исполнитель
+    не заменяется (задачи в его очередях сохраняют порядок).
+
+    Args:
+        workers: Количество потоков шифрования
+
+    Returns:
+        Установленный исполнитель
+    """
+    import pyrogram
+
+    executor = pyrogram.crypto_executor
+    if isinstance(executor, ShardedCryptoExecutor):
+        if workers > executor.workers:
+            executor.resize(workers)
+            print(f"[CRYPTO] Потоков шифрования: {executor.workers}")
+        return executor
+
+    sharded = ShardedCryptoExecutor(workers)
+    pyrogram.crypto_executor = sharded
+    # Задачи, уже стоящие в старой очереди, дорабатывают в ней
+    executor.shutdown(wait=False)
+    print(f"[CRYPTO] Потоков шифрования: {sharded.workers}")
+    return sharded
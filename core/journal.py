@@ -0,0 +1,236 @@
+"""
+Модуль журнала загрузки для продолжения прерванного пакета
+"""
+import json
+import os
+import time
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from utils.archive import find_member
+
+
+# Сколько сервер гарантированно хранит загруженные части файла (консервативно), сек
+UPLOAD_RESUME_MAX_AGE = 60 * 60
+
+# Минимальный интервал между записями прогресса частей на диск, сек
+SAVE_INTERVAL = 2.0
+
+
+class UploadJournal:
+    """
+    Журнал загрузки в целевой чат
+
+    Хранит отправленные файлы пакета, отправленные части разрезанных
+    видео и точку продолжения загрузки байтов (file_id и число
+    подтвержденных частей). После остановки следующий запуск пропускает
+    отправленное и дозагружает файл с места остановки. Записи привязаны
+    к размеру и времени изменения файла - измененный файл начинается заново.
+    """
+
+    def __init__(self, chat_id: int, filename: str = "upload_journal.json"):
+        """
+        Инициализация журнала
+
+        Args:
+            chat_id: ID целевого чата
+            filename: Имя файла журнала
+        """
+        self.chat_id = chat_id
+        self.filename = filename
+        self._data = self._load()
+        self._dirty = False
+        self._saved_at = 0.0
+
+    # Отправленные файлы
+
+    def is_sent(self, path: str) -> bool:
+        """Проверяет, был ли файл уже отправлен в этот чат"""
+        entry = self._get_entry("files", path)
+        return bool(entry and entry.get("sent"))
+
+    def mark_sent(self, path: str, upload_path: Optional[str] = None) -> None:
+        """
+        Отмечает файл как отправленный
+
+        Args:
+            path: Путь к исходному файлу
+            upload_path: Путь к фактически загруженному файлу (если отличается)
+        """
+        entry = self._set_entry("files", path)
+        if entry is not None:
+            entry["sent"] = True
+            entry.pop("split", None)
+        for uploaded in {path, upload_path or path}:
+            self._data["uploads"].pop(self._key(uploaded), None)
+        self.flush()
+
+    def get_split_plan(self, path: str) -> Optional[Dict[str, Any]]:
+        """Возвращает сохраненный план разрезания видео (SplitPlan.to_dict)"""
+        entry = self._get_entry("files", path)
+        split = entry.get("split") if entry else None
+        return split["plan"] if split else None
+
+    def save_split_plan(self, path: str, plan: Dict[str, Any], parts_sent: Iterable[str]) -> None:
+        """
+        Сохраняет план разрезания видео вместе с отправленными частями
+
+        Части отмечаются метками плана, а не номерами: при делении части
+        номера следующих частей сдвигаются, а метки остаются прежними.
+        Метки имеют смысл только вместе со своим планом.
+
+        Args:
+            path: Путь к исходному файлу
+            plan: План разрезания (SplitPlan.to_dict)
+            parts_sent: Метки уже отправленных частей этого плана
+        """
+        entry = self._set_entry("files", path)
+        if entry is not None:
+            entry["split"] = {"plan": plan, "parts_sent": sorted(parts_sent)}
+            self.flush()
+
+    def get_parts_sent(self, path: str) -> Set[str]:
+        """Возвращает метки уже отправленных частей разрезанного видео"""
+        entry = self._get_entry("files", path)
+        split = entry.get("split") if entry else None
+        return set(split["parts_sent"]) if split else set()
+
+    def mark_part_sent(self, path: str, label: str) -> None:
+        """Отмечает часть разрезанного видео (по метке в плане) как отправленную"""
+        entry = self._set_entry("files", path)
+        if entry is not None and entry.get("split"):
+            split = entry["split"]
+            split["parts_sent"] = sorted(set(split["parts_sent"]) | {label})
+            self.flush()
+
+    def clear_files(self, paths) -> None:
+        """
+        Удаляет записи о файлах завершенного пакета
+
+        Args:
+            paths: Пути к исходным файлам
+        """
+        for path in paths:
+            self._data["files"].pop(self._key(path), None)
+        self._dirty = True
+        self.flush()
+
+    # Точка продолжения загрузки байтов
+
+    def get_upload(self, path: str, total_parts: int, owner: str = "") -> Optional[Tuple[int, int]]:
+        """
+        Возвращает точку продолжения загрузки файла
+
+        Args:
+            path: Путь к загружаемому файлу
+            total_parts: Количество частей файла
+            owner: Сессия, через которую загружаются части (части другой
+                сессии сервер не примет)
+
+        Returns:
+            Кортеж (file_id, число подтвержденных частей) или None
+        """
+        entry = self._get_entry("uploads", path)
+        if not entry or entry.get("total_parts") != total_parts:
+            return None
+        if entry.get("owner", "") != owner:
+            return None
+        if time.time() - entry.get("updated", 0) > UPLOAD_RESUME_MAX_AGE:
+            return None
+        acknowledged = int(entry.get("acknowledged", 0))
+        if acknowledged <= 0 or acknowledged >= total_parts:
+            return None
+        return int(entry["file_id"]), acknowledged
+
+    def update_upload(self, path: str, file_id: int, acknowledged: int, total_parts: int,
+                      owner: str = "") -> None:
+        """
+        Запоминает прогресс загрузки байтов (запись на диск не чаще SAVE_INTERVAL)
+
+        Args:
+            path: Путь к загружаемому файлу
+            file_id: ID загружаемого файла
+            acknowledged: Количество непрерывно подтвержденных частей от начала
+            total_parts: Количество частей файла
+            owner: Сессия, через которую загружаются части
+        """
+        entry = self._set_entry("uploads", path)
+        if entry is None:
+            return
+        entry.update(file_id=file_id, acknowledged=acknowledged,
+                     total_parts=total_parts, owner=owner, updated=time.time())
+        if time.monotonic() - self._saved_at >= SAVE_INTERVAL:
+            self.flush()
+
+    def flush(self) -> None:
+        """Записывает журнал на диск, если есть изменения"""
+        if not self._dirty:
+            return
+        self._save()
+        self._dirty = False
+        self._saved_at = time.monotonic()
+
+    # Служебные методы
+
+    def _key(self, path: str) -> str:
+        """Ключ записи: чат и абсолютный путь"""
+        return f"{self.chat_id}|{os.path.abspath(path)}"
+
+    @staticmethod
+    def _fingerprint(path: str) -> Optional[Dict[str, int]]:
+        """Размер и время изменения файла (для файла в архиве - самого архива)"""
+        member = find_member(path)
+        try:
+            stat = os.stat(member.archive if member else path)
+        except OSError:
+            return None
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def _get_entry(self, section: str, path: str) -> Optional[Dict[str, Any]]:
+        """Возвращает запись, если файл не менялся с момента ее создания"""
+        entry = self._data[section].get(self._key(path))
+        if not entry or entry.get("fingerprint") != self._fingerprint(path):
+            return None
+        return entry
+
+    def _set_entry(self, section: str, path: str) -> Optional[Dict[str, Any]]:
+        """Возвращает запись для изменения (создает или пересоздает при изменении файла)"""
+        fingerprint = self._fingerprint(path)
+        if fingerprint is None:
+            return None
+        key = self._key(path)
+        entry = self._data[section].get(key)
+        if not entry or entry.get("fingerprint") != fingerprint:
+            entry = {"fingerprint": fingerprint}
+            self._data[section][key] = entry
+        self._dirty = True
+        return entry
+
+    def _load(self) -> Dict[str, Any]:
+        """Загружает журнал из файла"""
+        data: Dict[str, Any] = {}
+        try:
+            if os.path.exists(self.filename):
+                with open(self.filename, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+        except Exception as e:
+            print(f"[JOURNAL] Ошибка чтения журнала загрузки: {e}")
+        data.setdefault("files", {})
+        data.setdefault("uploads", {})
+
+        # Точки продолжения, которые сервер уже не хранит, не нужны
+        now = time.time()
+        data["uploads"] = {
+            key: entry for key, entry in data["uploads"].items()
+            if now - entry.get("updated", 0) <= UPLOAD_RESUME_MAX_AGE
+        }
+        return data
+
+    def _save(self) -> None:
+        """Атомарно сохраняет журнал в файл"""
+        tmp_path = self.filename + ".tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.filename)
+        except Exception as e:
+            print(f"[JOURNAL] Ошибка сохранения журнала загрузки: {e}")
@@ -0,0 +1,213 @@
+"""
+Модуль общего цикла событий asyncio для всех операций с Telegram
+"""
+import asyncio
+import concurrent.futures
+import threading
+from typing import Callable, Coroutine, Optional
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from core.loop_policy import cancel_remaining_tasks, implementation, new_event_loop
+
+
+# Сколько ждать отмены задач при закрытии приложения, с
+SHUTDOWN_TIMEOUT = 5.0
+
+
+class EventLoopThread:
+    """
+    Выделенный поток с единственным циклом событий приложения
+
+    Проверка авторизации, загрузка чатов и загрузка файлов выполняются
+    задачами в этом цикле, а не в собственных циклах отдельных потоков.
+    Поток запускается при первом обращении и живет до закрытия приложения.
+    Реализация цикла (asyncio или uvloop) выбирается в core.loop_policy.
+    """
+
+    def __init__(self, name: str = "telegram-loop"):
+        """
+        Инициализация потока цикла
+
+        Args:
+            name: Имя потока (видно в трассировке)
+        """
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def get_loop(self) -> asyncio.AbstractEventLoop:
+        """
+        Возвращает работающий цикл, запуская поток при необходимости
+
+        Returns:
+            Цикл событий
+        """
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                ready = threading.Event()
+                self._thread = threading.Thread(target=self._run, args=(ready,),
+                                                name=self.name, daemon=True)
+                self._thread.start()
+                ready.wait()
+            return self._loop
+
+    def submit(self, coroutine: Coroutine) -> concurrent.futures.Future:
+        """
+        Запускает корутину задачей в общем цикле (можно вызывать из любого потока)
+
+        Args:
+            coroutine: Корутина
+
+        Returns:
+            Future с результатом корутины
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self.get_loop())
+
+    def call_soon(self, callback: Callable, *args) -> None:
+        """
+        Выполняет функцию в потоке цикла (можно вызывать из любого потока)
+
+        Args:
+            callback: Функция
+            *args: Аргументы функции
+        """
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:
+            # Цикл закрылся между проверкой и вызовом - приложение завершается
+            pass
+
+    def in_loop_thread(self) -> bool:
+        """Вызван ли метод из потока цикла"""
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def stop(self, timeout: float = SHUTDOWN_TIMEOUT) -> None:
+        """
+        Отменяет все задачи и останавливает цикл (при закрытии приложения)
+
+        Args:
+            timeout: Сколько ждать завершения потока, с
+        """
+        with self._lock:
+            loop, thread = self._loop, self._thread
+        if loop is None or loop.is_closed():
+            return
+        self.call_soon(loop.stop)
+        if thread is not None and not self.in_loop_thread():
+            thread.join(timeout)
+            if thread.is_alive():
+                print(f"[LOOP] Цикл не остановился за {timeout:.0f} с, завершится вместе с процессом")
+
+    def _run(self, ready: threading.Event) -> None:
+        """Тело потока: цикл работает, пока его не остановят"""
+        loop = new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+        ready.set()
+        print(f"[LOOP] Цикл событий запущен ({implementation()})")
+        try:
+            loop.run_forever()
+        finally:
+            cancel_remaining_tasks(loop)
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.close()
+            print("[LOOP] Цикл событий остановлен")
+
+
+# Общий цикл событий приложения
+event_loop = EventLoopThread()
+
+
+class LoopTask(QObject):
+    """
+    Операция Telegram, выполняемая одной задачей в общем цикле событий
+
+    Повторяет используемую контроллером часть интерфейса QThread
+    (start, isRunning, isFinished, wait, сигнал finished), поэтому
+    поток на каждую операцию не создается. Остановка - отменой задачи:
+    CancelledError проходит через все ожидающие стадии, блоки finally
+    освобождают ресурсы. Сигналы отправляются из потока цикла и
+    доставляются в поток GUI через очередь Qt.
+    """
+
+    finished = pyqtSignal()
+
+    def __init__(self):
+        """Инициализация задачи"""
+        super().__init__()
+        self._future: Optional[concurrent.futures.Future] = None
+        self._task: Optional[asyncio.Task] = None
+        self._cancel_requested = False
+
+    async def run(self) -> None:
+        """Тело операции (переопределяется наследниками)"""
+        raise NotImplementedError
+
+    def start(self) -> None:
+        """Запускает операцию задачей в общем цикле"""
+        if self.isRunning():
+            return
+        self._future = event_loop.submit(self._run_task())
+
+    def isRunning(self) -> bool:
+        """Выполняется ли операция"""
+        return self._future is not None and not self._future.done()
+
+    def isFinished(self) -> bool:
+        """Завершилась ли операция"""
+        return self._future is not None and self._future.done()
+
+    def wait(self, msecs: Optional[int] = None) -> bool:
+        """
+        Ждет завершения операции (из потока GUI)
+
+        Args:
+            msecs: Таймаут в миллисекундах (None - без ограничения)
+
+        Returns:
+            True, если операция завершилась
+        """
+        future = self._future
+        if future is None or future.done():
+            return True
+        if event_loop.in_loop_thread():
+            # Блокирующее ожидание в потоке цикла остановило бы саму задачу
+            return False
+        try:
+            future.result(None if msecs is None else msecs / 1000)
+        except concurrent.futures.TimeoutError:
+            return False
+        except BaseException:
+            pass
+        return True
+
+    def cancel(self) -> None:
+        """Отменяет задачу операции (можно вызывать из потока GUI)"""
+        self._cancel_requested = True
+        task = self._task
+        if task is not None:
+            event_loop.call_soon(task.cancel)
+
+    def _on_finished(self) -> None:
+        """Сообщает о завершении операции"""
+        self.finished.emit()
+
+    async def _run_task(self) -> None:
+        """Обертка задачи: имя для трассировки, отмена до старта, сигнал finished"""
+        self._task = asyncio.current_task()
+        self._task.set_name(type(self).__name__)
+        if self._cancel_requested:
+            # Отмена пришла до старта - CancelledError возникнет на первом await операции
+            self._task.cancel()
+        try:
+            await self.run()
+        except asyncio.CancelledError:
+            print(f"[CANCEL] {type(self).__name__}: задача отменена")
+        finally:
+            self._task = None
+            self._on_finished()
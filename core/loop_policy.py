@@ -0,0 +1,120 @@
+"""
+Модуль выбора реализации цикла событий asyncio
+"""
+import asyncio
+import sys
+from typing import Coroutine, Optional
+
+
+# Реализации цикла событий (ключ настроек event_loop)
+LOOP_ASYNCIO = "asyncio"
+LOOP_UVLOOP = "uvloop"
+LOOP_AUTO = "auto"        # uvloop, если установлен, иначе asyncio
+LOOP_IMPLEMENTATIONS = (LOOP_ASYNCIO, LOOP_UVLOOP, LOOP_AUTO)
+
+_selected = LOOP_ASYNCIO
+_resolved: Optional[str] = None
+
+
+def uvloop_available() -> bool:
+    """Можно ли использовать uvloop (установлен и платформа не Windows)"""
+    if sys.platform == "win32":
+        return False
+    try:
+        import uvloop  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def configure(name: str) -> str:
+    """
+    Выбирает реализацию цикла для всех следующих циклов приложения
+
+    Args:
+        name: asyncio, uvloop или auto
+
+    Returns:
+        Реализация, которая будет использоваться
+    """
+    global _selected, _resolved
+    if name not in LOOP_IMPLEMENTATIONS:
+        print(f"[LOOP] Неизвестная реализация цикла '{name}', используется {LOOP_ASYNCIO}")
+        name = LOOP_ASYNCIO
+    _selected = name
+    _resolved = None
+    return implementation()
+
+
+def configure_from_settings(settings) -> str:
+    """
+    Выбирает реализацию цикла по настройкам приложения
+
+    Args:
+        settings: Настройки (ключ event_loop)
+
+    Returns:
+        Реализация, которая будет использоваться
+    """
+    return configure(settings.get("event_loop", LOOP_ASYNCIO) or LOOP_ASYNCIO)
+
+
+def implementation() -> str:
+    """Реализация цикла с учетом доступности uvloop"""
+    global _resolved
+    if _resolved is None:
+        if _selected == LOOP_ASYNCIO:
+            _resolved = LOOP_ASYNCIO
+        elif uvloop_available():
+            _resolved = LOOP_UVLOOP
+        else:
+            if _selected == LOOP_UVLOOP:
+                print("[LOOP] uvloop недоступен (не установлен или Windows), используется asyncio")
+            _resolved = LOOP_ASYNCIO
+    return _resolved
+
+
+def new_event_loop() -> asyncio.AbstractEventLoop:
+    """
+    Создает цикл событий выбранной реализации
+
+    Returns:
+        Новый цикл (не установленный текущим)
+    """
+    if implementation() == LOOP_UVLOOP:
+        import uvloop
+        return uvloop.new_event_loop()
+    return asyncio.new_event_loop()
+
+
+def run(coroutine: Coroutine):
+    """
+    Аналог asyncio.run на цикле выбранной реализации
+
+    Args:
+        coroutine: Корутина
+
+    Returns:
+        Результат корутины
+    """
+    loop = new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        try:
+            cancel_remaining_tasks(loop)
+            loop.run_until_complete(loop.shutdown_asyncgens())
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+
+
+def cancel_remaining_tasks(loop: asyncio.AbstractEventLoop) -> None:
+    """Отменяет и дожидается задач, оставшихся в цикле (загрузки, фоновые задачи клиента)"""
+    tasks = [task for task in asyncio.all_tasks(loop) if not task.done()]
+    if not tasks:
+        return
+    for task in tasks:
+        task.cancel()
+    loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
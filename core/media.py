@@ -0,0 +1,263 @@
+"""
+Модуль низкоуровневой отправки видео: загрузка файла отдельно от отправки сообщения
+"""
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from pyrogram import Client, raw
+from pyrogram.errors import FilePartMissing
+
+from core.album import MAX_ALBUM_SIZE
+from core.part_uploader import PartUploader
+from core.tracing import traced
+
+
+@traced("upload_file", "media")
+async def save_video_file(client: Client, video_path: str, progress: Optional[Callable] = None,
+                          progress_args: tuple = (), part_uploader: Optional[PartUploader] = None):
+    """
+    Загружает байты файла на сервер без отправки сообщения
+
+    Args:
+        client: Клиент Telegram
+        video_path: Путь к видео файлу
+        progress: Callback прогресса
+        progress_args: Дополнительные аргументы callback
+        part_uploader: Загрузчик частей (None - стандартный save_file)
+
+    Returns:
+        InputFile / InputFileBig для последующей отправки
+    """
+    if part_uploader:
+        return await part_uploader.save_file(
+            client, video_path, progress=progress, progress_args=progress_args
+        )
+
+    input_file = await client.save_file(video_path, progress=progress, progress_args=progress_args)
+    if input_file is None:
+        # save_file глотает ошибки частей и возвращает None
+        raise ConnectionError(f"Не удалось загрузить файл: {os.path.basename(video_path)}")
+    return input_file
+
+
+def build_video_media(client: Client, input_file, video_path: str, metadata: Dict[str, Any],
+                      thumb_file=None) -> "raw.types.InputMediaUploadedDocument":
+    """
+    Формирует описание загруженного видео для отправки
+
+    Args:
+        client: Клиент Telegram
+        input_file: Результат save_video_file
+        video_path: Путь к видео файлу
+        metadata: Метаданные видео (duration, width, height)
+        thumb_file: Загруженное превью или None
+
+    Returns:
+        InputMediaUploadedDocument
+    """
+    return raw.types.InputMediaUploadedDocument(
+        mime_type=client.guess_mime_type(video_path) or "video/mp4",
+        file=input_file,
+        thumb=thumb_file,
+        attributes=[
+            raw.types.DocumentAttributeVideo(
+                supports_streaming=True,
+                duration=metadata.get('duration') or 0,
+                w=metadata.get('width') or 0,
+                h=metadata.get('height') or 0
+            ),
+            raw.types.DocumentAttributeFilename(file_name=os.path.basename(video_path))
+        ]
+    )
+
+
+async def upload_video_media(client: Client, peer, video_path: str, metadata: Dict[str, Any],
+                             thumb: Optional[str] = None, progress: Optional[Callable] = None,
+                             progress_args: tuple = (),
+                             part_uploader: Optional[PartUploader] = None) -> "raw.types.InputMediaDocument":
+    """
+    Загружает видео и регистрирует его как документ без отправки сообщения
+
+    Потерянные сервером части (FILE_PART_X_MISSING) дозагружаются
+    по одной, без повторной загрузки всего файла.
+
+    Args:
+        client: Клиент Telegram
+        peer: InputPeer целевого чата
+        video_path: Путь к видео файлу
+        metadata: Метаданные видео
+        thumb: Путь к превью
+        progress: Callback прогресса
+        progress_args: Дополнительные аргументы callback
+        part_uploader: Загрузчик частей (None - стандартный save_file)
+
+    Returns:
+        InputMediaDocument, пригодный для отправки в альбоме
+    """
+    input_file = await save_video_file(client, video_path, progress, progress_args, part_uploader)
+    thumb_file = await client.save_file(thumb) if thumb else None
+    media = build_video_media(client, input_file, video_path, metadata, thumb_file)
+
+    while True:
+        try:
+            result = await client.invoke(
+                raw.functions.messages.UploadMedia(peer=peer, media=media)
+            )
+        except FilePartMissing as e:
+            print(f"[MEDIA] Дозагружаем потерянную часть {e.value}: {os.path.basename(video_path)}")
+            await resave_file_part(client, video_path, input_file.id, e.value, part_uploader)
+        else:
+            return raw.types.InputMediaDocument(
+                id=raw.types.InputDocument(
+                    id=result.document.id,
+                    access_hash=result.document.access_hash,
+                    file_reference=result.document.file_reference
+                )
+            )
+
+
+async def send_video_file(client: Client, peer, video_path: str, caption: str,
+                          metadata: Dict[str, Any], thumb: Optional[str] = None,
+                          progress: Optional[Callable] = None, progress_args: tuple = (),
+                          part_uploader: Optional[PartUploader] = None) -> None:
+    """
+    Загружает видео и отправляет его одним сообщением
+
+    Args:
+        client: Клиент Telegram
+        peer: InputPeer целевого чата
+        video_path: Путь к видео файлу
+        caption: Подпись к видео
+        metadata: Метаданные видео
+        thumb: Путь к превью
+        progress: Callback прогресса
+        progress_args: Дополнительные аргументы callback
+        part_uploader: Загрузчик частей (None - стандартный save_file)
+    """
+    media = await upload_video_file(
+        client, video_path, metadata, thumb, progress, progress_args, part_uploader
+    )
+    await send_uploaded_video(client, peer, video_path, media, caption, part_uploader)
+
+
+async def upload_video_file(client: Client, video_path: str, metadata: Dict[str, Any],
+                            thumb: Optional[str] = None, progress: Optional[Callable] = None,
+                            progress_args: tuple = (),
+                            part_uploader: Optional[PartUploader] = None) -> "raw.types.InputMediaUploadedDocument":
+    """
+    Загружает байты видео и превью, не отправляя сообщение
+
+    Args:
+        client: Клиент Telegram
+        video_path: Путь к видео файлу
+        metadata: Метаданные видео
+        thumb: Путь к превью
+        progress: Callback прогресса
+        progress_args: Дополнительные аргументы callback
+        part_uploader: Загрузчик частей (None - стандартный save_file)
+
+    Returns:
+        InputMediaUploadedDocument для send_uploaded_video
+    """
+    input_file = await save_video_file(client, video_path, progress, progress_args, part_uploader)
+    thumb_file = await client.save_file(thumb) if thumb else None
+    return build_video_media(client, input_file, video_path, metadata, thumb_file)
+
+
+@traced("send_media", "media")
+async def send_uploaded_video(client: Client, peer, video_path: str,
+                              media: "raw.types.InputMediaUploadedDocument", caption: str,
+                              part_uploader: Optional[PartUploader] = None) -> None:
+    """
+    Отправляет ранее загруженное видео сообщением
+
+    Потерянные сервером части (FILE_PART_X_MISSING) дозагружаются
+    по одной, без повторной загрузки всего файла.
+
+    Args:
+        client: Клиент Telegram
+        peer: InputPeer целевого чата
+        video_path: Путь к видео файлу (для дозагрузки частей)
+        media: Результат upload_video_file
+        caption: Подпись к видео
+        part_uploader: Загрузчик частей (None - стандартный save_file)
+    """
+    while True:
+        try:
+            await client.invoke(
+                raw.functions.messages.SendMedia(
+                    peer=peer,
+                    media=media,
+                    random_id=client.rnd_id(),
+                    **await client.parser.parse(caption[:1024])
+                ),
+                sleep_threshold=60
+            )
+            return
+        except FilePartMissing as e:
+            print(f"[MEDIA] Дозагружаем потерянную часть {e.value}: {os.path.basename(video_path)}")
+            await resave_file_part(client, video_path, media.file.id, e.value, part_uploader)
+
+
+@traced("resave_part", "media")
+async def resave_file_part(client: Client, video_path: str, file_id: int, file_part: int,
+                           part_uploader: Optional[PartUploader] = None) -> None:
+    """
+    Повторно загружает одну потерянную сервером часть файла
+
+    Args:
+        client: Клиент Telegram
+        video_path: Путь к видео файлу
+        file_id: ID загружаемого файла
+        file_part: Номер части
+        part_uploader: Загрузчик частей (None - стандартный save_file)
+    """
+    if part_uploader:
+        await part_uploader.save_file(client, video_path, file_id=file_id, file_part=file_part)
+    else:
+        await client.save_file(video_path, file_id=file_id, file_part=file_part)
+
+
+@traced("send_album", "media")
+async def send_album(client: Client, peer, items: List[Tuple[Any, str]]) -> None:
+    """
+    Отправляет группу видео одним сообщением-альбомом
+
+    Args:
+        client: Клиент Telegram
+        peer: InputPeer целевого чата
+        items: Список пар (InputMediaDocument, подпись), не больше 10
+    """
+    if not items:
+        return
+    if len(items) > MAX_ALBUM_SIZE:
+        raise ValueError(f"Альбом не может содержать больше {MAX_ALBUM_SIZE} элементов")
+
+    if len(items) == 1:
+        # Альбом из одного элемента отправляем обычным сообщением
+        media, caption = items[0]
+        await client.invoke(
+            raw.functions.messages.SendMedia(
+                peer=peer,
+                media=media,
+                random_id=client.rnd_id(),
+                **await client.parser.parse(caption[:1024])
+            ),
+            sleep_threshold=60
+        )
+        return
+
+    multi_media = []
+    for media, caption in items:
+        multi_media.append(
+            raw.types.InputSingleMedia(
+                media=media,
+                random_id=client.rnd_id(),
+                **await client.parser.parse(caption[:1024])
+            )
+        )
+
+    await client.invoke(
+        raw.functions.messages.SendMultiMedia(peer=peer, multi_media=multi_media),
+        sleep_threshold=60
+    )
@@ -0,0 +1,111 @@
+"""
+Модуль общего лимита памяти под части файлов, находящиеся в загрузке
+"""
+import asyncio
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+
+class MemoryBudget:
+    """
+    Семафор по байтам, общий для всех воркеров загрузки
+
+    Часть занимает место в бюджете до чтения с диска и освобождает его
+    после подтверждения сервером. Ожидающие обслуживаются по очереди
+    (FIFO), поэтому большие запросы не голодают из-за мелких.
+    """
+
+    def __init__(self, limit_bytes: int):
+        """
+        Инициализация бюджета
+
+        Args:
+            limit_bytes: Максимальный объем данных в загрузке одновременно
+        """
+        self.limit_bytes = max(1, limit_bytes)
+        self._used = 0
+        self._peak = 0
+        self._waiters: Deque[Tuple[int, asyncio.Future]] = deque()
+
+    @property
+    def used(self) -> int:
+        """Занятый объем в байтах"""
+        return self._used
+
+    @property
+    def peak(self) -> int:
+        """Максимальный занятый объем за время работы"""
+        return self._peak
+
+    async def acquire(self, size: int) -> int:
+        """
+        Занимает место в бюджете (ждет, если места нет)
+
+        Args:
+            size: Размер в байтах (запрос больше лимита урезается до лимита)
+
+        Returns:
+            Фактически занятый размер - его нужно передать в release
+        """
+        size = min(max(0, size), self.limit_bytes)
+        if not self._waiters and self._used + size <= self.limit_bytes:
+            self._take(size)
+            return size
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append((size, future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Место уже выделено, но ожидающий отменен - возвращаем его
+                self.release(size)
+            else:
+                if (size, future) in self._waiters:
+                    self._waiters.remove((size, future))
+                self._wake_waiters()
+            raise
+        return size
+
+    def release(self, size: int) -> None:
+        """
+        Освобождает место в бюджете
+
+        Args:
+            size: Значение, возвращенное acquire
+        """
+        self._used = max(0, self._used - size)
+        self._wake_waiters()
+
+    def _take(self, size: int) -> None:
+        """Учитывает занятое место"""
+        self._used += size
+        self._peak = max(self._peak, self._used)
+
+    def _wake_waiters(self) -> None:
+        """Выдает место ожидающим по порядку очереди"""
+        while self._waiters:
+            size, future = self._waiters[0]
+            if future.done():
+                self._waiters.popleft()
+                continue
+            if self._used + size > self.limit_bytes:
+                break
+            self._waiters.popleft()
+            self._take(size)
+            future.set_result(None)
+
+
+def create_memory_budget(limit_mb: Optional[int]) -> Optional[MemoryBudget]:
+    """
+    Создает бюджет памяти по настройке
+
+    Args:
+        limit_mb: Лимит в МБ (0 или None - без ограничения)
+
+    Returns:
+        MemoryBudget или None
+    """
+    if not limit_mb or limit_mb <= 0:
+        return None
+    return MemoryBudget(int(limit_mb) * 1024 * 1024)
@@ -0,0 +1,367 @@
+"""
+Модуль метрик загрузчика: реестр счетчиков, датчиков и гистограмм
+и локальный HTTP-эндпоинт в текстовом формате Prometheus и JSON
+"""
+import json
+import math
+import threading
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+
+# Границы гистограмм, сек
+FILE_SECONDS_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600)
+PART_RTT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30)
+CHAT_LOAD_BUCKETS = (0.5, 1, 2, 5, 10, 30, 60)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    """Ключ набора меток (упорядоченные пары имя-значение)"""
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Iterable[Tuple[str, str]] = ()) -> str:
+    """Метки в текстовом формате: {name="value",...}"""
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        name + '="' + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for name, value in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    """Число в текстовом формате (целые без дробной части)"""
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """Общая часть метрик: имя, описание, значения по наборам меток"""
+
+    kind = ""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._lock = threading.Lock()
+
+    def render(self) -> List[str]:
+        """Строки текстового формата"""
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._render_samples())
+        return lines
+
+    def _render_samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def snapshot(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Монотонно растущий счетчик"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        super().__init__(name, help_text)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        """
+        Увеличивает счетчик
+
+        Args:
+            amount: Приращение (не меньше 0)
+            **labels: Метки
+        """
+        if amount < 0:
+            raise ValueError("Счетчик не может уменьшаться")
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        """Текущее значение для набора меток"""
+        with self._lock:
+            return self._values.get(_label_key(labels), 0)
+
+    def _render_samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values) or {(): 0}
+        return [f"{self.name}{_format_labels(key)} {_format_value(value)}"
+                for key, value in sorted(values.items())]
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            values = dict(self._values) or {(): 0}
+        return {"type": self.kind, "help": self.help,
+                "values": [{"labels": dict(key), "value": value} for key, value in sorted(values.items())]}
+
+
+class Gauge(Counter):
+    """Значение, которое может расти и уменьшаться"""
+
+    kind = "gauge"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        """Увеличивает значение"""
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        """Уменьшает значение"""
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        """Устанавливает значение"""
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+
+class Histogram(_Metric):
+    """Распределение наблюдений по корзинам"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: Iterable[float]):
+        super().__init__(name, help_text)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # Для каждого набора меток: счетчики корзин, сумма, количество
+        self._values: Dict[LabelKey, List[Any]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        """
+        Добавляет наблюдение
+
+        Args:
+            value: Значение (например, длительность в секундах)
+            **labels: Метки
+        """
+        key = _label_key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = [[0] * len(self.buckets), 0.0, 0]
+                self._values[key] = entry
+            for position, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][position] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    def _copy(self) -> Dict[LabelKey, Tuple[List[int], float, int]]:
+        with self._lock:
+            return {key: (list(counts), total, count) for key, (counts, total, count) in self._values.items()}
+
+    def _render_samples(self) -> List[str]:
+        lines = []
+        for key, (counts, total, count) in sorted(self._copy().items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = ("le", _format_value(bound))
+                lines.append(f"{self.name}_bucket{_format_labels(key, [le])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+    def snapshot(self) -> Dict[str, Any]:
+        values = []
+        for key, (counts, total, count) in sorted(self._copy().items()):
+            cumulative = 0
+            buckets = {}
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                buckets[_format_value(bound)] = cumulative
+            values.append({"labels": dict(key), "buckets": buckets, "sum": total, "count": count})
+        return {"type": self.kind, "help": self.help, "values": values}
+
+
+class MetricsRegistry:
+    """Реестр метрик процесса"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        """Возвращает счетчик (создает при первом обращении)"""
+        return self._register(name, lambda: Counter(name, help_text), Counter)
+
+    def gauge(self, name: str, help_text: str) -> Gauge:
+        """Возвращает датчик (создает при первом обращении)"""
+        return self._register(name, lambda: Gauge(name, help_text), Gauge)
+
+    def histogram(self, name: str, help_text: str, buckets: Iterable[float]) -> Histogram:
+        """Возвращает гистограмму (создает при первом обращении)"""
+        return self._register(name, lambda: Histogram(name, help_text, buckets), Histogram)
+
+    def _register(self, name: str, factory, kind: type):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = factory()
+                self._metrics[name] = metric
+            elif type(metric) is not kind:
+                raise ValueError(f"Метрика {name} уже зарегистрирована как {metric.kind}")
+            return metric
+
+    def render_text(self) -> str:
+        """Все метрики в текстовом формате Prometheus"""
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Все метрики в виде словаря для JSON"""
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        return {metric.name: metric.snapshot() for metric in metrics}
+
+
+# Общий реестр приложения
+registry = MetricsRegistry()
+
+BYTES_SENT = registry.counter(
+    "uploader_bytes_sent_total", "Байты частей файлов, подтвержденные Telegram")
+FILES_SENT = registry.counter(
+    "uploader_files_sent_total", "Файлы, отправленные в целевой чат")
+FILES_FAILED = registry.counter(
+    "uploader_files_failed_total", "Файлы, окончательно не отправленные")
+FILES_RETRIED = registry.counter(
+    "uploader_files_retried_total", "Повторы загрузки и отправки файлов")
+FLOOD_WAIT_SECONDS = registry.counter(
+    "uploader_flood_wait_seconds_total", "Секунды ожидания из-за FloodWait")
+FILE_SECONDS = registry.histogram(
+    "uploader_file_seconds", "Время от начала попытки до отправки файла", FILE_SECONDS_BUCKETS)
+PART_RTT_SECONDS = registry.histogram(
+    "uploader_part_rtt_seconds", "Время ответа на saveFilePart/saveBigFilePart", PART_RTT_BUCKETS)
+QUEUE_DEPTH = registry.gauge(
+    "uploader_queue_depth", "Незавершенные файлы пакета")
+INFLIGHT_BYTES = registry.gauge(
+    "uploader_inflight_bytes", "Байты частей, прочитанные с диска и еще не подтвержденные")
+CHAT_LOADS = registry.counter(
+    "uploader_chat_loads_total", "Загрузки списка чатов по результату")
+CHAT_LOAD_SECONDS = registry.histogram(
+    "uploader_chat_load_seconds", "Длительность загрузки списка чатов", CHAT_LOAD_BUCKETS)
+CHATS_LOADED = registry.gauge(
+    "uploader_chats_loaded", "Количество чатов в последнем загруженном списке")
+AUTH_CHECKS = registry.counter(
+    "uploader_auth_checks_total", "Проверки авторизации и входы по результату")
+ACCOUNT_FILES = registry.counter(
+    "uploader_account_files_sent_total", "Файлы, отправленные каждым аккаунтом пула")
+ACCOUNT_FLOOD_WAITS = registry.counter(
+    "uploader_account_flood_waits_total", "FloodWait по аккаунтам пула")
+UPLOAD_CONNECTIONS = registry.counter(
+    "uploader_upload_connections_total", "Соединения загрузки частей: открытые и переиспользованные")
+
+
+def _make_handler(metrics_registry: MetricsRegistry):
+    """
+    Создает обработчик запросов /metrics и /metrics.json
+
+    http.server импортируется только при включенном эндпоинте, чтобы
+    не замедлять запуск приложения.
+    """
+    from http.server import BaseHTTPRequestHandler
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            path = self.path.split("?", 1)[0]
+            if path == "/metrics":
+                body = metrics_registry.render_text().encode("utf-8")
+                content_type = "text/plain; version=0.0.4; charset=utf-8"
+            elif path == "/metrics.json":
+                body = json.dumps(metrics_registry.snapshot(), ensure_ascii=False).encode("utf-8")
+                content_type = "application/json; charset=utf-8"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args) -> None:
+            # Опрос метрик не засоряет консоль
+            pass
+
+    return MetricsHandler
+
+
+_server: Optional["ThreadingHTTPServer"] = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1") -> Optional["ThreadingHTTPServer"]:
+    """
+    Запускает HTTP-эндпоинт метрик в фоновом потоке (повторный вызов ничего не делает)
+
+    Args:
+        port: Порт (0 или меньше - эндпоинт выключен)
+        host: Адрес (по умолчанию только локальный)
+
+    Returns:
+        Сервер или None, если эндпоинт выключен или порт занят
+    """
+    global _server
+    if port <= 0:
+        return None
+    with _server_lock:
+        if _server is not None:
+            return _server
+        try:
+            from http.server import ThreadingHTTPServer
+            _server = ThreadingHTTPServer((host, port), _make_handler(registry))
+        except OSError as e:
+            print(f"[METRICS] Не удалось открыть {host}:{port}: {e}")
+            return None
+        _server.daemon_threads = True
+        thread = threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True)
+        thread.start()
+        print(f"[METRICS] Метрики: http://{host}:{port}/metrics, http://{host}:{port}/metrics.json")
+        return _server
+
+
+def stop_metrics_server() -> None:
+    """Останавливает HTTP-эндпоинт метрик"""
+    global _server
+    with _server_lock:
+        if _server is not None:
+            _server.shutdown()
+            _server.server_close()
+            _server = None
+
+
+def start_from_settings(settings) -> Optional["ThreadingHTTPServer"]:
+    """
+    Запускает эндпоинт метрик по настройкам приложения
+
+    Args:
+        settings: Настройки (ключ metrics_port, 0 - выключено)
+
+    Returns:
+        Сервер или None
+    """
+    try:
+        port = int(settings.get("metrics_port", 0) or 0)
+    except (TypeError, ValueError):
+        port = 0
+    return start_metrics_server(port)
@@ -0,0 +1,98 @@
+"""
+Модуль политик порядка загрузки файлов
+"""
+import os
+from typing import Callable, Dict, List
+
+from utils.archive import get_file_size
+
+
+# Политики порядка
+ORDER_BY_NAME = "name"                      # По имени файла (как раньше)
+ORDER_LARGEST_FIRST = "largest_first"       # LPT: большие первыми - раньше завершается весь пакет
+ORDER_SMALLEST_FIRST = "smallest_first"     # SPT: маленькие первыми - меньше среднее время готовности
+ORDER_FOLDER_ROUND_ROBIN = "folder_round_robin"  # По очереди из каждой подпапки
+
+# Названия для интерфейса
+ORDER_POLICY_LABELS = {
+    ORDER_BY_NAME: "По имени",
+    ORDER_LARGEST_FIRST: "Сначала большие",
+    ORDER_SMALLEST_FIRST: "Сначала маленькие",
+    ORDER_FOLDER_ROUND_ROBIN: "По очереди из подпапок",
+}
+
+
+def _get_size(path: str) -> int:
+    """Размер файла или файла в архиве (0, если файл недоступен)"""
+    try:
+        return get_file_size(path)
+    except OSError:
+        return 0
+
+
+def order_by_name(paths: List[str]) -> List[str]:
+    """Сортирует файлы по пути"""
+    return sorted(paths)
+
+
+def order_largest_first(paths: List[str]) -> List[str]:
+    """
+    Сортирует файлы по убыванию размера (LPT)
+
+    Самые долгие загрузки стартуют первыми, и пул воркеров не ждет
+    в конце одного большого файла.
+    """
+    return sorted(paths, key=lambda path: (-_get_size(path), path))
+
+
+def order_smallest_first(paths: List[str]) -> List[str]:
+    """Сортирует файлы по возрастанию размера (SPT)"""
+    return sorted(paths, key=lambda path: (_get_size(path), path))
+
+
+def order_folder_round_robin(paths: List[str]) -> List[str]:
+    """
+    Чередует файлы из разных подпапок
+
+    Внутри подпапки порядок по имени; подпапки обходятся по кругу,
+    поэтому ни одна из них не ждет, пока загрузятся все остальные.
+    """
+    groups: Dict[str, List[str]] = {}
+    for path in sorted(paths):
+        groups.setdefault(os.path.dirname(path), []).append(path)
+
+    queues = [groups[folder] for folder in sorted(groups)]
+    ordered = []
+    position = 0
+    while len(ordered) < len(paths):
+        for queue in queues:
+            if position < len(queue):
+                ordered.append(queue[position])
+        position += 1
+    return ordered
+
+
+ORDER_POLICIES: Dict[str, Callable[[List[str]], List[str]]] = {
+    ORDER_BY_NAME: order_by_name,
+    ORDER_LARGEST_FIRST: order_largest_first,
+    ORDER_SMALLEST_FIRST: order_smallest_first,
+    ORDER_FOLDER_ROUND_ROBIN: order_folder_round_robin,
+}
+
+
+def order_video_files(paths: List[str], policy: str = ORDER_BY_NAME) -> List[str]:
+    """
+    Упорядочивает файлы по выбранной политике
+
+    Args:
+        paths: Пути к файлам
+        policy: Название политики (неизвестная - по имени)
+
+    Returns:
+        Упорядоченный список путей
+    """
+    order = ORDER_POLICIES.get(policy)
+    if order is None:
+        print(f"[ORDER] Неизвестная политика порядка '{policy}', используется порядок по имени")
+        order = order_by_name
+    return order(paths)
@@ -0,0 +1,482 @@
+"""
+Модуль чтения файла частями для загрузки без лишних копий в памяти
+"""
+import asyncio
+import mmap
+import os
+import threading
+from typing import List, Optional
+
+from utils.archive import ArchiveMember, find_member, open_member, skip_stream
+
+
+# Размер части MTProto-загрузки (максимум для upload.saveBigFilePart)
+PART_SIZE = 512 * 1024
+
+# Окно упреждающего чтения и шаг сброса прочитанного из кэша страниц
+READAHEAD_BYTES = 8 * 1024 * 1024
+DROP_CACHE_BYTES = 8 * 1024 * 1024
+
+# posix_fadvise есть только в POSIX-системах
+HAS_FADVISE = hasattr(os, "posix_fadvise")
+
+
+class BufferPool:
+    """
+    Пул переиспользуемых буферов под части файла
+
+    Буферы выделяются один раз; части читаются в них через readinto,
+    поэтому на каждую часть не создается новый объект bytes.
+    """
+
+    def __init__(self, buffers_count: int, buffer_size: int = PART_SIZE):
+        """
+        Инициализация пула
+
+        Args:
+            buffers_count: Количество буферов
+            buffer_size: Размер одного буфера в байтах
+        """
+        self.buffer_size = buffer_size
+        self._free: asyncio.Queue = asyncio.Queue()
+        self._buffers: List[bytearray] = [bytearray(buffer_size) for _ in range(max(1, buffers_count))]
+        for buffer in self._buffers:
+            self._free.put_nowait(buffer)
+
+    async def acquire(self) -> bytearray:
+        """Получает свободный буфер (ждет, если все заняты)"""
+        return await self._free.get()
+
+    def release(self, buffer: bytearray) -> None:
+        """Возвращает буфер в пул"""
+        self._free.put_nowait(buffer)
+
+
+class FilePartSource:
+    """
+    Источник частей файла на диске
+
+    Части читаются по смещению (pread), поэтому несколько воркеров могут
+    читать один файл одновременно без общей позиции чтения.
+
+    Ядру сообщается о последовательном чтении (POSIX_FADV_SEQUENTIAL),
+    следующее окно запрашивается заранее крупным выровненным блоком
+    (POSIX_FADV_WILLNEED), а подтвержденные сервером части сбрасываются
+    из кэша страниц (POSIX_FADV_DONTNEED), чтобы загрузка сотен гигабайт
+    не вытесняла из кэша остальные данные.
+    """
+
+    # Части читаются в буфер из BufferPool
+    needs_buffer = True
+    # Части можно читать в любом порядке
+    sequential = False
+    # Части читаются через read_part (а не блоками через fetch_part)
+    block_reads = False
+    # Смещение данных в открытом файле (ненулевое для файла внутри архива)
+    data_offset = 0
+
+    def __init__(self, path: str, part_size: int = PART_SIZE, keep_cache: bool = False):
+        """
+        Открывает файл
+
+        Args:
+            path: Путь к файлу
+            part_size: Размер части в байтах
+            keep_cache: Не сбрасывать прочитанное из кэша (файл будет читаться повторно)
+        """
+        self.path = path
+        self.name = os.path.basename(path)
+        self.part_size = part_size
+        self.keep_cache = keep_cache
+        self._file = open(path, 'rb', buffering=0)
+        self._lock = threading.Lock()
+        self.size = os.fstat(self._file.fileno()).st_size
+
+        self._advice_lock = threading.Lock()
+        self._readahead_end = 0
+        self._acknowledged = set()
+        self._ack_cursor = 0
+        self._dropped_until = 0
+        self.first_part = 0
+        self._advise(0, 0, "POSIX_FADV_SEQUENTIAL")
+
+    @property
+    def total_parts(self) -> int:
+        """Количество частей"""
+        return max(1, -(-self.size // self.part_size))
+
+    @property
+    def acknowledged_parts(self) -> int:
+        """Количество непрерывно подтвержденных частей от начала файла"""
+        return self._ack_cursor
+
+    def part_length(self, index: int) -> int:
+        """Размер части с указанным номером"""
+        return max(0, min(self.part_size, self.size - index * self.part_size))
+
+    def skip_parts(self, count: int) -> None:
+        """
+        Пропускает части, уже загруженные в прерванной загрузке
+
+        Args:
+            count: Количество подтвержденных сервером частей от начала файла
+        """
+        with self._advice_lock:
+            self.first_part = max(0, min(count, self.total_parts))
+            self._ack_cursor = self.first_part
+            # Пропущенные части не читались - сбрасывать из кэша нечего
+            self._dropped_until = min(self.first_part * self.part_size, self.size)
+
+    def read_part(self, index: int, buffer: bytearray) -> memoryview:
+        """
+        Читает часть в переданный буфер
+
+        Args:
+            index: Номер части (с 0)
+            buffer: Буфер из BufferPool
+
+        Returns:
+            memoryview на заполненную часть буфера
+        """
+        view = memoryview(buffer)[:self.part_length(index)]
+        offset = index * self.part_size
+        self._read_ahead(offset)
+        self._read_into(view, offset)
+        return view
+
+    def _read_into(self, view: memoryview, offset: int) -> None:
+        """
+        Заполняет view данными файла начиная со смещения offset
+
+        Args:
+            view: Область буфера для заполнения
+            offset: Смещение в файле
+        """
+        filled = 0
+        while filled < len(view):
+            position = self.data_offset + offset + filled
+            if hasattr(os, "preadv"):
+                count = os.preadv(self._file.fileno(), [view[filled:]], position)
+            else:
+                # Windows: pread недоступен - читаем с позиционированием под блокировкой
+                with self._lock:
+                    self._file.seek(position)
+                    count = self._file.readinto(view[filled:])
+            if not count:
+                raise EOFError(f"Неожиданный конец файла: {self.name}")
+            filled += count
+
+    def mark_acknowledged(self, index: int) -> None:
+        """
+        Отмечает часть как подтвержденную сервером
+
+        Части подтверждаются не по порядку, поэтому кэш сбрасывается только
+        до непрерывно подтвержденного префикса файла.
+
+        Args:
+            index: Номер части
+        """
+        with self._advice_lock:
+            self._acknowledged.add(index)
+            while self._ack_cursor in self._acknowledged:
+                self._acknowledged.discard(self._ack_cursor)
+                self._ack_cursor += 1
+
+            cursor = min(self._ack_cursor * self.part_size, self.size)
+            if cursor - self._dropped_until >= DROP_CACHE_BYTES or cursor >= self.size:
+                self._drop_cache(cursor)
+
+    def close(self) -> None:
+        """Закрывает файл"""
+        with self._advice_lock:
+            self._drop_cache(min(self._ack_cursor * self.part_size, self.size))
+        self._file.close()
+
+    def _read_ahead(self, offset: int) -> None:
+        """Запрашивает у ядра следующее окно, когда чтение подходит к концу текущего"""
+        if not HAS_FADVISE:
+            return
+        with self._advice_lock:
+            if offset + self.part_size <= self._readahead_end - READAHEAD_BYTES // 2:
+                return
+            start = max(self._readahead_end, offset - offset % READAHEAD_BYTES)
+            if start >= self.size:
+                return
+            self._readahead_end = start + READAHEAD_BYTES
+        self._advise(start, READAHEAD_BYTES, "POSIX_FADV_WILLNEED")
+
+    def _drop_cache(self, until: int) -> None:
+        """Сбрасывает из кэша страниц прочитанную область до смещения until"""
+        if self.keep_cache or until <= self._dropped_until:
+            return
+        page_size = mmap.PAGESIZE
+        start = self._dropped_until - self._dropped_until % page_size
+        self._advise(start, until - start, "POSIX_FADV_DONTNEED")
+        self._dropped_until = until
+
+    def _advise(self, offset: int, length: int, advice_name: str) -> None:
+        """Вызывает posix_fadvise, если он поддерживается"""
+        advice = getattr(os, advice_name, None)
+        if not HAS_FADVISE or advice is None or self._file.closed:
+            return
+        try:
+            os.posix_fadvise(self._file.fileno(), self.data_offset + offset, length, advice)
+        except OSError:
+            # Подсказка кэшу необязательна (например, не поддерживается ФС)
+            pass
+
+
+class MmapPartSource(FilePartSource):
+    """
+    Источник частей через отображение файла в память
+
+    Части отдаются срезами memoryview прямо из mmap - без чтения
+    в буфер; страницы подгружает ядро.
+    """
+
+    needs_buffer = False
+
+    def __init__(self, path: str, part_size: int = PART_SIZE, keep_cache: bool = False):
+        """
+        Открывает и отображает файл
+
+        Args:
+            path: Путь к файлу
+            part_size: Размер части в байтах
+            keep_cache: Не сбрасывать прочитанное из кэша (файл будет читаться повторно)
+        """
+        super().__init__(path, part_size, keep_cache)
+        self._mmap: Optional[mmap.mmap] = None
+        if self.size > 0:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            if hasattr(self._mmap, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+                self._mmap.madvise(mmap.MADV_SEQUENTIAL)
+        self._view = memoryview(self._mmap) if self._mmap is not None else memoryview(b"")
+
+    def read_part(self, index: int, buffer: Optional[bytearray] = None) -> memoryview:
+        """
+        Возвращает срез отображения для части (буфер не используется)
+
+        Args:
+            index: Номер части (с 0)
+            buffer: Не используется
+
+        Returns:
+            memoryview на часть файла
+        """
+        offset = index * self.part_size
+        self._read_ahead(offset)
+        return self._view[offset:offset + self.part_length(index)]
+
+    def close(self) -> None:
+        """Снимает отображение и закрывает файл"""
+        try:
+            self._view.release()
+        except BufferError:
+            pass
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # Срез еще используется отправкой - отображение закроется сборщиком мусора
+                pass
+        super().close()
+
+
+class ArchiveMemberPartSource(FilePartSource):
+    """
+    Источник частей несжатого файла внутри архива
+
+    Данные такого файла лежат в архиве одним блоком, поэтому части
+    читаются по смещению (pread) прямо из архива - параллельно и с теми же
+    подсказками кэшу страниц, что и для обычного файла.
+    """
+
+    def __init__(self, path: str, member: ArchiveMember, part_size: int = PART_SIZE,
+                 keep_cache: bool = False):
+        """
+        Открывает архив
+
+        Args:
+            path: Путь файла (архив как папка)
+            member: Файл в архиве (с известным смещением данных)
+            part_size: Размер части в байтах
+            keep_cache: Не сбрасывать прочитанное из кэша
+        """
+        super().__init__(member.archive, part_size, keep_cache)
+        self.path = path
+        self.name = os.path.basename(path)
+        self.data_offset = member.data_offset
+        self.size = member.size
+
+
+class StreamPartSource:
+    """
+    Источник частей сжатого файла внутри архива
+
+    Сжатые данные распаковываются только потоком, поэтому части читаются
+    строго по порядку: воркер ждет своей очереди (wait_turn) до занятия
+    памяти и буфера, читает часть и передает очередь следующему
+    (finish_turn). Отправка прочитанных частей при этом идет параллельно.
+    Чтение части раньше текущей позиции (дозагрузка потерянной части)
+    начинает распаковку заново.
+    """
+
+    needs_buffer = True
+    sequential = True
+    block_reads = False
+
+    def __init__(self, path: str, member: ArchiveMember, part_size: int = PART_SIZE):
+        """
+        Инициализация источника (файл открывается при первом чтении)
+
+        Args:
+            path: Путь файла (архив как папка)
+            member: Файл в архиве
+            part_size: Размер части в байтах
+        """
+        self.path = path
+        self.name = os.path.basename(path)
+        self.part_size = part_size
+        self.size = member.size
+        self.first_part = 0
+        self._member = member
+        self._stream = None
+        self._position = 0
+        self._lock = threading.Lock()
+        self._acknowledged = set()
+        self._ack_cursor = 0
+        self._next_turn: Optional[int] = None
+        self._turn: Optional[asyncio.Condition] = None
+
+    @property
+    def total_parts(self) -> int:
+        """Количество частей"""
+        return max(1, -(-self.size // self.part_size))
+
+    @property
+    def acknowledged_parts(self) -> int:
+        """Количество непрерывно подтвержденных частей от начала файла"""
+        return self._ack_cursor
+
+    def part_length(self, index: int) -> int:
+        """Размер части с указанным номером"""
+        return max(0, min(self.part_size, self.size - index * self.part_size))
+
+    def skip_parts(self, count: int) -> None:
+        """
+        Пропускает части, уже загруженные в прерванной загрузке
+
+        Args:
+            count: Количество подтвержденных сервером частей от начала файла
+        """
+        self.first_part = max(0, min(count, self.total_parts))
+        self._ack_cursor = self.first_part
+
+    async def wait_turn(self, index: int) -> None:
+        """
+        Ждет, пока не будут прочитаны все части перед указанной
+
+        Первая запрошенная часть задает начало очереди (первая часть
+        загрузки или единственная дозагружаемая часть).
+
+        Args:
+            index: Номер части
+        """
+        if self._turn is None:
+            self._turn = asyncio.Condition()
+        if self._next_turn is None:
+            self._next_turn = index
+        async with self._turn:
+            await self._turn.wait_for(lambda: self._next_turn == index)
+
+    async def finish_turn(self, index: int) -> None:
+        """Передает очередь чтения следующей части"""
+        async with self._turn:
+            self._next_turn = index + 1
+            self._turn.notify_all()
+
+    def read_part(self, index: int, buffer: bytearray) -> memoryview:
+        """
+        Читает часть в переданный буфер
+
+        Args:
+            index: Номер части (с 0)
+            buffer: Буфер из BufferPool
+
+        Returns:
+            memoryview на заполненную часть буфера
+        """
+        view = memoryview(buffer)[:self.part_length(index)]
+        offset = index * self.part_size
+        with self._lock:
+            if self._stream is None or offset < self._position:
+                self._reopen()
+            if offset > self._position:
+                # Пропущенные части (продолжение загрузки) приходится распаковать
+                self._position += skip_stream(self._stream, offset - self._position)
+            filled = 0
+            while filled < len(view):
+                count = self._stream.readinto(view[filled:])
+                if not count:
+                    raise EOFError(f"Неожиданный конец файла: {self.name}")
+                filled += count
+            self._position += filled
+        return view
+
+    def mark_acknowledged(self, index: int) -> None:
+        """
+        Отмечает часть как подтвержденную сервером
+
+        Args:
+            index: Номер части
+        """
+        with self._lock:
+            self._acknowledged.add(index)
+            while self._ack_cursor in self._acknowledged:
+                self._acknowledged.discard(self._ack_cursor)
+                self._ack_cursor += 1
+
+    def close(self) -> None:
+        """Закрывает файл в архиве"""
+        with self._lock:
+            if self._stream is not None:
+                self._stream.close()
+                self._stream = None
+
+    def _reopen(self) -> None:
+        """Открывает файл в архиве с начала"""
+        if self._stream is not None:
+            self._stream.close()
+        self._stream = open_member(self._member)
+        self._position = 0
+
+
+def open_part_source(path: str, use_mmap: bool = False, keep_cache: bool = False,
+                     scheduler=None) -> FilePartSource:
+    """
+    Создает источник частей для файла
+
+    Args:
+        path: Путь к файлу (или к файлу внутри архива, см. utils.archive)
+        use_mmap: Использовать отображение файла в память
+        keep_cache: Не сбрасывать прочитанное из кэша страниц
+        scheduler: ReadScheduler для блочного чтения с учетом устройства
+
+    Returns:
+        Источник частей
+    """
+    member = find_member(path)
+    if member is not None:
+        # Файл внутри архива: по смещению, если он не сжат, иначе потоком
+        if member.seekable:
+            return ArchiveMemberPartSource(path, member, keep_cache=keep_cache)
+        return StreamPartSource(path, member)
+    if use_mmap:
+        try:
+            return MmapPartSource(path, keep_cache=keep_cache)
+        except (OSError, ValueError) as e:
+            print(f"[PART_SOURCE] mmap недоступен для {os.path.basename(path)}: {e}")
+    if scheduler is not None:
+        return scheduler.open(path, keep_cache=keep_cache)
+    return FilePartSource(path, keep_cache=keep_cache)
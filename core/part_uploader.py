@@ -0,0 +1,351 @@
+"""
+Модуль загрузки файла частями через переиспользуемые буферы
+"""
+import asyncio
+import inspect
+import time
+from hashlib import md5
+from typing import Callable, Optional
+
+from pyrogram import Client, raw
+from pyrogram.session import Session
+
+from core.accounts import AccountPool, UploadAccount
+from core.bandwidth import BandwidthLimiter
+from core.journal import UploadJournal
+from core.memory_budget import MemoryBudget
+from core.metrics import BYTES_SENT, FLOOD_WAIT_SECONDS, INFLIGHT_BYTES, PART_RTT_SECONDS
+from core.part_source import PART_SIZE, BufferPool, open_part_source
+from core.read_scheduler import ReadScheduler
+from core.retry import FLOOD_WAIT, PERMANENT, RetryPolicy, classify_error
+from core.session_pool import upload_sessions
+from core.tracing import span
+
+
+# Файлы больше этого размера загружаются через upload.saveBigFilePart
+BIG_FILE_SIZE = 10 * 1024 * 1024
+
+# Количество параллельно загружаемых частей одного большого файла
+PART_WORKERS = 4
+
+
+class _SerializedOnce:
+    """
+    Примесь, кэширующая сериализацию TL-запроса
+
+    Pyrogram сериализует запрос дважды: для длины сообщения (len) и для
+    упаковки. Для части в 512 КБ это лишняя копия, поэтому результат
+    первой сериализации запоминается и используется повторно.
+    """
+
+    def write(self, *args) -> bytes:
+        serialized = self.__dict__.get('_serialized')
+        if serialized is None:
+            serialized = super().write(*args)
+            self.__dict__['_serialized'] = serialized
+        return serialized
+
+
+class _SaveBigFilePart(_SerializedOnce, raw.functions.upload.SaveBigFilePart):
+    pass
+
+
+class _SaveFilePart(_SerializedOnce, raw.functions.upload.SaveFilePart):
+    pass
+
+
+class PartUploader:
+    """
+    Загрузчик файлов частями
+
+    Части читаются в буферы общего пула (readinto / pread) или берутся
+    срезами mmap и передаются в запрос как memoryview, без промежуточных
+    объектов bytes на каждую часть. Ошибки отдельных частей повторяются
+    по политике повторов, а не глотаются, как в Client.save_file.
+    Прогресс больших файлов пишется в журнал, и после остановки загрузка
+    продолжается с первой неподтвержденной части с тем же file_id.
+    При загрузке через пул аккаунтов части проходят еще и через
+    ограничитель скорости своего аккаунта, а FloodWait отмечается у него.
+    Части отправляются через отдельные медиа-соединения общего пула
+    (upload_sessions), а не через основное соединение клиента.
+    """
+
+    def __init__(self, max_concurrent: int = 4, use_mmap: bool = False,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 memory_budget: Optional[MemoryBudget] = None,
+                 keep_page_cache: bool = False,
+                 read_scheduler: Optional[ReadScheduler] = None,
+                 rate_limiter: Optional[BandwidthLimiter] = None,
+                 journal: Optional[UploadJournal] = None,
+                 accounts: Optional[AccountPool] = None):
+        """
+        Инициализация загрузчика
+
+        Args:
+            max_concurrent: Количество одновременно загружаемых файлов
+            use_mmap: Читать файлы через отображение в память
+            retry_policy: Политика повторов для отдельных частей
+            memory_budget: Общий лимит байт в загрузке (None - без лимита)
+            keep_page_cache: Не сбрасывать загруженные части из кэша страниц
+            read_scheduler: Планировщик блочного чтения по устройствам
+            rate_limiter: Общий лимит скорости отправки частей
+            journal: Журнал для продолжения прерванных загрузок
+            accounts: Пул аккаунтов (аккаунт определяется по клиенту)
+        """
+        self.max_concurrent = max(1, max_concurrent)
+        self.use_mmap = use_mmap
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.memory_budget = memory_budget
+        self.keep_page_cache = keep_page_cache
+        self.read_scheduler = read_scheduler
+        self.rate_limiter = rate_limiter
+        self.journal = journal
+        self.accounts = accounts
+        self._buffers: Optional[BufferPool] = None
+
+    def _get_buffers(self) -> BufferPool:
+        """Создает пул буферов при первом использовании (внутри цикла событий)"""
+        if self._buffers is None:
+            buffers_count = self.max_concurrent * PART_WORKERS
+            if self.memory_budget:
+                # Буферов сверх бюджета все равно не дождаться
+                buffers_count = min(buffers_count, max(1, self.memory_budget.limit_bytes // PART_SIZE))
+            self._buffers = BufferPool(buffers_count, PART_SIZE)
+        return self._buffers
+
+    async def save_file(self, client: Client, path: str, file_id: Optional[int] = None,
+                        file_part: Optional[int] = None, progress: Optional[Callable] = None,
+                        progress_args: tuple = ()):
+        """
+        Загружает файл на сервер
+
+        Args:
+            client: Клиент Telegram
+            path: Путь к файлу
+            file_id: ID ранее загружаемого файла (для дозагрузки части)
+            file_part: Номер потерянной части (только она будет загружена)
+            progress: Callback прогресса (current, total, *progress_args)
+            progress_args: Дополнительные аргументы callback
+
+        Returns:
+            InputFile / InputFileBig, либо None при дозагрузке одной части
+        """
+        source = open_part_source(path, self.use_mmap, self.keep_page_cache, self.read_scheduler)
+        account = self.accounts.for_client(client) if self.accounts else None
+        session = None
+        try:
+            if source.size == 0:
+                raise ValueError("Размер файла равен 0 Б")
+
+            is_big = source.size > BIG_FILE_SIZE
+            is_missing_part = file_part is not None
+            total_parts = source.total_parts
+            if is_big and not is_missing_part and file_id is None:
+                file_id = self._resume_upload(source, account)
+            file_id = file_id or client.rnd_id()
+
+            async with client.save_file_semaphore:
+                with span("acquire_connection", "parts"):
+                    session = await upload_sessions.acquire(client)
+
+                if is_missing_part:
+                    await self._upload_part(session, source, file_id, file_part, is_big, account=account)
+                    return None
+
+                if is_big:
+                    await self._upload_parts(session, source, file_id, progress, progress_args, account)
+                    return raw.types.InputFileBig(id=file_id, parts=total_parts, name=source.name)
+
+                # Маленький файл: части по порядку, т.к. нужна контрольная сумма md5
+                md5_sum = md5()
+                uploaded = 0
+                for index in range(total_parts):
+                    uploaded += await self._upload_part(session, source, file_id, index, is_big,
+                                                        md5_sum, account)
+                    await self._report_progress(progress, uploaded, source.size, progress_args)
+                return raw.types.InputFile(
+                    id=file_id, parts=total_parts, name=source.name, md5_checksum=md5_sum.hexdigest()
+                )
+        finally:
+            if session:
+                await upload_sessions.release(client, session)
+            source.close()
+
+    async def _upload_parts(self, session: Session, source, file_id: int,
+                            progress: Optional[Callable], progress_args: tuple,
+                            account: Optional[UploadAccount] = None) -> None:
+        """
+        Загружает части большого файла несколькими воркерами
+
+        Args:
+            session: Медиа-сессия
+            source: Источник частей
+            file_id: ID загружаемого файла
+            progress: Callback прогресса
+            progress_args: Дополнительные аргументы callback
+            account: Аккаунт пула, через который идет загрузка
+        """
+        owner = account.session_name if account else ""
+        next_parts = iter(range(source.first_part, source.total_parts))
+        uploaded = source.first_part * source.part_size
+        remaining = source.total_parts - source.first_part
+
+        async def worker():
+            nonlocal uploaded
+            for index in next_parts:
+                uploaded += await self._upload_part(session, source, file_id, index, True,
+                                                    account=account)
+                if self.journal:
+                    self.journal.update_upload(source.path, file_id, source.acknowledged_parts,
+                                               source.total_parts, owner)
+                await self._report_progress(progress, uploaded, source.size, progress_args)
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(min(PART_WORKERS, remaining))]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            # При отмене части в полете бросаются: сервер их не подтвердил,
+            # и при продолжении они будут загружены заново
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    def _resume_upload(self, source, account: Optional[UploadAccount] = None) -> Optional[int]:
+        """
+        Находит в журнале прерванную загрузку файла и пропускает подтвержденные части
+
+        Args:
+            source: Источник частей
+            account: Аккаунт пула (продолжить можно только загрузку той же сессии)
+
+        Returns:
+            file_id прерванной загрузки или None
+        """
+        if not self.journal:
+            return None
+        owner = account.session_name if account else ""
+        resume = self.journal.get_upload(source.path, source.total_parts, owner)
+        if resume is None:
+            return None
+        file_id, acknowledged = resume
+        source.skip_parts(acknowledged)
+        print(f"[PARTS] {source.name}: продолжаем загрузку с части {acknowledged + 1}/{source.total_parts}")
+        return file_id
+
+    async def _upload_part(self, session: Session, source, file_id: int, index: int,
+                           is_big: bool, md5_sum=None,
+                           account: Optional[UploadAccount] = None) -> int:
+        """
+        Читает и загружает одну часть с повторами при временных ошибках
+
+        Место в бюджете памяти занимается до чтения с диска и освобождается
+        после подтверждения части сервером. Источник с блочным чтением
+        занимает бюджет сам - целыми блоками.
+
+        Args:
+            session: Медиа-сессия
+            source: Источник частей
+            file_id: ID загружаемого файла
+            index: Номер части
+            is_big: Файл загружается как большой
+            md5_sum: Объект md5 для маленьких файлов
+            account: Аккаунт пула, через который идет загрузка
+
+        Returns:
+            Размер загруженной части в байтах
+        """
+        if source.sequential:
+            # Сжатый файл в архиве читается по порядку: очередь занимается
+            # до памяти и буфера, чтобы ожидающие части их не держали
+            with span("wait_read_turn", "parts", part=index):
+                await source.wait_turn(index)
+        reserved = 0
+        if self.memory_budget and not source.block_reads:
+            with span("wait_memory", "parts"):
+                reserved = await self.memory_budget.acquire(source.part_length(index))
+        buffers = None
+        buffer = None
+        fetched = False
+        inflight = 0
+        try:
+            if source.needs_buffer:
+                buffers = self._get_buffers()
+                buffer = await buffers.acquire()
+            loop = asyncio.get_running_loop()
+            with span("read_part", "io", part=index):
+                if source.block_reads:
+                    data = await source.fetch_part(index, self.memory_budget)
+                    fetched = True
+                else:
+                    data = await loop.run_in_executor(None, source.read_part, index, buffer)
+            if source.sequential:
+                await source.finish_turn(index)
+            inflight = len(data)
+            INFLIGHT_BYTES.inc(inflight)
+            if md5_sum is not None:
+                md5_sum.update(data)
+
+            if is_big:
+                request = _SaveBigFilePart(
+                    file_id=file_id, file_part=index,
+                    file_total_parts=source.total_parts, bytes=data
+                )
+            else:
+                request = _SaveFilePart(file_id=file_id, file_part=index, bytes=data)
+
+            attempt = 0
+            while True:
+                attempt += 1
+                try:
+                    if self.rate_limiter:
+                        with span("rate_limit", "parts"):
+                            await self.rate_limiter.acquire(len(data))
+                    if account is not None and account.rate_limiter.rate is not None:
+                        with span("account_rate_limit", "parts", account=account.session_name):
+                            await account.rate_limiter.acquire(len(data))
+                    sent_at = time.monotonic()
+                    with span("save_part", "parts", part=index, attempt=attempt):
+                        await session.invoke(request)
+                    PART_RTT_SECONDS.observe(time.monotonic() - sent_at)
+                    BYTES_SENT.inc(len(data))
+                    source.mark_acknowledged(index)
+                    return len(data)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    kind = classify_error(e)
+                    if kind == PERMANENT or not self.retry_policy.should_retry(kind, attempt):
+                        raise
+                    delay = self.retry_policy.get_delay(kind, attempt, e)
+                    if kind == FLOOD_WAIT:
+                        FLOOD_WAIT_SECONDS.inc(delay)
+                        if account is not None:
+                            # Новые файлы уйдут другим аккаунтам, пока этот ждет
+                            self.accounts.report_flood(account, delay)
+                    print(f"[PARTS] Часть {index} файла {source.name}: {e}. Повтор через {delay:.1f} сек")
+                    await asyncio.sleep(delay)
+        finally:
+            if inflight:
+                INFLIGHT_BYTES.dec(inflight)
+            if fetched:
+                source.release_part(index)
+            if buffer is not None:
+                buffers.release(buffer)
+            if reserved:
+                self.memory_budget.release(reserved)
+
+    def close(self) -> None:
+        """Останавливает потоки чтения планировщика"""
+        if self.read_scheduler:
+            self.read_scheduler.shutdown()
+
+    @staticmethod
+    async def _report_progress(progress: Optional[Callable], current: int, total: int,
+                               progress_args: tuple) -> None:
+        """Вызывает callback прогресса (синхронный или асинхронный)"""
+        if not progress:
+            return
+        if inspect.iscoroutinefunction(progress):
+            await progress(current, total, *progress_args)
+        else:
+            progress(current, total, *progress_args)
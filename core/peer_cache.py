@@ -0,0 +1,134 @@
+"""
+Модуль постоянного кэша пиров (chat id -> access hash, тип)
+"""
+import json
+import os
+import threading
+from typing import Any, Dict, Optional
+
+
+# Типы пиров в терминах хранилища Pyrogram
+PEER_TYPES = {"user", "bot", "group", "channel", "supergroup"}
+
+
+class PeerCache:
+    """
+    Кэш пиров, сохраняемый между запусками
+
+    Заполняется при загрузке списка чатов и используется загрузчиком,
+    чтобы не сканировать диалоги перед каждой загрузкой. Access hash
+    привязан к аккаунту, поэтому записи хранятся отдельно для каждого
+    пользователя.
+    """
+
+    _lock = threading.Lock()
+
+    def __init__(self, filename: str = "peers_cache.json"):
+        """
+        Инициализация кэша
+
+        Args:
+            filename: Имя файла кэша
+        """
+        self.filename = filename
+
+    def get(self, user_id: int, chat_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Возвращает запись о пире
+
+        Args:
+            user_id: ID авторизованного пользователя
+            chat_id: ID чата
+
+        Returns:
+            Словарь с ключами access_hash, type, username или None
+        """
+        with self._lock:
+            data = self._load()
+        return data.get(str(user_id), {}).get(str(chat_id))
+
+    def update(self, user_id: int, peers: Dict[int, Dict[str, Any]]) -> None:
+        """
+        Добавляет или обновляет записи о пирах
+
+        Args:
+            user_id: ID авторизованного пользователя
+            peers: Словарь chat_id -> запись о пире
+        """
+        if not peers:
+            return
+        with self._lock:
+            data = self._load()
+            user_peers = data.setdefault(str(user_id), {})
+            for chat_id, entry in peers.items():
+                user_peers[str(chat_id)] = entry
+            self._save(data)
+
+    def clear(self) -> None:
+        """Удаляет кэш пиров"""
+        with self._lock:
+            try:
+                if os.path.exists(self.filename):
+                    os.remove(self.filename)
+            except Exception as e:
+                print(f"[PEER_CACHE] Ошибка удаления кэша пиров: {e}")
+
+    def _load(self) -> Dict[str, Any]:
+        """Загружает кэш из файла"""
+        try:
+            if os.path.exists(self.filename):
+                with open(self.filename, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            print(f"[PEER_CACHE] Ошибка загрузки кэша пиров: {e}")
+        return {}
+
+    def _save(self, data: Dict[str, Any]) -> None:
+        """Атомарно сохраняет кэш в файл"""
+        # Кэш могут записывать несколько процессов - у каждого свой временный файл
+        tmp_path = f"{self.filename}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.filename)
+        except Exception as e:
+            print(f"[PEER_CACHE] Ошибка сохранения кэша пиров: {e}")
+
+
+def make_peer_entry(input_peer, peer_type: str, username: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Формирует запись кэша из InputPeer Pyrogram
+
+    Args:
+        input_peer: Результат client.resolve_peer()
+        peer_type: Тип пира (user, bot, group, channel, supergroup)
+        username: Username чата, если есть
+
+    Returns:
+        Запись для PeerCache
+    """
+    return {
+        'access_hash': getattr(input_peer, 'access_hash', 0) or 0,
+        'type': peer_type,
+        'username': username
+    }
+
+
+async def pin_peer(client, chat_id: int, entry: Dict[str, Any]):
+    """
+    Заносит запись кэша в хранилище сессии Pyrogram без запросов к серверу
+
+    После этого client.resolve_peer(chat_id) разрешается локально.
+
+    Args:
+        client: Клиент Telegram
+        chat_id: ID чата
+        entry: Запись из PeerCache
+
+    Returns:
+        InputPeer для чата
+    """
+    await client.storage.update_peers([
+        (chat_id, entry['access_hash'], entry['type'], entry.get('username'), None)
+    ])
+    return await client.storage.get_peer_by_id(chat_id)
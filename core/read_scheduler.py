@@ -0,0 +1,245 @@
+"""
+Модуль планирования чтения с дисков с учетом устройства-источника
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from core.memory_budget import MemoryBudget
+from core.part_source import PART_SIZE, FilePartSource
+
+
+# Размер блока, которым файл читается с диска (кратен размеру части)
+READ_BLOCK_BYTES = 8 * 1024 * 1024
+
+
+class ReadScheduler:
+    """
+    Планировщик чтения частей, сгруппированный по устройствам (st_dev)
+
+    Для каждого устройства заводится один поток чтения: файлы с одного
+    HDD читаются по очереди крупными последовательными блоками вместо
+    чередования частей по 512 КБ из разных файлов (что вызывает постоянное
+    позиционирование головки). Файлы с разных устройств читаются
+    параллельно в своих потоках.
+    """
+
+    def __init__(self, block_bytes: int = READ_BLOCK_BYTES):
+        """
+        Инициализация планировщика
+
+        Args:
+            block_bytes: Размер блока чтения в байтах
+        """
+        self.block_bytes = max(PART_SIZE, block_bytes - block_bytes % PART_SIZE)
+        self._executors: Dict[int, ThreadPoolExecutor] = {}
+        self._lock = threading.Lock()
+        # Свободные буферы блоков; их число ограничено бюджетом памяти,
+        # под который блоки занимаются до чтения
+        self._free_blocks: List[bytearray] = []
+
+    def open(self, path: str, keep_cache: bool = False) -> "ScheduledPartSource":
+        """
+        Открывает файл как источник частей через планировщик
+
+        Args:
+            path: Путь к файлу
+            keep_cache: Не сбрасывать прочитанное из кэша страниц
+
+        Returns:
+            Источник частей
+        """
+        return ScheduledPartSource(path, self, keep_cache=keep_cache)
+
+    def submit(self, device: int, function, *args) -> Future:
+        """
+        Ставит чтение в очередь устройства
+
+        Args:
+            device: Идентификатор устройства (st_dev)
+            function: Функция чтения
+            *args: Аргументы функции
+
+        Returns:
+            Future с результатом чтения
+        """
+        with self._lock:
+            executor = self._executors.get(device)
+            if executor is None:
+                executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"read-dev{device}")
+                self._executors[device] = executor
+        return executor.submit(function, *args)
+
+    def take_block(self) -> bytearray:
+        """Берет буфер блока из пула (создает новый, если свободных нет)"""
+        with self._lock:
+            if self._free_blocks:
+                return self._free_blocks.pop()
+        return bytearray(self.block_bytes)
+
+    def give_block(self, buffer: bytearray) -> None:
+        """Возвращает буфер блока в пул"""
+        with self._lock:
+            self._free_blocks.append(buffer)
+
+    def shutdown(self) -> None:
+        """Останавливает потоки чтения"""
+        with self._lock:
+            executors = list(self._executors.values())
+            self._executors.clear()
+            self._free_blocks.clear()
+        for executor in executors:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+class ScheduledPartSource(FilePartSource):
+    """
+    Источник частей, читающий файл блоками через очередь своего устройства
+
+    Части отдаются срезами memoryview из прочитанного блока. Пока отдаются
+    части текущего блока, следующий уже читается (упреждение на один блок).
+
+    Блоки берутся из пула планировщика, и каждый блок (включая упреждающий)
+    занимает в бюджете памяти весь свой размер - до чтения с диска. Блок
+    возвращается в пул и освобождает бюджет, когда все его части отправлены
+    (release_part). Цикл событий ждет чтения блока, не занимая потоков.
+    """
+
+    needs_buffer = False
+    # Части запрашиваются через fetch_part и освобождаются через release_part
+    block_reads = True
+
+    def __init__(self, path: str, scheduler: ReadScheduler, part_size: int = PART_SIZE,
+                 keep_cache: bool = False):
+        """
+        Открывает файл
+
+        Args:
+            path: Путь к файлу
+            scheduler: Планировщик чтения
+            part_size: Размер части в байтах
+            keep_cache: Не сбрасывать прочитанное из кэша страниц
+        """
+        super().__init__(path, part_size, keep_cache)
+        self.scheduler = scheduler
+        self.device = os.fstat(self._file.fileno()).st_dev
+        self.parts_per_block = max(1, scheduler.block_bytes // part_size)
+        # Номер блока -> задача загрузки блока
+        self._blocks: Dict[int, asyncio.Task] = {}
+        # Номер блока -> (буфер, занятый бюджет, бюджет) для прочитанных блоков
+        self._loaded: Dict[int, Tuple[bytearray, int, Optional[MemoryBudget]]] = {}
+        # Номер блока -> чтение в потоке устройства
+        self._reads: Dict[int, Future] = {}
+        # Номер блока -> части, которые еще не отданы и не освобождены
+        self._unreleased: Dict[int, int] = {}
+
+    async def fetch_part(self, index: int, budget: Optional[MemoryBudget] = None) -> memoryview:
+        """
+        Возвращает часть из блока (блок читается при первом обращении)
+
+        Args:
+            index: Номер части (с 0)
+            budget: Бюджет памяти, в котором занимаются блоки
+
+        Returns:
+            memoryview на часть файла (после отправки передать в release_part)
+        """
+        block_index = index // self.parts_per_block
+        task = self._request_block(block_index, budget)
+        if (block_index + 1) * self.parts_per_block < self.total_parts:
+            self._request_block(block_index + 1, budget)
+
+        # Отмена одной части не должна отменять чтение блока для остальных
+        block = await asyncio.shield(task)
+        start = (index - block_index * self.parts_per_block) * self.part_size
+        return memoryview(block)[start:start + self.part_length(index)]
+
+    def release_part(self, index: int) -> None:
+        """
+        Отмечает, что часть больше не используется (отправлена или брошена)
+
+        Args:
+            index: Номер части, полученной через fetch_part
+        """
+        block_index = index // self.parts_per_block
+        if block_index not in self._unreleased:
+            return
+        self._unreleased[block_index] -= 1
+        if self._unreleased[block_index] <= 0:
+            self._free_block(block_index)
+
+    def _request_block(self, block_index: int, budget: Optional[MemoryBudget]) -> asyncio.Task:
+        """Запускает загрузку блока, если она еще не запущена"""
+        task = self._blocks.get(block_index)
+        if task is None:
+            first_part = block_index * self.parts_per_block
+            # Пропущенные при продолжении загрузки части не будут запрошены
+            skipped = max(0, min(self.first_part - first_part, self.parts_per_block))
+            self._unreleased[block_index] = (
+                min(self.parts_per_block, self.total_parts - first_part) - skipped
+            )
+            task = asyncio.ensure_future(self._load_block(block_index, budget))
+            self._blocks[block_index] = task
+        return task
+
+    async def _load_block(self, block_index: int, budget: Optional[MemoryBudget]) -> bytearray:
+        """Занимает бюджет и буфер под блок и читает его в очереди устройства"""
+        offset = block_index * self.parts_per_block * self.part_size
+        length = min(self.parts_per_block * self.part_size, self.size - offset)
+        reserved = await budget.acquire(length) if budget else 0
+        buffer = None
+        try:
+            buffer = self.scheduler.take_block()
+            read = self.scheduler.submit(self.device, self._read_block, block_index, buffer)
+            self._reads[block_index] = read
+            await asyncio.wrap_future(read)
+        except BaseException:
+            if budget and reserved:
+                budget.release(reserved)
+            # Прерванное чтение может еще писать в буфер - в пул он не возвращается
+            read = self._reads.get(block_index)
+            if buffer is not None and (read is None or read.done()):
+                self.scheduler.give_block(buffer)
+            raise
+        self._loaded[block_index] = (buffer, reserved, budget)
+        return buffer
+
+    def _read_block(self, block_index: int, buffer: bytearray) -> None:
+        """Читает блок целиком одним последовательным чтением (в потоке устройства)"""
+        offset = block_index * self.parts_per_block * self.part_size
+        length = min(self.parts_per_block * self.part_size, self.size - offset)
+        self._read_ahead(offset)
+        self._read_into(memoryview(buffer)[:length], offset)
+
+    def _free_block(self, block_index: int) -> None:
+        """Возвращает блок в пул и освобождает бюджет"""
+        self._blocks.pop(block_index, None)
+        self._reads.pop(block_index, None)
+        self._unreleased.pop(block_index, None)
+        loaded = self._loaded.pop(block_index, None)
+        if loaded is None:
+            return
+        buffer, reserved, budget = loaded
+        self.scheduler.give_block(buffer)
+        if budget and reserved:
+            budget.release(reserved)
+
+    def close(self) -> None:
+        """Отменяет невостребованное упреждающее чтение, освобождает блоки и закрывает файл"""
+        for task in self._blocks.values():
+            task.cancel()
+        # Уже начатое чтение нужно дождаться, прежде чем закрывать дескриптор
+        for read in list(self._reads.values()):
+            if not read.cancel():
+                try:
+                    read.result()
+                except Exception:
+                    pass
+        for block_index in list(self._loaded):
+            self._free_block(block_index)
+        self._blocks.clear()
+        self._reads.clear()
+        self._unreleased.clear()
+        super().close()
@@ -0,0 +1,148 @@
+"""
+Модуль классификации ошибок загрузки и политики повторных попыток
+"""
+import asyncio
+import random
+from typing import Optional
+
+
+# Категории ошибок
+TRANSIENT = "transient"      # Временная ошибка (сеть, сервер) - можно повторить
+FLOOD_WAIT = "flood_wait"    # Ограничение частоты запросов - повторить после ожидания
+PERMANENT = "permanent"      # Постоянная ошибка (нет прав, неверный чат) - не повторяем
+
+# Ошибки Telegram, которые имеет смысл повторить
+TRANSIENT_ERROR_IDS = {
+    "FILE_PART_X_MISSING",
+    "FILE_PART_EMPTY",
+    "FILE_PART_INVALID",
+    "RPC_CALL_FAIL",
+    "RPC_MCGET_FAIL",
+    "TIMEOUT",
+    "MSG_WAIT_FAILED",
+    "MSGID_DECREASE_RETRY",
+    "PERSISTENT_TIMESTAMP_OUTDATED",
+    "MEMBER_OCCUPY_PRIMARY_LOC_FAILED",
+    "NEED_MEMBER_INVALID",
+    "WORKER_BUSY_TOO_LONG_RETRY",
+    "INTERDC_X_CALL_ERROR",
+    "INTERDC_X_CALL_RICH_ERROR",
+}
+
+# Ошибки Telegram с обязательным ожиданием
+FLOOD_WAIT_ERROR_IDS = {
+    "FLOOD_WAIT_X",
+    "SLOWMODE_WAIT_X",
+    "TAKEOUT_INIT_DELAY_X",
+}
+
+
+def classify_error(error: BaseException) -> str:
+    """
+    Определяет категорию ошибки загрузки
+
+    Args:
+        error: Исключение, возникшее при загрузке
+
+    Returns:
+        Одна из категорий: TRANSIENT, FLOOD_WAIT, PERMANENT
+    """
+    # Локальные ошибки файловой системы повторять бессмысленно
+    if isinstance(error, (FileNotFoundError, PermissionError, IsADirectoryError)):
+        return PERMANENT
+
+    error_id = getattr(error, "ID", None)
+    error_code = getattr(error, "CODE", None)
+
+    # Ошибки Telegram (RPCError) имеют ID и CODE
+    if error_id is not None or error_code is not None:
+        if error_id in FLOOD_WAIT_ERROR_IDS or error_code == 420:
+            return FLOOD_WAIT
+        if error_id in TRANSIENT_ERROR_IDS:
+            return TRANSIENT
+        # 5xx - проблемы на стороне сервера, 303 - миграция DC
+        if error_code is not None and (error_code >= 500 or error_code == 303):
+            return TRANSIENT
+        return PERMANENT
+
+    # Сетевые ошибки и таймауты
+    if isinstance(error, (ConnectionError, TimeoutError, asyncio.TimeoutError, OSError)):
+        return TRANSIENT
+
+    # Прочие ошибки без кода (неверные параметры, KeyError, EOFError
+    # оборванного потока архива и т.д.) при повторе не исчезнут
+    return PERMANENT
+
+
+def get_flood_wait_seconds(error: BaseException) -> Optional[int]:
+    """
+    Извлекает время ожидания из ошибки FloodWait
+
+    Args:
+        error: Исключение Telegram
+
+    Returns:
+        Количество секунд ожидания или None
+    """
+    value = getattr(error, "value", None)
+    if isinstance(value, int) and value >= 0:
+        return value
+    return None
+
+
+class RetryPolicy:
+    """Политика повторных попыток с экспоненциальной задержкой и джиттером"""
+
+    def __init__(self, max_attempts: int = 5, base_delay: float = 2.0,
+                 max_delay: float = 300.0, jitter: float = 0.5):
+        """
+        Инициализация политики повторов
+
+        Args:
+            max_attempts: Максимальное количество попыток для одного файла
+            base_delay: Базовая задержка перед повтором (сек)
+            max_delay: Максимальная задержка перед повтором (сек)
+            jitter: Доля случайного разброса задержки (0..1)
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = min(max(jitter, 0.0), 1.0)
+
+    def should_retry(self, kind: str, attempt: int) -> bool:
+        """
+        Проверяет, нужно ли повторить попытку
+
+        Args:
+            kind: Категория ошибки
+            attempt: Номер завершившейся неудачей попытки (с 1)
+
+        Returns:
+            True если попытку нужно повторить
+        """
+        if kind == PERMANENT:
+            return False
+        return attempt < self.max_attempts
+
+    def get_delay(self, kind: str, attempt: int, error: Optional[BaseException] = None) -> float:
+        """
+        Вычисляет задержку перед следующей попыткой
+
+        Args:
+            kind: Категория ошибки
+            attempt: Номер завершившейся неудачей попытки (с 1)
+            error: Исходное исключение
+
+        Returns:
+            Задержка в секундах
+        """
+        if kind == FLOOD_WAIT and error is not None:
+            wait_seconds = get_flood_wait_seconds(error)
+            if wait_seconds is not None:
+                # Ждем ровно столько, сколько просит сервер, плюс небольшой запас
+                return wait_seconds + random.uniform(0, 1 + self.jitter * 2)
+
+        delay = min(self.max_delay, self.base_delay * (2 ** max(0, attempt - 1)))
+        # Джиттер разносит повторы разных файлов во времени
+        spread = delay * self.jitter
+        return max(0.0, delay - spread + random.uniform(0, spread * 2))
@@ -0,0 +1,74 @@
+"""
+Модуль упорядоченной доставки сообщений при параллельной загрузке
+"""
+import asyncio
+from typing import Dict, List
+
+
+class DeliverySequencer:
+    """
+    Очередность отправки сообщений по порядковым номерам файлов
+
+    Байты файлов загружаются параллельно и в любом порядке, а сообщение
+    с файлом номер N отправляется только после того, как завершены
+    (отправлены или окончательно отброшены) все файлы с меньшими номерами.
+    """
+
+    def __init__(self, count: int):
+        """
+        Инициализация очередности
+
+        Args:
+            count: Количество позиций (файлов в пакете)
+        """
+        self._finished = [False] * count
+        self._head = 0
+        self._waiters: Dict[int, List[asyncio.Future]] = {}
+
+    @property
+    def head(self) -> int:
+        """Первая незавершенная позиция"""
+        return self._head
+
+    def is_turn(self, position: int) -> bool:
+        """Проверяет, завершены ли все позиции до указанной"""
+        return position <= self._head
+
+    async def wait_turn(self, position: int) -> None:
+        """
+        Ждет, пока не будут завершены все позиции до указанной
+
+        Args:
+            position: Порядковый номер файла
+        """
+        if self.is_turn(position):
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(position, []).append(future)
+        try:
+            await future
+        finally:
+            waiters = self._waiters.get(position)
+            if waiters and future in waiters:
+                waiters.remove(future)
+                if not waiters:
+                    del self._waiters[position]
+
+    def finish(self, position: int) -> None:
+        """
+        Отмечает позицию как завершенную (повторный вызов ничего не делает)
+
+        Args:
+            position: Порядковый номер файла
+        """
+        if position < 0 or position >= len(self._finished) or self._finished[position]:
+            return
+        self._finished[position] = True
+
+        while self._head < len(self._finished) and self._finished[self._head]:
+            self._head += 1
+
+        for waiting_position in [p for p in self._waiters if p <= self._head]:
+            for future in self._waiters.pop(waiting_position):
+                if not future.done():
+                    future.set_result(None)
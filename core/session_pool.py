@@ -0,0 +1,173 @@
+"""
+Модуль пула медиа-соединений для загрузки частей файлов
+"""
+import asyncio
+from typing import Dict, List, Optional, Tuple
+
+from pyrogram import Client
+from pyrogram.session import Session
+
+from core.metrics import UPLOAD_CONNECTIONS
+
+
+# Ключ пула: DC, ключ авторизации и тестовый режим аккаунта
+SessionKey = Tuple[int, bytes, bool]
+
+
+class UploadSessionPool:
+    """
+    Пул отдельных авторизованных соединений для upload.saveFilePart / saveBigFilePart
+
+    Части файлов идут не через основное соединение клиента, поэтому
+    большая загрузка не задерживает запросы чатов и пиров. Соединения
+    открываются к DC аккаунта с флагом медиа (заранее, через prewarm)
+    и не закрываются после файла: следующий файл пакета получает уже
+    готовое соединение без нового рукопожатия. У каждого аккаунта в пуле
+    остается не больше соединений, чем его лимит параллельных передач.
+
+    Соединения живут не дольше пакета: сессия привязана к клиенту, а
+    клиенты создаются на пакет, поэтому перед отключением клиента его
+    соединения закрываются (drain), при сбросе авторизации - все (close_all).
+    Пул работает только в общем цикле событий.
+    """
+
+    def __init__(self):
+        """Инициализация пула"""
+        self._idle: Dict[SessionKey, List[Session]] = {}
+
+    async def acquire(self, client: Client) -> Session:
+        """
+        Выдает соединение аккаунта клиента (готовое или новое)
+
+        Количество одновременно выданных соединений ограничивает
+        client.save_file_semaphore вызывающего кода.
+
+        Args:
+            client: Клиент Telegram
+
+        Returns:
+            Запущенная медиа-сессия (возвращается через release)
+        """
+        key = await self._key(client)
+        idle = self._idle.get(key, [])
+        while idle:
+            session = idle.pop()
+            if session.is_started.is_set() and session.client is client:
+                UPLOAD_CONNECTIONS.inc(result="reused")
+                return session
+            await self._close(session)
+
+        dc_id, auth_key, test_mode = key
+        session = Session(client, dc_id, auth_key, test_mode, is_media=True)
+        await session.start()
+        UPLOAD_CONNECTIONS.inc(result="opened")
+        return session
+
+    async def release(self, client: Client, session: Session) -> None:
+        """
+        Возвращает соединение в пул
+
+        Args:
+            client: Клиент, которому соединение было выдано
+            session: Медиа-сессия из acquire
+        """
+        idle = self._idle.setdefault(self._session_key(session), [])
+        if not session.is_started.is_set() or len(idle) >= client.max_concurrent_transmissions:
+            await self._close(session)
+            return
+        idle.append(session)
+
+    async def prewarm(self, client: Client, count: Optional[int] = None) -> int:
+        """
+        Заранее открывает соединения аккаунта
+
+        Args:
+            client: Подключенный клиент Telegram
+            count: Сколько соединений должно быть готово (не больше лимита передач)
+
+        Returns:
+            Количество открытых соединений
+        """
+        key = await self._key(client)
+        limit = client.max_concurrent_transmissions
+        wanted = limit if count is None else min(count, limit)
+        missing = wanted - len(self._idle.get(key, []))
+        if missing <= 0:
+            return 0
+
+        dc_id, auth_key, test_mode = key
+        sessions = [Session(client, dc_id, auth_key, test_mode, is_media=True) for _ in range(missing)]
+        results = await asyncio.gather(*(session.start() for session in sessions), return_exceptions=True)
+        opened = 0
+        for session, result in zip(sessions, results):
+            if isinstance(result, BaseException):
+                print(f"[CONNECTIONS] Не удалось открыть соединение загрузки: {result}")
+                continue
+            UPLOAD_CONNECTIONS.inc(result="opened")
+            await self.release(client, session)
+            opened += 1
+        return opened
+
+    async def drain(self, client: Client) -> int:
+        """
+        Закрывает неиспользуемые соединения клиента (перед его отключением)
+
+        Сессия ссылается на своего клиента, поэтому соединения отключенного
+        клиента не должны оставаться в пуле.
+
+        Args:
+            client: Клиент Telegram
+
+        Returns:
+            Количество закрытых соединений
+        """
+        drained = []
+        for key in list(self._idle):
+            idle = self._idle[key]
+            drained += [session for session in idle if session.client is client]
+            self._idle[key] = [session for session in idle if session.client is not client]
+            if not self._idle[key]:
+                del self._idle[key]
+        for session in drained:
+            await self._close(session)
+        return len(drained)
+
+    async def close_all(self) -> int:
+        """
+        Закрывает все неиспользуемые соединения (при сбросе авторизации)
+
+        Returns:
+            Количество закрытых соединений
+        """
+        sessions = [session for idle in self._idle.values() for session in idle]
+        self._idle.clear()
+        for session in sessions:
+            await self._close(session)
+        return len(sessions)
+
+    def idle_count(self) -> int:
+        """Количество открытых неиспользуемых соединений"""
+        return sum(len(idle) for idle in self._idle.values())
+
+    @staticmethod
+    async def _close(session: Session) -> None:
+        """Останавливает медиа-сессию, не пропуская наружу ошибки сети"""
+        try:
+            await session.stop()
+        except Exception as e:
+            print(f"[CONNECTIONS] Ошибка закрытия соединения загрузки: {e}")
+
+    @staticmethod
+    async def _key(client: Client) -> SessionKey:
+        """Ключ пула для аккаунта клиента"""
+        return (await client.storage.dc_id(), await client.storage.auth_key(),
+                await client.storage.test_mode())
+
+    @staticmethod
+    def _session_key(session: Session) -> SessionKey:
+        """Ключ пула для медиа-сессии"""
+        return session.dc_id, session.auth_key, session.test_mode
+
+
+# Общий пул соединений загрузки (соединения пакета)
+upload_sessions = UploadSessionPool()
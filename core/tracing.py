@@ -0,0 +1,249 @@
+"""
+Модуль трассировки этапов загрузки с экспортом в формат Chrome Trace (Perfetto)
+"""
+import asyncio
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+
+# Сколько последних интервалов хранится в кольцевом буфере
+DEFAULT_CAPACITY = 200_000
+
+
+class _NullSpan:
+    """Пустой интервал: используется, когда трассировка выключена"""
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        return None
+
+    def set(self, **args) -> None:
+        """Аргументы интервала игнорируются"""
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """Интервал времени одного этапа (контекстный менеджер)"""
+
+    __slots__ = ("_tracer", "name", "category", "args", "_start", "_lane")
+
+    def __init__(self, tracer: "Tracer", name: str, category: str, args: Dict[str, Any]):
+        self._tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+        self._start = 0
+        self._lane = 0
+
+    def __enter__(self) -> "Span":
+        # Дорожка определяется при входе: после await задача та же, а поток - тоже
+        self._lane = self._tracer._current_lane()
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        end = time.perf_counter_ns()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self._tracer._record(self.name, self.category, self._start, end - self._start,
+                             self._lane, self.args)
+
+    def set(self, **args) -> None:
+        """Добавляет аргументы к интервалу (например, результат этапа)"""
+        self.args.update(args)
+
+
+class Tracer:
+    """
+    Сборщик интервалов этапов в кольцевой буфер
+
+    Выключенный трассировщик возвращает пустой интервал без обращения
+    к часам и буферу. Интервалы асинхронных задач раскладываются по
+    отдельным дорожкам (поток/задача), чтобы параллельные загрузки
+    в одном цикле событий не перекрывались на одной дорожке.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, enabled: bool = False):
+        """
+        Инициализация трассировщика
+
+        Args:
+            capacity: Размер кольцевого буфера (интервалов)
+            enabled: Включить сбор сразу
+        """
+        self.enabled = enabled
+        self._events: Deque[Tuple] = deque(maxlen=max(1, capacity))
+        self._lanes: Dict[Tuple[int, int], int] = {}
+        self._lane_names: Dict[int, str] = {}
+        self._lanes_lock = threading.Lock()
+        self._origin = time.perf_counter_ns()
+
+    def configure(self, enabled: bool, capacity: Optional[int] = None) -> None:
+        """
+        Включает или выключает сбор и меняет размер буфера
+
+        Args:
+            enabled: Собирать интервалы
+            capacity: Новый размер буфера (None - не менять)
+        """
+        if capacity and capacity != self._events.maxlen:
+            self._events = deque(self._events, maxlen=max(1, capacity))
+        self.enabled = enabled
+
+    def span(self, name: str, category: str = "upload", **args) -> Any:
+        """
+        Создает интервал этапа
+
+        Args:
+            name: Название этапа
+            category: Категория (upload, parts, auth, chats, media, io)
+            **args: Аргументы для просмотра в трассировке (имя файла, номер части)
+
+        Returns:
+            Контекстный менеджер интервала
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name, category, args)
+
+    def clear(self) -> None:
+        """Очищает буфер"""
+        self._events.clear()
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def export_chrome_trace(self, path: str) -> int:
+        """
+        Записывает собранные интервалы в JSON формата Chrome Trace Event
+
+        Файл открывается в chrome://tracing и ui.perfetto.dev.
+
+        Args:
+            path: Путь к файлу
+
+        Returns:
+            Количество записанных интервалов
+        """
+        events = list(self._events)
+        pid = os.getpid()
+        trace_events = [
+            {"name": "process_name", "ph": "M", "pid": pid, "tid": 0,
+             "args": {"name": "Telegram Video Uploader"}}
+        ]
+        with self._lanes_lock:
+            lane_names = dict(self._lane_names)
+        for lane, lane_name in sorted(lane_names.items()):
+            trace_events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": lane,
+                                 "args": {"name": lane_name}})
+            trace_events.append({"name": "thread_sort_index", "ph": "M", "pid": pid, "tid": lane,
+                                 "args": {"sort_index": lane}})
+
+        for name, category, start, duration, lane, args in events:
+            trace_events.append({
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": (start - self._origin) / 1000,
+                "dur": duration / 1000,
+                "pid": pid,
+                "tid": lane,
+                "args": args,
+            })
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms"}, f,
+                      ensure_ascii=False, default=str)
+        os.replace(tmp_path, path)
+        print(f"[TRACE] Записано {len(events)} интервалов в {path}")
+        return len(events)
+
+    def _record(self, name: str, category: str, start: int, duration: int,
+                lane: int, args: Dict[str, Any]) -> None:
+        """Добавляет интервал в буфер (deque.append потокобезопасен)"""
+        self._events.append((name, category, start, duration, lane, args))
+
+    def _current_lane(self) -> int:
+        """Номер дорожки для текущего потока и асинхронной задачи"""
+        thread = threading.current_thread()
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        key = (thread.ident, id(task) if task is not None else 0)
+        lane = self._lanes.get(key)
+        if lane is None:
+            with self._lanes_lock:
+                lane = self._lanes.setdefault(key, len(self._lanes) + 1)
+                label = thread.name if task is None else f"{thread.name} / {task.get_name()}"
+                self._lane_names[lane] = label
+        return lane
+
+
+# Общий трассировщик приложения
+tracer = Tracer()
+
+
+def span(name: str, category: str = "upload", **args) -> Any:
+    """Создает интервал этапа в общем трассировщике (см. Tracer.span)"""
+    if not tracer.enabled:
+        return _NULL_SPAN
+    return Span(tracer, name, category, args)
+
+
+def traced(name: Optional[str] = None, category: str = "upload") -> Callable:
+    """
+    Декоратор: оборачивает вызов функции (обычной или асинхронной) в интервал
+
+    Args:
+        name: Название этапа (по умолчанию - имя функции)
+        category: Категория этапа
+
+    Returns:
+        Декоратор
+    """
+    def decorator(function: Callable) -> Callable:
+        span_name = name or function.__name__
+
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                if not tracer.enabled:
+                    return await function(*args, **kwargs)
+                with Span(tracer, span_name, category, {}):
+                    return await function(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return function(*args, **kwargs)
+            with Span(tracer, span_name, category, {}):
+                return function(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+def configure_from_settings(settings) -> None:
+    """
+    Включает трассировку по настройкам приложения
+
+    Args:
+        settings: Настройки (ключи tracing_enabled, trace_buffer_events)
+    """
+    tracer.configure(
+        bool(settings.get("tracing_enabled", False)),
+        int(settings.get("trace_buffer_events", DEFAULT_CAPACITY))
+    )
@@ -0,0 +1,151 @@
+"""
+Модуль дополнительных параметров загрузки
+"""
+import os
+import tempfile
+from typing import Any, Dict, List, Optional
+
+from config.settings import Settings
+from core.accounts import accounts_from_settings
+from core.bandwidth import BandwidthSchedule, schedule_from_settings
+from core.ordering import ORDER_BY_NAME
+from core.retry import RetryPolicy
+
+
+class UploadOptions:
+    """Дополнительные параметры конвейера загрузки"""
+
+    def __init__(self, retry_policy: Optional[RetryPolicy] = None,
+                 generate_thumbnails: bool = True,
+                 thumbnails_dir: str = "thumbnails_cache",
+                 preprocess_workers: int = 2,
+                 album_mode: bool = False,
+                 album_size: int = 10,
+                 album_max_file_mb: int = 200,
+                 prepare_streaming: bool = False,
+                 scratch_dir: Optional[str] = None,
+                 transcode_workers: int = 1,
+                 transcode_lookahead: int = 2,
+                 use_mmap: bool = False,
+                 memory_budget_mb: int = 256,
+                 keep_page_cache: bool = False,
+                 device_aware_reads: bool = True,
+                 read_block_mb: int = 8,
+                 order_policy: str = ORDER_BY_NAME,
+                 scan_subfolders: bool = False,
+                 scan_archives: bool = True,
+                 ordered_delivery: bool = False,
+                 bandwidth_schedule: Optional[BandwidthSchedule] = None,
+                 resume_journal: bool = True,
+                 accounts: Optional[List[Dict[str, Any]]] = None,
+                 crypto_workers: int = 0,
+                 worker_processes: int = 0):
+        """
+        Инициализация параметров
+
+        Args:
+            retry_policy: Политика повторных попыток при временных ошибках
+            generate_thumbnails: Создавать превью для видео
+            thumbnails_dir: Папка кэша превью
+            preprocess_workers: Количество процессов для подготовки файлов
+            album_mode: Отправлять небольшие видео альбомами
+            album_size: Количество видео в альбоме (2..10)
+            album_max_file_mb: Максимальный размер файла для альбома (МБ)
+            prepare_streaming: Перепаковывать видео в faststart MP4 для стриминга
+            scratch_dir: Папка для временных файлов перепаковки
+            transcode_workers: Количество параллельных процессов перепаковки
+            transcode_lookahead: Сколько подготовленных файлов может ждать загрузки
+            use_mmap: Читать части файлов через отображение в память
+            memory_budget_mb: Общий лимит данных в загрузке, МБ (0 - без лимита)
+            keep_page_cache: Не сбрасывать загруженные файлы из кэша страниц
+                (для файлов, которые будут читаться повторно)
+            device_aware_reads: Читать файлы блоками, по очереди для каждого диска
+            read_block_mb: Размер блока чтения, МБ
+            order_policy: Политика порядка загрузки (см. core.ordering)
+            scan_subfolders: Искать видео во вложенных папках
+            scan_archives: Загружать видео из архивов (zip, tar) в папке
+                без распаковки на диск
+            ordered_delivery: Загружать файлы параллельно, а сообщения отправлять
+                строго в порядке очереди
+            bandwidth_schedule: Расписание лимита скорости (None - без ограничения)
+            resume_journal: Вести журнал загрузки и продолжать остановленный пакет
+                с места остановки
+            accounts: Дополнительные аккаунты пула загрузки
+                ({"session": ..., "limit_mb": ...}, см. core.accounts)
+            crypto_workers: Количество потоков шифрования MTProto
+                (0 - по числу ядер и одновременных загрузок)
+            worker_processes: Количество процессов-загрузчиков
+                (0 - файлы передаются в основном процессе). Процессы не пишут
+                в журнал загрузки: отправленные файлы и части разрезанных видео
+                журнал запоминает, но прерванная передача байтов файла
+                начинается заново
+        """
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.generate_thumbnails = generate_thumbnails
+        self.thumbnails_dir = thumbnails_dir
+        self.preprocess_workers = max(1, preprocess_workers)
+        self.album_mode = album_mode
+        self.album_size = max(2, min(album_size, 10))
+        self.album_max_file_mb = album_max_file_mb
+        self.prepare_streaming = prepare_streaming
+        self.scratch_dir = scratch_dir or os.path.join(tempfile.gettempdir(), "telegram_uploader")
+        self.transcode_workers = max(1, transcode_workers)
+        self.transcode_lookahead = max(0, transcode_lookahead)
+        self.use_mmap = use_mmap
+        self.memory_budget_mb = max(0, memory_budget_mb)
+        self.keep_page_cache = keep_page_cache
+        self.device_aware_reads = device_aware_reads
+        self.read_block_mb = max(1, read_block_mb)
+        self.order_policy = order_policy
+        self.scan_subfolders = scan_subfolders
+        self.scan_archives = scan_archives
+        self.ordered_delivery = ordered_delivery
+        self.bandwidth_schedule = bandwidth_schedule or BandwidthSchedule()
+        self.resume_journal = resume_journal
+        self.accounts = list(accounts or [])
+        self.crypto_workers = max(0, crypto_workers)
+        self.worker_processes = max(0, worker_processes)
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "UploadOptions":
+        """
+        Создает параметры из настроек приложения
+
+        Args:
+            settings: Настройки приложения
+
+        Returns:
+            Параметры загрузки
+        """
+        retry_policy = RetryPolicy(
+            max_attempts=int(settings.get("retry_max_attempts", 5)),
+            base_delay=float(settings.get("retry_base_delay", 2.0)),
+            max_delay=float(settings.get("retry_max_delay", 300.0))
+        )
+        return cls(
+            retry_policy=retry_policy,
+            generate_thumbnails=bool(settings.get("generate_thumbnails", True)),
+            thumbnails_dir=settings.get("thumbnails_dir", "thumbnails_cache"),
+            preprocess_workers=int(settings.get("preprocess_workers", 2)),
+            album_mode=bool(settings.get("album_mode", False)),
+            album_size=int(settings.get("album_size", 10)),
+            album_max_file_mb=int(settings.get("album_max_file_mb", 200)),
+            prepare_streaming=bool(settings.get("prepare_streaming", False)),
+            scratch_dir=settings.get("scratch_dir") or None,
+            transcode_workers=int(settings.get("transcode_workers", 1)),
+            transcode_lookahead=int(settings.get("transcode_lookahead", 2)),
+            use_mmap=bool(settings.get("use_mmap", False)),
+            memory_budget_mb=int(settings.get("memory_budget_mb", 256)),
+            keep_page_cache=bool(settings.get("keep_page_cache", False)),
+            device_aware_reads=bool(settings.get("device_aware_reads", True)),
+            read_block_mb=int(settings.get("read_block_mb", 8)),
+            order_policy=settings.get("order_policy", ORDER_BY_NAME),
+            scan_subfolders=bool(settings.get("scan_subfolders", False)),
+            scan_archives=bool(settings.get("scan_archives", True)),
+            ordered_delivery=bool(settings.get("ordered_delivery", False)),
+            bandwidth_schedule=schedule_from_settings(settings),
+            resume_journal=bool(settings.get("resume_journal", True)),
+            accounts=accounts_from_settings(settings),
+            crypto_workers=int(settings.get("crypto_workers", 0)),
+            worker_processes=int(settings.get("worker_processes", 0))
+        )
@@ -0,0 +1,125 @@
+"""
+Модуль очереди заданий загрузки с отложенными повторами
+"""
+import asyncio
+import os
+import time
+from typing import List, Optional, Set
+
+
+class UploadJob:
+    """Задание на загрузку одного файла"""
+
+    def __init__(self, index: int, path: str):
+        """
+        Инициализация задания
+
+        Args:
+            index: Порядковый номер файла в пакете
+            path: Путь к файлу
+        """
+        self.index = index
+        self.path = path
+        self.filename = os.path.basename(path)
+        self.attempts = 0
+        self.last_error: Optional[BaseException] = None
+        self.start_time: Optional[float] = None
+        # Результаты подготовительных стадий, выполняемых заранее
+        self.thumb_future: Optional[asyncio.Future] = None
+        self.prepare_future: Optional[asyncio.Future] = None
+        self.prepare_slot_held = False
+        # Фактически загружаемый файл (подготовленная копия или сам файл)
+        self.upload_path: Optional[str] = None
+        # Состояние разрезания файла, превышающего лимит размера
+        self.split_plan = None
+        # Метки отправленных частей в плане (номера сдвигаются при делении части)
+        self.parts_sent: Set[str] = set()
+        # Сессия аккаунта пула, через который идет последняя попытка
+        self.account: Optional[str] = None
+
+    def mark_started(self) -> None:
+        """Отмечает начало очередной попытки"""
+        self.attempts += 1
+        self.start_time = time.time()
+
+
+class UploadQueue:
+    """
+    Очередь заданий для пула воркеров
+
+    Задания с временной ошибкой возвращаются в конец очереди после задержки,
+    не блокируя остальных воркеров. Когда все задания завершены (успешно или
+    окончательно с ошибкой), воркеры получают None и завершаются.
+    """
+
+    def __init__(self, jobs: List[UploadJob], workers_count: int):
+        """
+        Инициализация очереди
+
+        Args:
+            jobs: Список заданий
+            workers_count: Количество воркеров, читающих очередь
+        """
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._workers_count = workers_count
+        self._pending = len(jobs)
+        self._timers: List[asyncio.TimerHandle] = []
+        self._closed = False
+
+        for job in jobs:
+            self._queue.put_nowait(job)
+
+        if self._pending == 0:
+            self.close()
+
+    @property
+    def pending(self) -> int:
+        """Количество незавершенных заданий"""
+        return self._pending
+
+    async def get(self) -> Optional[UploadJob]:
+        """
+        Получает следующее задание
+
+        Returns:
+            Задание или None, если работа завершена
+        """
+        return await self._queue.get()
+
+    def task_done(self) -> None:
+        """Отмечает задание как окончательно завершенное"""
+        self._pending -= 1
+        if self._pending <= 0:
+            self.close()
+
+    def requeue(self, job: UploadJob, delay: float) -> None:
+        """
+        Возвращает задание в конец очереди после задержки
+
+        Args:
+            job: Задание для повтора
+            delay: Задержка в секундах
+        """
+        if self._closed:
+            return
+        loop = asyncio.get_event_loop()
+        handle = loop.call_later(delay, self._put_back, job)
+        self._timers.append(handle)
+
+    def close(self) -> None:
+        """Закрывает очередь и будит всех воркеров"""
+        if self._closed:
+            return
+        self._closed = True
+
+        for handle in self._timers:
+            handle.cancel()
+        self._timers.clear()
+
+        for _ in range(self._workers_count):
+            self._queue.put_nowait(None)
+
+    def _put_back(self, job: UploadJob) -> None:
+        """Ставит задание обратно в очередь"""
+        if not self._closed:
+            self._queue.put_nowait(job)
@@ -4,14 +4,43 @@
 import os
 import asyncio
 import time
-from typing import Optional, List
-from PyQt5.QtCore import QThread, pyqtSignal
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Dict, Optional, List, Set
+from PyQt5.QtCore import pyqtSignal
 from pyrogram import Client
+from pyrogram.utils import get_peer_type
+from core.accounts import DEFAULT_SESSION, AccountPool, UploadAccount
+from core.album import AlbumBatcher
+from core.bandwidth import BandwidthLimiter, BandwidthSchedule
+from core.crypto_pool import default_crypto_workers, install_crypto_executor
+from core.journal import UploadJournal
+from core.loop import LoopTask
+from core.media import (send_album, send_uploaded_video, send_video_file,
+                        upload_video_file, upload_video_media)
+from core.memory_budget import create_memory_budget
+from core.metrics import (ACCOUNT_FILES, FILE_SECONDS, FILES_FAILED, FILES_RETRIED,
+                          FILES_SENT, FLOOD_WAIT_SECONDS, QUEUE_DEPTH)
+from core.ordering import order_video_files
+from core.part_uploader import PartUploader
+from core.peer_cache import PeerCache, make_peer_entry, pin_peer
+from core.read_scheduler import ReadScheduler
+from core.retry import FLOOD_WAIT, classify_error
+from core.sequencer import DeliverySequencer
+from core.session_pool import upload_sessions
+from core.tracing import span
+from core.upload_options import UploadOptions
+from core.upload_queue import UploadJob, UploadQueue
+from core.worker_processes import ProcessUploadPool
+from utils.archive import get_file_size, is_archive, is_member_path, list_members
+from utils.splitter import SplitPlan
+from utils.thumbnails import generate_thumbnail
+from utils.transcode import prepare_streamable, remove_prepared_file
 from utils.video_utils import get_video_metadata
 
 
-class VideoUploader(QThread):
-    """Поток для загрузки видео"""
+class VideoUploader(LoopTask):
+    """Задача загрузки видео (в общем цикле событий)"""
     
     progress_updated = pyqtSignal(int)
     status_updated = pyqtSignal(str)
@@ -20,7 +49,8 @@ class VideoUploader(QThread):
     finished = pyqtSignal(bool, str)
     
     def __init__(self, api_id: int, api_hash: str, chat_id: int, video_folder: str, 
-                 delay_seconds: int = 1, max_concurrent: int = 4, prefix_text: str = ""):
+                 delay_seconds: int = 1, max_concurrent: int = 4, prefix_text: str = "",
+                 options: Optional[UploadOptions] = None, session_name: str = DEFAULT_SESSION):
         """
         Инициализация загрузчика видео
         
@@ -32,6 +62,8 @@ class VideoUploader(QThread):
             delay_seconds: Задержка между загрузками
             max_concurrent: Максимальное количество параллельных загрузок
             prefix_text: Префикс для названий файлов
+            options: Дополнительные параметры загрузки
+            session_name: Сессия основного аккаунта (дополнительные - в options.accounts)
         """
         super().__init__()
         self.api_id = api_id
@@ -41,26 +73,66 @@ class VideoUploader(QThread):
         self.delay_seconds = delay_seconds
         self.max_concurrent = max_concurrent
         self.prefix_text = prefix_text
+        self.session_name = session_name
         self.should_stop = False
         self.current_file = ""
         self.start_time: Optional[float] = None
+        self.options = options or UploadOptions()
+        self.retry_policy = self.options.retry_policy
+        self._upload_tasks: Set[asyncio.Task] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[UploadQueue] = None
+        self._accounts: Optional[AccountPool] = None
+        self._clients: List[Client] = []
+        self._worker_pool: Optional[ProcessUploadPool] = None
+        self._preprocess_pool: Optional[ProcessPoolExecutor] = None
+        self._album: Optional[AlbumBatcher] = None
+        self._transcode_pool: Optional[ProcessPoolExecutor] = None
+        self._prepare_slots: Optional[asyncio.Semaphore] = None
+        self._prepare_task: Optional[asyncio.Task] = None
+        self._sequencer: Optional[DeliverySequencer] = None
+        self._delivery_tasks: Set[asyncio.Task] = set()
+        self._max_file_bytes = 2000 * 1024 * 1024
+        self._bandwidth = BandwidthLimiter(self.options.bandwidth_schedule)
+        self._journal = UploadJournal(chat_id) if self.options.resume_journal else None
+        self._part_uploader = PartUploader(
+            max_concurrent=max_concurrent,
+            use_mmap=self.options.use_mmap,
+            retry_policy=self.retry_policy,
+            memory_budget=create_memory_budget(self.options.memory_budget_mb),
+            keep_page_cache=self.options.keep_page_cache,
+            read_scheduler=(
+                ReadScheduler(self.options.read_block_mb * 1024 * 1024)
+                if self.options.device_aware_reads else None
+            ),
+            rate_limiter=self._bandwidth,
+            journal=self._journal
+        )
+        self._total_files = 0
+        self._uploaded_count = 0
+        self._failed_count = 0
+        self._retried_count = 0
     
-    def progress_callback(self, current: int, total: int) -> None:
+    def progress_callback(self, current: int, total: int, job: Optional[UploadJob] = None) -> None:
         """
         Callback для отслеживания прогресса загрузки файла
         
         Args:
             current: Текущее количество переданных байт
             total: Общее количество байт
+            job: Задание, к которому относится прогресс
         """
         if self.should_stop:
-            raise Exception("Upload cancelled by user")
+            # Загрузка уже отменяется через задачи - прогресс не нужен
+            return
             
         percentage = int((current / total) * 100) if total > 0 else 0
+        filename = job.filename if job else self.current_file
+        start_time = job.start_time if job else self.start_time
         
         # Расширенная статистика скорости
-        if self.start_time:
-            elapsed_time = time.time() - self.start_time
+        if start_time:
+            elapsed_time = time.time() - start_time
             if elapsed_time > 0:
                 speed_bps = current / elapsed_time  # байт в секунду
                 
@@ -89,113 +161,143 @@ class VideoUploader(QThread):
             speed_str = "Начинаем..."
         
         # Отправляем сигнал с прогрессом
-        self.file_progress.emit(self.current_file, percentage, speed_str)
+        self.file_progress.emit(filename, percentage, speed_str)
     
     def stop_upload(self) -> None:
-        """Останавливает загрузку видео"""
+        """
+        Останавливает загрузку видео (можно вызывать из потока GUI)
+        
+        Главная задача отменяется, отмена проходит через воркеров, стадию
+        подготовки и загрузку частей; точка продолжения остается в журнале.
+        Задача завершается сама и отправляет finished.
+        """
         self.should_stop = True
         print(f"[UPLOAD] Флаг остановки установлен: should_stop = {self.should_stop}")
+        self.cancel()
+    
+    def set_bandwidth_schedule(self, schedule: BandwidthSchedule) -> None:
+        """
+        Меняет лимит скорости во время загрузки (можно вызывать из потока GUI)
         
-        # Прерываем текущую операцию если возможно
-        if hasattr(self, '_current_upload_task'):
-            self._current_upload_task.cancel()
+        Args:
+            schedule: Новое расписание лимита
+        """
+        self.options.bandwidth_schedule = schedule
+        loop = self._loop
+        if loop and not loop.is_closed() and loop.is_running():
+            loop.call_soon_threadsafe(self._bandwidth.set_schedule, schedule)
+        else:
+            self._bandwidth.set_schedule(schedule)
+        if self._worker_pool:
+            self._worker_pool.set_schedule(schedule)
     
-    def run(self) -> None:
-        """Запуск потока загрузки"""
-        asyncio.set_event_loop(asyncio.new_event_loop())
-        loop = asyncio.get_event_loop()
+    async def run(self) -> None:
+        """Запуск задачи загрузки"""
         try:
-            loop.run_until_complete(self.upload_videos())
+            await self.upload_videos()
         except Exception as e:
             self.finished.emit(False, str(e))
-        finally:
-            loop.close()
+    
+    def _on_finished(self) -> None:
+        """finished(bool, str) отправляет сама загрузка с итогом пакета"""
     
     async def upload_videos(self) -> None:
         """Основная функция загрузки видео"""
-        client = None
+        with span("batch", "upload", folder=self.video_folder):
+            await self._upload_batch()
+    
+    async def _upload_batch(self) -> None:
+        """Загрузка пакета: подключение, очередь заданий, итог"""
+        self._loop = asyncio.get_running_loop()
         try:
-            client = Client(
-                "uploader_session",
-                api_id=self.api_id,
-                api_hash=self.api_hash
-            )
+            # Шифрование частей всех соединений распределяется по потокам
+            connections = self.max_concurrent * (1 + len(self.options.accounts))
+            install_crypto_executor(self.options.crypto_workers or default_crypto_workers(connections))
             
-            await client.connect()
-            
-            # Проверяем авторизацию
-            try:
-                me = await client.get_me()
-                if not me:
-                    raise Exception("Пользователь не авторизован")
-                    
-                # Принудительно устанавливаем информацию о пользователе в клиенте
-                # Это исправляет ошибку 'NoneType' object has no attribute 'is_premium'
-                client.me = me
-                print(f"[UPLOAD] Установлена информация о пользователе в клиенте")
-                
-                # Проверяем премиум статус для больших файлов
-                is_premium = getattr(me, 'is_premium', False)
-                print(f"[UPLOAD] Авторизован как: {me.first_name} (ID: {me.id})")
-                if is_premium:
-                    print(f"[UPLOAD] ✅ Премиум аккаунт - поддержка файлов до 4 ГБ")
-                else:
-                    print(f"[UPLOAD] ⚠️ Обычный аккаунт - лимит файлов 2 ГБ")
-                
-            except Exception as e:
-                raise Exception(f"Ошибка авторизации: {e}")
-            
-            # Обновляем кэш пиров для корректной работы с чатами
-            await self._update_peers_cache(client)
+            # Основной аккаунт обязателен, дополнительные подключаются параллельно
+            primary = UploadAccount(self.session_name)
+            await self._connect_account(primary)
+            extra_accounts = await self._connect_extra_accounts()
+            self._accounts = AccountPool([primary] + extra_accounts)
+            self._part_uploader.accounts = self._accounts
+            self._max_file_bytes = self._accounts.max_file_bytes
+            if extra_accounts:
+                # Буферов частей хватает на воркеров всех аккаунтов
+                self._part_uploader.max_concurrent = self.max_concurrent * len(self._accounts)
+                self.status_updated.emit(
+                    f"👥 Аккаунтов в пуле загрузки: {len(self._accounts)} "
+                    f"({', '.join(account.label for account in self._accounts.accounts)})"
+                )
             
             # Получаем список видео файлов
-            video_files = self._get_video_files()
+            with span("scan_folder", "io"):
+                video_files = self._get_video_files()
             
             if not video_files:
                 raise Exception("В папке нет видео файлов")
             
+            # Продолжение остановленного пакета: отправленное не повторяем
+            batch_files = video_files
+            video_files = self._skip_sent_files(video_files)
+            if not video_files:
+                self._journal.clear_files(batch_files)
+                self.finished.emit(True, "Все файлы пакета уже были отправлены")
+                return
+            
             total_files = len(video_files)
-            uploaded_count = 0
-            failed_count = 0
+            self._total_files = total_files
+            self._uploaded_count = 0
+            self._failed_count = 0
+            self._retried_count = 0
             
             self.status_updated.emit(f"Найдено {total_files} видео файлов")
+            self._check_file_sizes(video_files)
+            
+            if self.options.worker_processes:
+                # Файлы передаются процессами-загрузчиками, у каждого свои соединения
+                with span("start_workers", "upload"):
+                    await self._start_worker_pool()
+            else:
+                # Соединения для частей файлов готовим заранее: клиенты
+                # создаются на пакет, поэтому и соединения открываются заново
+                with span("prewarm_connections", "upload"):
+                    opened = await asyncio.gather(*(
+                        upload_sessions.prewarm(account.client, min(self.max_concurrent, total_files))
+                        for account in self._accounts.accounts
+                    ))
+                print(f"[UPLOAD] Соединения загрузки: открыто {sum(opened)}, "
+                      f"готово в пуле {upload_sessions.idle_count()}")
             
-            # Загружаем файлы
-            for i, video_file in enumerate(video_files):
+            # Загружаем файлы пулом воркеров: временные ошибки уходят в конец очереди.
+            # У каждого аккаунта свой лимит параллельных передач, поэтому воркеров
+            # столько, сколько передач доступно всему пулу
+            workers_count = max(1, min(self.max_concurrent * len(self._accounts), total_files))
+            jobs = [UploadJob(i, path) for i, path in enumerate(video_files)]
+            if self._journal:
+                for job in jobs:
+                    job.parts_sent = self._journal.get_parts_sent(job.path)
+            self._start_preprocessing(jobs)
+            self._album = self._create_album_batcher(jobs)
+            self._queue = UploadQueue(jobs, workers_count)
+            QUEUE_DEPTH.set(self._queue.pending)
+            if self.options.ordered_delivery:
+                # Файлы загружаются параллельно, сообщения отправляются по порядку
+                self._sequencer = DeliverySequencer(len(jobs))
+            
+            workers = [
+                asyncio.create_task(self._upload_worker(self._queue))
+                for _ in range(workers_count)
+            ]
+            await asyncio.gather(*workers)
+            if self._delivery_tasks:
+                # При остановке очередь отправки может уже не продвинуться
                 if self.should_stop:
-                    break
-                
-                try:
-                    self.current_file = os.path.basename(video_file)
-                    self.start_time = time.time()
-                    
-                    self.status_updated.emit(f"Загружаем {i+1}/{total_files}: {self.current_file}")
-                    
-                    # Получаем метаданные видео
-                    metadata = get_video_metadata(video_file)
-                    
-                    # Формируем название файла с префиксом
-                    filename = self.current_file
-                    if self.prefix_text:
-                        filename = f"{self.prefix_text} {filename}"
-                    
-                    # Загружаем видео
-                    await self._upload_single_video(client, video_file, filename, metadata)
-                    
-                    uploaded_count += 1
-                    self.file_uploaded.emit(self.current_file)
-                    
-                    # Обновляем общий прогресс
-                    overall_progress = int((i + 1) / total_files * 100)
-                    self.progress_updated.emit(overall_progress)
-                    
-                    # Задержка между загрузками
-                    if i < total_files - 1 and self.delay_seconds > 0:
-                        await asyncio.sleep(self.delay_seconds)
-                    
-                except Exception as e:
-                    print(f"[UPLOAD] Ошибка загрузки {self.current_file}: {e}")
-                    failed_count += 1
+                    for task in self._delivery_tasks:
+                        task.cancel()
+                await asyncio.gather(*list(self._delivery_tasks), return_exceptions=True)
+            
+            uploaded_count = self._uploaded_count
+            failed_count = self._failed_count
                     
             # Итоговый результат
             if self.should_stop:
@@ -203,39 +305,1072 @@ class VideoUploader(QThread):
                 self.finished.emit(False, message)
             else:
                 message = f"Загрузка завершена. Успешно: {uploaded_count}, Ошибок: {failed_count}"
+                if self._retried_count:
+                    message += f", Повторов: {self._retried_count}"
                 success = failed_count == 0
+                if success and self._journal:
+                    # Пакет завершен полностью - следующий запуск начнется заново
+                    self._journal.clear_files(batch_files)
                 self.finished.emit(success, message)
                 
+        except asyncio.CancelledError:
+            if not self.should_stop:
+                raise
+            print("[UPLOAD] Загрузка отменена, точка продолжения сохранена в журнале")
+            self.finished.emit(False, f"Загрузка остановлена. Загружено: {self._uploaded_count}, "
+                                      f"Ошибок: {self._failed_count}")
         except Exception as e:
             print(f"[UPLOAD] Критическая ошибка: {e}")
             self.finished.emit(False, str(e))
         finally:
-            if client:
+            QUEUE_DEPTH.set(0)
+            for task in list(self._delivery_tasks):
+                task.cancel()
+            if self._delivery_tasks:
+                await asyncio.gather(*list(self._delivery_tasks), return_exceptions=True)
+            if self._journal:
+                self._journal.flush()
+            if self._prepare_task:
+                self._prepare_task.cancel()
+                self._prepare_task = None
+            for pool in (self._preprocess_pool, self._transcode_pool):
+                if pool:
+                    pool.shutdown(wait=False, cancel_futures=True)
+            self._preprocess_pool = None
+            self._transcode_pool = None
+            self._part_uploader.close()
+            budget = self._part_uploader.memory_budget
+            if budget:
+                print(f"[UPLOAD] Пик данных в загрузке: {budget.peak / (1024 * 1024):.1f} МБ "
+                      f"из {budget.limit_bytes / (1024 * 1024):.0f} МБ")
+            if self._worker_pool:
+                await self._worker_pool.stop()
+                self._worker_pool = None
+            for client in self._clients:
+                await upload_sessions.drain(client)
                 await client.disconnect()
+            self._clients.clear()
+    
+    async def _connect_account(self, account: UploadAccount) -> Client:
+        """
+        Подключает аккаунт пула и разрешает для него целевой чат
+        
+        Args:
+            account: Аккаунт пула
+            
+        Returns:
+            Подключенный клиент
+        """
+        client = Client(
+            account.session_name,
+            api_id=self.api_id,
+            api_hash=self.api_hash,
+            max_concurrent_transmissions=self.max_concurrent
+        )
+        
+        with span("connect", "auth", account=account.session_name):
+            await client.connect()
+        self._clients.append(client)
+        
+        # Проверяем авторизацию
+        try:
+            with span("get_me", "auth"):
+                me = await client.get_me()
+            if not me:
+                raise Exception("Пользователь не авторизован")
+        except Exception as e:
+            raise Exception(f"Ошибка авторизации ({account.session_name}): {e}")
+        
+        # Принудительно устанавливаем информацию о пользователе в клиенте
+        # Это исправляет ошибку 'NoneType' object has no attribute 'is_premium'
+        client.me = me
+        account.attach(client, me)
+        print(f"[UPLOAD] Авторизован как: {me.first_name} (ID: {me.id}, сессия {account.session_name})")
+        if account.max_file_bytes > 2000 * 1024 * 1024:
+            print(f"[UPLOAD] ✅ Премиум аккаунт - поддержка файлов до 4 ГБ")
+        else:
+            print(f"[UPLOAD] ⚠️ Обычный аккаунт - лимит файлов 2 ГБ")
+        
+        # Разрешаем целевой чат один раз (из кэша, без сканирования диалогов);
+        # access hash у каждого аккаунта свой
+        with span("resolve_target_peer", "upload", account=account.session_name):
+            account.target_peer = await self._resolve_target_peer(
+                client, me.id, scan_dialogs=account.session_name != self.session_name
+            )
+        return client
+    
+    async def _connect_extra_accounts(self) -> List[UploadAccount]:
+        """
+        Подключает дополнительные аккаунты из настроек
+        
+        Аккаунт без файла сессии, без авторизации или не состоящий в целевом
+        чате пропускается - загрузка продолжается остальными.
+        
+        Returns:
+            Подключенные аккаунты
+        """
+        results = await asyncio.gather(
+            *(self._connect_extra_account(entry) for entry in self.options.accounts)
+        )
+        return [account for account in results if account is not None]
+    
+    async def _connect_extra_account(self, entry: Dict[str, Any]) -> Optional[UploadAccount]:
+        """
+        Подключает один дополнительный аккаунт
+        
+        Args:
+            entry: Описание аккаунта ({"session": ..., "limit_mb": ...})
+            
+        Returns:
+            Аккаунт или None, если он недоступен
+        """
+        account = UploadAccount(entry['session'], entry.get('limit_mb', 0))
+        if not os.path.exists(f"{account.session_name}.session"):
+            self.status_updated.emit(f"⚠️ Аккаунт {account.session_name} пропущен: нет файла сессии")
+            return None
+        
+        try:
+            client = await self._connect_account(account)
+        except Exception as e:
+            self.status_updated.emit(f"⚠️ Аккаунт {account.session_name} пропущен: {e}")
+            return None
+        
+        if account.target_peer is None:
+            # Без доступа к целевому чату аккаунт не сможет отправить файл
+            self.status_updated.emit(f"⚠️ Аккаунт {account.label} пропущен: нет доступа к чату {self.chat_id}")
+            self._clients.remove(client)
+            await upload_sessions.drain(client)
+            await client.disconnect()
+            return None
+        return account
+    
+    async def _acquire_account(self, job: UploadJob) -> UploadAccount:
+        """
+        Выбирает аккаунт пула для попытки загрузки файла
+        
+        Файлы альбома загружаются основным аккаунтом: медиа разных аккаунтов
+        нельзя отправить одной группой.
+        
+        Args:
+            job: Задание на загрузку
+            
+        Returns:
+            Аккаунт (возвращается в пул через release)
+        """
+        try:
+            size = get_file_size(job.path)
+        except OSError:
+            size = 0
+        pinned = self._accounts.primary if self._album and self._album.contains(job) else None
+        with span("wait_account", "upload", file=job.filename):
+            account = await self._accounts.acquire(size, pinned)
+        job.account = account.session_name
+        return account
+    
+    def _report_flood(self, client: Client, delay: float) -> bool:
+        """
+        Отмечает FloodWait у аккаунта клиента
+        
+        Args:
+            client: Клиент, получивший FloodWait
+            delay: Время ожидания, сек
+            
+        Returns:
+            True, если в пуле есть аккаунт без ограничения
+        """
+        account = self._accounts.for_client(client) if self._accounts else None
+        if account is None:
+            return False
+        return self._accounts.report_flood(account, delay)
+    
+    async def _peer_for(self, client: Client):
+        """
+        Целевой чат в терминах аккаунта клиента
+        
+        Args:
+            client: Клиент Telegram
+            
+        Returns:
+            InputPeer целевого чата
+        """
+        account = self._accounts.for_client(client) if self._accounts else None
+        if account is not None and account.target_peer is not None:
+            return account.target_peer
+        return await client.resolve_peer(self.chat_id)
+    
+    def _start_preprocessing(self, jobs: List[UploadJob]) -> None:
+        """
+        Запускает подготовку файлов (превью) в пуле процессов заранее,
+        чтобы к началу загрузки файла результат был уже готов
+        
+        Args:
+            jobs: Задания на загрузку в порядке очереди
+        """
+        loop = asyncio.get_event_loop()
+        
+        if self.options.prepare_streaming:
+            # Перепаковка идет впереди загрузки, но не дальше чем на lookahead
+            # файлов, чтобы временные файлы не заполнили диск
+            self._transcode_pool = ProcessPoolExecutor(max_workers=self.options.transcode_workers)
+            self._prepare_slots = asyncio.Semaphore(
+                self.options.transcode_workers + self.options.transcode_lookahead
+            )
+            for job in jobs:
+                job.prepare_future = loop.create_future()
+            self._prepare_task = asyncio.create_task(self._run_prepare_stage(jobs))
+        
+        if not self.options.generate_thumbnails:
+            return
+        
+        self._preprocess_pool = ProcessPoolExecutor(max_workers=self.options.preprocess_workers)
+        for job in jobs:
+            job.thumb_future = loop.run_in_executor(
+                self._preprocess_pool, generate_thumbnail, job.path, self.options.thumbnails_dir
+            )
+    
+    async def _run_prepare_stage(self, jobs: List[UploadJob]) -> None:
+        """
+        Стадия перепаковки: запускает подготовку файлов по порядку очереди,
+        параллельно с загрузкой уже подготовленных файлов
+        
+        Args:
+            jobs: Задания на загрузку в порядке очереди
+        """
+        tasks = []
+        try:
+            for job in jobs:
+                await self._prepare_slots.acquire()
+                job.prepare_slot_held = True
+                if self.should_stop:
+                    break
+                tasks.append(asyncio.create_task(self._prepare_job(job)))
+            await asyncio.gather(*tasks)
+        except asyncio.CancelledError:
+            for task in tasks:
+                task.cancel()
+            raise
+        finally:
+            # Неподготовленные файлы отправляются как есть (или пропускаются при остановке)
+            for job in jobs:
+                if not job.prepare_future.done():
+                    job.prepare_future.set_result(None)
+    
+    async def _prepare_job(self, job: UploadJob) -> None:
+        """
+        Готовит один файл к потоковому воспроизведению в пуле процессов
+        
+        Args:
+            job: Задание на загрузку
+        """
+        loop = asyncio.get_event_loop()
+        try:
+            prepared_path = await loop.run_in_executor(
+                self._transcode_pool, prepare_streamable, job.path, self.options.scratch_dir
+            )
+        except Exception as e:
+            print(f"[UPLOAD] Ошибка подготовки {job.filename}: {e}")
+            prepared_path = None
+        
+        if not prepared_path:
+            # Временный файл не создан - место в очереди подготовки не нужно
+            self._release_prepare_slot(job)
+        
+        if not job.prepare_future.done():
+            job.prepare_future.set_result(prepared_path)
+    
+    def _release_prepare_slot(self, job: UploadJob) -> None:
+        """Освобождает место в стадии подготовки, занятое файлом"""
+        if job.prepare_slot_held:
+            job.prepare_slot_held = False
+            self._prepare_slots.release()
+    
+    def _release_uploaded_prepare_slot(self, job: UploadJob) -> None:
+        """
+        Освобождает место в стадии подготовки после загрузки байтов файла
+        
+        В режиме порядка файл может долго ждать очереди на отправку. Если
+        бы он держал место, все места заняли бы файлы, ждущие более ранний
+        файл на повторе, подготовка остановилась бы, и воркеры ждали бы
+        неподготовленные файлы. Временный файл удаляется при завершении.
+        
+        Args:
+            job: Задание на загрузку
+        """
+        if job.prepare_future is not None:
+            self._release_prepare_slot(job)
+    
+    async def _get_upload_path(self, job: UploadJob) -> str:
+        """
+        Ожидает подготовленный файл
+        
+        Args:
+            job: Задание на загрузку
+            
+        Returns:
+            Путь к файлу, который нужно загрузить
+        """
+        if job.prepare_future is None:
+            return job.path
+        prepared_path = await job.prepare_future
+        return prepared_path or job.path
+    
+    def _cleanup_job(self, job: UploadJob) -> None:
+        """
+        Удаляет временные файлы задания после окончательного завершения
+        
+        Args:
+            job: Задание на загрузку
+        """
+        if job.prepare_future is not None:
+            self._release_prepare_slot(job)
+            if job.prepare_future.done() and not job.prepare_future.cancelled():
+                remove_prepared_file(job.prepare_future.result())
+    
+    async def _get_thumbnail(self, job: UploadJob) -> Optional[str]:
+        """
+        Ожидает превью для файла
+        
+        Args:
+            job: Задание на загрузку
+            
+        Returns:
+            Путь к превью или None
+        """
+        if job.thumb_future is None:
+            return None
+        try:
+            return await job.thumb_future
+        except Exception as e:
+            print(f"[UPLOAD] Превью для {job.filename} недоступно: {e}")
+            return None
+    
+    async def _upload_worker(self, queue: UploadQueue) -> None:
+        """
+        Воркер, забирающий задания из общей очереди
+        
+        Для каждой попытки берется аккаунт пула: свободный от FloodWait
+        и с наименьшим числом загрузок в работе.
+        
+        Args:
+            queue: Очередь заданий
+        """
+        while True:
+            job = await queue.get()
+            if job is None or self.should_stop:
+                queue.close()
+                break
+            
+            account = await self._acquire_account(job)
+            try:
+                await self._upload_job(account.client, job)
+            except asyncio.CancelledError:
+                if not self.should_stop:
+                    raise
+                queue.close()
+                break
+            except Exception as e:
+                await self._handle_job_error(account.client, queue, job, e)
+                continue
+            finally:
+                self._accounts.release(account)
+            
+            # Задержка между загрузками
+            if queue.pending > 0 and self.delay_seconds > 0:
+                with span("delay", "upload", seconds=self.delay_seconds):
+                    await asyncio.sleep(self.delay_seconds)
+    
+    async def _upload_job(self, client: Client, job: UploadJob) -> None:
+        """
+        Выполняет одну попытку загрузки файла
+        
+        Args:
+            client: Клиент Telegram
+            job: Задание на загрузку
+        """
+        with span("file", "upload", file=job.filename, attempt=job.attempts + 1, account=job.account):
+            await self._run_job(client, job)
+    
+    async def _run_job(self, client: Client, job: UploadJob) -> None:
+        """Этапы одной попытки: подготовка, метаданные, загрузка и отправка"""
+        job.mark_started()
+        self.current_file = job.filename
+        self.start_time = job.start_time
+        
+        attempt_info = f" (попытка {job.attempts})" if job.attempts > 1 else ""
+        self.status_updated.emit(
+            f"Загружаем {job.index + 1}/{self._total_files}: {job.filename}{attempt_info}"
+        )
+        
+        # Ждем стадию перепаковки (если включена)
+        with span("wait_prepare", "upload"):
+            upload_path = await self._get_upload_path(job)
+        if self.should_stop:
+            raise asyncio.CancelledError()
+        job.upload_path = upload_path
+        
+        # Получаем метаданные видео (без блокировки цикла событий) и превью
+        loop = asyncio.get_event_loop()
+        with span("wait_metadata", "upload"):
+            metadata = await loop.run_in_executor(None, get_video_metadata, upload_path)
+        with span("wait_thumbnail", "upload"):
+            metadata['thumb'] = await self._get_thumbnail(job)
+        
+        # Формируем название файла с префиксом
+        filename = self._build_caption(job)
+        
+        if self._album and self._album.contains(job):
+            # Режим альбома: загружаем файл сейчас, отправляем группой позже
+            await self._prepare_album_item(client, job, upload_path, filename, metadata)
+            return
+        
+        # Файл больше лимита аккаунта отправляем частями
+        if get_file_size(upload_path) > self._max_file_bytes:
+            if is_member_path(upload_path):
+                raise ValueError(f"{job.filename} больше лимита: разрезание файла из архива "
+                                 f"требует распаковки")
+            if self._sequencer:
+                # Части загружаются сейчас, сообщения отправятся в порядке очереди
+                await self._upload_ordered_split_video(client, job, upload_path, filename, metadata)
+                return
+            await self._upload_split_video(client, job, upload_path, filename, metadata)
+            self._complete_job(job)
+            return
+        
+        if self._sequencer:
+            # Загружаем сейчас, сообщение отправится в порядке очереди
+            await self._upload_ordered_video(client, job, upload_path, filename, metadata)
+            return
+        
+        # Загружаем видео
+        if self._worker_pool:
+            await self._upload_in_worker(client, job, upload_path, filename, metadata)
+        else:
+            await self._upload_single_video(client, upload_path, filename, metadata, job)
+        self._complete_job(job)
+    
+    def _check_file_sizes(self, video_files: List[str]) -> None:
+        """
+        Предварительная проверка размеров: сообщает о файлах больше лимита
+        до начала загрузки, а не после передачи гигабайт
+        
+        Args:
+            video_files: Список путей к видео файлам
+        """
+        limit_mb = self._max_file_bytes // (1024 * 1024)
+        for path in video_files:
+            try:
+                size = get_file_size(path)
+            except OSError:
+                continue
+            if size > self._max_file_bytes and is_member_path(path):
+                self.status_updated.emit(
+                    f"⚠️ {os.path.basename(path)} ({size / (1024 * 1024):.0f} МБ) в архиве больше лимита "
+                    f"{limit_mb} МБ - для разрезания его нужно распаковать"
+                )
+            elif size > self._max_file_bytes:
+                parts = -(-size // int(self._max_file_bytes * 0.9))
+                self.status_updated.emit(
+                    f"✂️ {os.path.basename(path)} ({size / (1024 * 1024):.0f} МБ) больше лимита "
+                    f"{limit_mb} МБ - будет разрезан примерно на {parts} части"
+                )
+    
+    async def _upload_split_video(self, client: Client, job: UploadJob, upload_path: str,
+                                  caption: str, metadata: dict) -> None:
+        """
+        Разрезает файл больше лимита на части по ключевым кадрам и отправляет их
+        
+        Части создаются по одной: часть N загружается, пока режется часть N+1.
+        Уже отправленные части запоминаются в задании и при повторе пропускаются.
+        
+        Args:
+            client: Клиент Telegram
+            job: Задание на загрузку
+            upload_path: Путь к файлу
+            caption: Подпись к видео
+            metadata: Метаданные исходного видео
+        """
+        parts = self._cut_split_parts(job, upload_path)
+        try:
+            async for index, part_path in parts:
+                part_caption = f"{caption} ({job.split_plan.part_label(index)})"
+                try:
+                    part_metadata = await self._get_part_metadata(part_path, metadata)
+                    await self._upload_single_video(client, part_path, part_caption, part_metadata, job)
+                finally:
+                    os.remove(part_path)
+                self._mark_split_part_sent(job, index)
+        finally:
+            await parts.aclose()
+    
+    async def _upload_ordered_split_video(self, client: Client, job: UploadJob, upload_path: str,
+                                          caption: str, metadata: dict) -> None:
+        """
+        Загружает части файла больше лимита и ставит их отправку в очередь
+        
+        Как и для обычного файла в режиме порядка, воркер не ждет очереди
+        отправки: иначе при повторе более раннего файла все воркеры могли бы
+        ждать очереди на следующих файлах, и ранний файл некому было бы взять.
+        Нарезанные части хранятся до отправки (для дозагрузки потерянных частей).
+        
+        Args:
+            client: Клиент Telegram
+            job: Задание на загрузку
+            upload_path: Путь к файлу
+            caption: Подпись к видео
+            metadata: Метаданные исходного видео
+        """
+        uploaded = []
+        parts = self._cut_split_parts(job, upload_path)
+        try:
+            async for index, part_path in parts:
+                uploaded.append((index, part_path, None, None))
+                part_metadata = await self._get_part_metadata(part_path, metadata)
+                upload_task = asyncio.create_task(
+                    upload_video_file(
+                        client, part_path, part_metadata,
+                        thumb=part_metadata.get('thumb'),
+                        progress=self.progress_callback,
+                        progress_args=(job,),
+                        part_uploader=self._part_uploader
+                    )
+                )
+                self._upload_tasks.add(upload_task)
+                try:
+                    media = await upload_task
+                finally:
+                    self._upload_tasks.discard(upload_task)
+                part_caption = f"{caption} ({job.split_plan.part_label(index)})"
+                uploaded[-1] = (index, part_path, media, part_caption)
+        except BaseException:
+            _remove_split_parts(uploaded)
+            raise
+        finally:
+            await parts.aclose()
+        
+        print(f"[UPLOAD] Части файла загружены, ждут очереди на отправку: {job.filename}")
+        self._release_uploaded_prepare_slot(job)
+        self._schedule_delivery(job.index, lambda: self._send_split_parts(client, job, uploaded))
+    
+    async def _send_split_parts(self, client: Client, job: UploadJob, uploaded: list) -> None:
+        """
+        Отправляет загруженные части по порядку и удаляет нарезанные файлы
+        
+        Args:
+            client: Клиент Telegram
+            job: Задание на загрузку
+            uploaded: Части (номер, путь, результат upload_video_file, подпись)
+        """
+        try:
+            for index, part_path, media, part_caption in uploaded:
+                if not await self._send_with_retry(client, job, part_path, media, part_caption):
+                    return
+                self._mark_split_part_sent(job, index)
+            print(f"[UPLOAD] Успешно отправлен: {job.filename}")
+            self._complete_job(job)
+        finally:
+            _remove_split_parts(uploaded)
+    
+    async def _cut_split_parts(self, job: UploadJob, upload_path: str):
+        """
+        Режет неотправленные части файла по одной (следующая режется, пока
+        вызывающий загружает текущую)
+        
+        Args:
+            job: Задание на загрузку (план разрезания сохраняется в нем)
+            upload_path: Путь к файлу
+            
+        Yields:
+            Кортежи (номер части в плане, путь к нарезанной части)
+        """
+        loop = asyncio.get_event_loop()
+        if job.split_plan is None:
+            self.status_updated.emit(f"✂️ Планируем разрезание: {job.filename}")
+            saved = self._journal.get_split_plan(job.path) if self._journal else None
+            job.split_plan = await loop.run_in_executor(
+                None, SplitPlan, upload_path, self._max_file_bytes, saved
+            )
+            if not job.split_plan.restored:
+                # Отметки частей относятся к прежнему плану
+                job.parts_sent = set()
+            self._save_split_plan(job)
+        plan = job.split_plan
+        output_dir = os.path.join(self.options.scratch_dir, "split", str(job.index))
+        
+        def start_cut(index: int) -> asyncio.Future:
+            return asyncio.ensure_future(loop.run_in_executor(None, plan.cut_part, index, output_dir))
+        
+        def next_unsent(index: int) -> Optional[int]:
+            while index < plan.parts_count and plan.labels[index] in job.parts_sent:
+                index += 1
+            return index if index < plan.parts_count else None
+        
+        index = next_unsent(0)
+        pending_cut = start_cut(index) if index is not None else None
+        try:
+            while index is not None:
+                part_path, fits = await pending_cut
+                pending_cut = None
+                
+                if not fits:
+                    # Скачок битрейта: часть уперлась в лимит - делим ее пополам
+                    os.remove(part_path)
+                    if not plan.subdivide(index):
+                        raise ValueError(f"Не удалось уложить часть {plan.part_label(index)} в лимит размера")
+                    self._save_split_plan(job)
+                    pending_cut = start_cut(index)
+                    continue
+                
+                # Режем следующую часть, пока загружается текущая
+                following = next_unsent(index + 1)
+                if following is not None:
+                    pending_cut = start_cut(following)
+                
+                yield index, part_path
+                index = following
+        finally:
+            if pending_cut is not None:
+                pending_cut.add_done_callback(_remove_cut_part)
+    
+    async def _get_part_metadata(self, part_path: str, metadata: dict) -> dict:
+        """Метаданные нарезанной части с превью исходного видео"""
+        loop = asyncio.get_event_loop()
+        part_metadata = await loop.run_in_executor(None, get_video_metadata, part_path)
+        part_metadata['thumb'] = metadata.get('thumb')
+        return part_metadata
+    
+    def _mark_split_part_sent(self, job: UploadJob, index: int) -> None:
+        """Запоминает отправленную часть разрезанного видео (по метке в плане)"""
+        label = job.split_plan.labels[index]
+        job.parts_sent.add(label)
+        if self._journal:
+            self._journal.mark_part_sent(job.path, label)
+    
+    def _save_split_plan(self, job: UploadJob) -> None:
+        """Сохраняет план разрезания в журнал (при продолжении части не сдвинутся)"""
+        if self._journal:
+            self._journal.save_split_plan(job.path, job.split_plan.to_dict(), job.parts_sent)
+    
+    def _build_caption(self, job: UploadJob) -> str:
+        """
+        Формирует подпись к видео с префиксом
+        
+        Args:
+            job: Задание на загрузку
+            
+        Returns:
+            Текст подписи
+        """
+        if self.prefix_text:
+            return f"{self.prefix_text} {job.filename}"
+        return job.filename
+    
+    def _complete_job(self, job: UploadJob) -> None:
+        """
+        Отмечает файл как успешно отправленный
+        
+        Args:
+            job: Задание на загрузку
+        """
+        if self._journal:
+            self._journal.mark_sent(job.path, job.upload_path)
+        self._cleanup_job(job)
+        self._uploaded_count += 1
+        FILES_SENT.inc()
+        if job.account:
+            ACCOUNT_FILES.inc(account=job.account)
+        if job.start_time:
+            FILE_SECONDS.observe(time.time() - job.start_time)
+        self.file_uploaded.emit(job.filename)
+        self._emit_overall_progress()
+        if self._sequencer:
+            self._sequencer.finish(job.index)
+        self._queue.task_done()
+        QUEUE_DEPTH.set(self._queue.pending)
+    
+    def _fail_job(self, job: UploadJob, error: BaseException) -> None:
+        """
+        Отмечает файл как окончательно неудавшийся
+        
+        Args:
+            job: Задание на загрузку
+            error: Последняя ошибка
+        """
+        self._cleanup_job(job)
+        self._failed_count += 1
+        FILES_FAILED.inc()
+        self.status_updated.emit(f"❌ {job.filename}: {error}")
+        self._emit_overall_progress()
+        if self._sequencer:
+            self._sequencer.finish(job.index)
+        self._queue.task_done()
+        QUEUE_DEPTH.set(self._queue.pending)
+    
+    def _skip_sent_files(self, video_files: List[str]) -> List[str]:
+        """
+        Исключает файлы, отправленные до остановки пакета
+        
+        Args:
+            video_files: Файлы пакета в порядке загрузки
+            
+        Returns:
+            Файлы, которые еще нужно отправить
+        """
+        if not self._journal:
+            return video_files
+        remaining = [path for path in video_files if not self._journal.is_sent(path)]
+        skipped = len(video_files) - len(remaining)
+        if skipped:
+            self.status_updated.emit(
+                f"⏭️ Продолжаем остановленную загрузку: пропущено {skipped} уже отправленных файлов"
+            )
+        return remaining
+    
+    def _create_album_batcher(self, jobs: List[UploadJob]) -> Optional[AlbumBatcher]:
+        """
+        Определяет файлы, отправляемые альбомами
+        
+        Args:
+            jobs: Все задания пакета
+            
+        Returns:
+            Группировщик альбомов или None, если режим выключен
+        """
+        if not self.options.album_mode:
+            return None
+        
+        max_size = self.options.album_max_file_mb * 1024 * 1024
+        album_jobs = []
+        for job in jobs:
+            try:
+                if get_file_size(job.path) <= max_size:
+                    album_jobs.append(job)
+            except OSError:
+                pass
+        
+        if len(album_jobs) < 2:
+            return None
+        
+        print(f"[UPLOAD] Режим альбомов: {len(album_jobs)} файлов, "
+              f"группами по {self.options.album_size}")
+        return AlbumBatcher(album_jobs, self.options.album_size)
+    
+    async def _prepare_album_item(self, client: Client, job: UploadJob, upload_path: str,
+                                  caption: str, metadata: dict) -> None:
+        """
+        Загружает файл для альбома и отправляет альбом, если группа собрана
+        
+        Args:
+            client: Клиент Telegram
+            job: Задание на загрузку
+            upload_path: Путь к загружаемому файлу
+            caption: Подпись к видео
+            metadata: Метаданные видео
+        """
+        peer = await self._peer_for(client)
+        
+        upload_task = asyncio.create_task(
+            upload_video_media(
+                client, peer, upload_path, metadata,
+                thumb=metadata.get('thumb'),
+                progress=self.progress_callback,
+                progress_args=(job,),
+                part_uploader=self._part_uploader
+            )
+        )
+        self._upload_tasks.add(upload_task)
+        try:
+            media = await upload_task
+        finally:
+            self._upload_tasks.discard(upload_task)
+        
+        print(f"[UPLOAD] Файл загружен для альбома: {job.filename}")
+        items = self._album.add(job, media, caption)
+        if items:
+            await self._deliver_album(client, items)
+    
+    async def _deliver_album(self, client: Client, items: list) -> None:
+        """
+        Отправляет альбом сразу или, в режиме порядка, когда подойдет очередь
+        
+        Альбом занимает место первого файла группы.
+        
+        Args:
+            client: Клиент Telegram
+            items: Элементы альбома (задание, медиа, подпись)
+        """
+        if not self._sequencer:
+            await self._send_album(client, items)
+            return
+        
+        position = min(job.index for job, _, _ in items)
+        self._schedule_delivery(position, lambda: self._send_album(client, items))
+    
+    async def _upload_ordered_video(self, client: Client, job: UploadJob, upload_path: str,
+                                    caption: str, metadata: dict) -> None:
+        """
+        Загружает байты видео и ставит отправку сообщения в очередь
+        
+        Воркер сразу освобождается для следующего файла; сообщение будет
+        отправлено, когда отправлены все файлы с меньшими номерами.
+        
+        Args:
+            client: Клиент Telegram
+            job: Задание на загрузку
+            upload_path: Путь к загружаемому файлу
+            caption: Подпись к видео
+            metadata: Метаданные видео
+        """
+        upload_task = asyncio.create_task(
+            upload_video_file(
+                client, upload_path, metadata,
+                thumb=metadata.get('thumb'),
+                progress=self.progress_callback,
+                progress_args=(job,),
+                part_uploader=self._part_uploader
+            )
+        )
+        self._upload_tasks.add(upload_task)
+        try:
+            media = await upload_task
+        finally:
+            self._upload_tasks.discard(upload_task)
+        
+        print(f"[UPLOAD] Файл загружен, ждет очереди на отправку: {job.filename}")
+        self._release_uploaded_prepare_slot(job)
+        self._schedule_delivery(
+            job.index, lambda: self._send_ordered_video(client, job, upload_path, media, caption)
+        )
+    
+    async def _send_ordered_video(self, client: Client, job: UploadJob, upload_path: str,
+                                  media, caption: str) -> None:
+        """
+        Отправляет загруженное видео с повторами при временных ошибках
+        
+        Args:
+            client: Клиент Telegram
+            job: Задание на загрузку
+            upload_path: Путь к загруженному файлу
+            media: Результат upload_video_file
+            caption: Подпись к видео
+        """
+        if await self._send_with_retry(client, job, upload_path, media, caption):
+            print(f"[UPLOAD] Успешно отправлен: {job.filename}")
+            self._complete_job(job)
+    
+    async def _send_with_retry(self, client: Client, job: UploadJob, upload_path: str,
+                               media, caption: str) -> bool:
+        """
+        Отправляет сообщение с загруженным видео, повторяя временные ошибки
+        
+        Args:
+            client: Клиент Telegram
+            job: Задание на загрузку
+            upload_path: Путь к загруженному файлу
+            media: Результат upload_video_file
+            caption: Подпись к видео
+            
+        Returns:
+            True если отправлено; при окончательной ошибке задание отмечается
+            как неудавшееся и возвращается False
+        """
+        peer = await self._peer_for(client)
+        attempt = 0
+        
+        while True:
+            attempt += 1
+            try:
+                await send_uploaded_video(client, peer, upload_path, media, caption, self._part_uploader)
+                return True
+            except Exception as e:
+                kind = classify_error(e)
+                print(f"[UPLOAD] Ошибка отправки {job.filename} ({kind}, попытка {attempt}): {e}")
+                if self.should_stop or not self.retry_policy.should_retry(kind, attempt):
+                    self._fail_job(job, e)
+                    return False
+                delay = self.retry_policy.get_delay(kind, attempt, e)
+                self._count_retry(kind, delay)
+                if kind == FLOOD_WAIT:
+                    # Загруженный файл отправляет только его аккаунт - он ждет,
+                    # а новые файлы пока идут через остальные
+                    self._report_flood(client, delay)
+                self.status_updated.emit(f"⚠️ {job.filename}: {e}. Повтор отправки через {delay:.0f} сек")
+                await asyncio.sleep(delay)
+    
+    def _schedule_delivery(self, position: int, send) -> None:
+        """
+        Запускает отправку, ожидающую своей очереди
+        
+        Args:
+            position: Порядковый номер в очереди отправки
+            send: Функция, возвращающая корутину отправки
+        """
+        async def deliver():
+            await self._sequencer.wait_turn(position)
+            if not self.should_stop:
+                await send()
+        
+        task = asyncio.create_task(deliver())
+        self._delivery_tasks.add(task)
+        task.add_done_callback(self._delivery_tasks.discard)
+    
+    async def _send_album(self, client: Client, items: list) -> None:
+        """
+        Отправляет собранный альбом с повторами при временных ошибках
+        
+        Args:
+            client: Клиент Telegram
+            items: Элементы альбома (задание, медиа, подпись)
+        """
+        peer = await self._peer_for(client)
+        attempt = 0
+        
+        while True:
+            attempt += 1
+            try:
+                await send_album(client, peer, [(media, caption) for _, media, caption in items])
+                break
+            except Exception as e:
+                kind = classify_error(e)
+                print(f"[UPLOAD] Ошибка отправки альбома ({kind}, попытка {attempt}): {e}")
+                if self.should_stop or not self.retry_policy.should_retry(kind, attempt):
+                    for job, _, _ in items:
+                        self._fail_job(job, e)
+                    return
+                delay = self.retry_policy.get_delay(kind, attempt, e)
+                self._count_retry(kind, delay)
+                if kind == FLOOD_WAIT:
+                    self._report_flood(client, delay)
+                self.status_updated.emit(f"⚠️ Альбом: {e}. Повтор через {delay:.0f} сек")
+                await asyncio.sleep(delay)
+        
+        print(f"[UPLOAD] Отправлен альбом из {len(items)} видео")
+        for job, _, _ in items:
+            self._complete_job(job)
+    
+    async def _handle_job_error(self, client: Client, queue: UploadQueue,
+                                job: UploadJob, error: Exception) -> None:
+        """
+        Обрабатывает ошибку загрузки: повтор или окончательный отказ
+        
+        Args:
+            client: Клиент Telegram
+            queue: Очередь заданий
+            job: Задание, завершившееся ошибкой
+            error: Исключение
+        """
+        job.last_error = error
+        kind = classify_error(error)
+        print(f"[UPLOAD] Ошибка загрузки {job.filename} ({kind}, попытка {job.attempts}): {error}")
+        
+        if not self.should_stop and self.retry_policy.should_retry(kind, job.attempts):
+            delay = self.retry_policy.get_delay(kind, job.attempts, error)
+            self._count_retry(kind, delay)
+            # Подготовленный файл сохраняется для повтора, но место в стадии
+            # подготовки освобождается, чтобы не задерживать следующие файлы
+            if job.prepare_future is not None:
+                self._release_prepare_slot(job)
+            if kind == FLOOD_WAIT and self._report_flood(client, delay):
+                # Ждет только ограниченный аккаунт - файл сразу берет другой
+                self.status_updated.emit(
+                    f"🔀 {job.filename}: FloodWait {delay:.0f} сек, передаем другому аккаунту"
+                )
+                delay = 0
+            else:
+                self.status_updated.emit(
+                    f"⚠️ {job.filename}: {error}. Повтор через {delay:.0f} сек"
+                )
+            queue.requeue(job, delay)
+            return
+        
+        # Постоянная ошибка или исчерпаны попытки - сообщаем сразу
+        self._fail_job(job, error)
+        
+        # Альбом мог ждать только этот файл
+        if self._album and self._album.contains(job):
+            items = self._album.discard(job)
+            if items:
+                await self._deliver_album(client, items)
+    
+    def _count_retry(self, kind: str, delay: float) -> None:
+        """
+        Учитывает повтор в статистике пакета и метриках
+        
+        Args:
+            kind: Категория ошибки
+            delay: Задержка перед повтором, сек
+        """
+        self._retried_count += 1
+        FILES_RETRIED.inc()
+        if kind == FLOOD_WAIT:
+            FLOOD_WAIT_SECONDS.inc(delay)
+    
+    def _emit_overall_progress(self) -> None:
+        """Обновляет общий прогресс по завершенным файлам"""
+        done = self._uploaded_count + self._failed_count
+        overall_progress = int(done / self._total_files * 100) if self._total_files else 0
+        self.progress_updated.emit(overall_progress)
     
     def _get_video_files(self) -> List[str]:
         """
         Получает список видео файлов из папки
         
+        Видео внутри архивов (zip, tar) добавляются без распаковки - путями,
+        в которых архив выступает как папка (см. utils.archive). Вместо
+        папки можно указать сам архив.
+        
         Returns:
-            Список путей к видео файлам
+            Список путей к видео файлам в порядке загрузки
         """
         video_extensions = {'.mp4', '.avi', '.mkv', '.mov', '.wmv', '.flv', '.webm', '.m4v'}
         video_files = []
         
+        def add_file(file_path: str) -> None:
+            if os.path.splitext(file_path)[1].lower() in video_extensions:
+                video_files.append(file_path)
+            elif self.options.scan_archives and is_archive(file_path):
+                video_files.extend(self._get_archive_videos(file_path, video_extensions))
+        
         try:
-            for file in os.listdir(self.video_folder):
-                file_path = os.path.join(self.video_folder, file)
-                if (os.path.isfile(file_path) and 
-                    os.path.splitext(file)[1].lower() in video_extensions):
-                    video_files.append(file_path)
+            if os.path.isfile(self.video_folder):
+                add_file(self.video_folder)
+            elif self.options.scan_subfolders:
+                for root, dirs, files in os.walk(self.video_folder):
+                    dirs.sort()
+                    for file in files:
+                        add_file(os.path.join(root, file))
+            else:
+                for file in os.listdir(self.video_folder):
+                    file_path = os.path.join(self.video_folder, file)
+                    if os.path.isfile(file_path):
+                        add_file(file_path)
         except Exception as e:
             print(f"[UPLOAD] Ошибка чтения папки: {e}")
             
-        return sorted(video_files)
+        return order_video_files(video_files, self.options.order_policy)
+    
+    def _get_archive_videos(self, archive: str, video_extensions: set) -> List[str]:
+        """
+        Находит видео внутри архива по его оглавлению
+        
+        Args:
+            archive: Путь к архиву
+            video_extensions: Расширения видео файлов
+            
+        Returns:
+            Пути к видео в архиве (пустой список, если архив не читается)
+        """
+        try:
+            members = list_members(archive, video_extensions)
+        except Exception as e:
+            print(f"[UPLOAD] Не удалось прочитать архив {os.path.basename(archive)}: {e}")
+            return []
+        if members:
+            print(f"[UPLOAD] Архив {os.path.basename(archive)}: {len(members)} видео")
+        return members
     
     async def _upload_single_video(self, client: Client, video_path: str, 
-                                  filename: str, metadata: dict) -> None:
+                                  filename: str, metadata: dict,
+                                  job: Optional[UploadJob] = None) -> None:
         """
         Загружает один видео файл
         
@@ -244,29 +1379,29 @@ class VideoUploader(QThread):
             video_path: Путь к видео файлу
             filename: Имя файла для отправки
             metadata: Метаданные видео
+            job: Задание, к которому относится загрузка
         """
         try:
-            # Определяем параметры видео
-            duration = metadata.get('duration')
-            width = metadata.get('width')
-            height = metadata.get('height')
-            
-            # Создаем задачу загрузки
-            self._current_upload_task = asyncio.create_task(
-                client.send_video(
-                    chat_id=self.chat_id,
-                    video=video_path,
-                    caption=filename,
-                    duration=duration,
-                    width=width,
-                    height=height,
+            peer = await self._peer_for(client)
+            
+            # Создаем задачу загрузки: части читаются в общий пул буферов,
+            # потерянные сервером части дозагружаются по одной
+            upload_task = asyncio.create_task(
+                send_video_file(
+                    client, peer, video_path, filename, metadata,
+                    thumb=metadata.get('thumb'),
                     progress=self.progress_callback,
-                    supports_streaming=True
+                    progress_args=(job,),
+                    part_uploader=self._part_uploader
                 )
             )
+            self._upload_tasks.add(upload_task)
             
             # Ждем завершения загрузки
-            await self._current_upload_task
+            try:
+                await upload_task
+            finally:
+                self._upload_tasks.discard(upload_task)
             
             print(f"[UPLOAD] Успешно загружен: {filename}")
             
@@ -277,26 +1412,133 @@ class VideoUploader(QThread):
             print(f"[UPLOAD] Ошибка загрузки {filename}: {e}")
             raise
     
-    async def _update_peers_cache(self, client) -> None:
-        """Обновляет кэш пиров для корректной работы с чатами"""
+    async def _start_worker_pool(self) -> None:
+        """Запускает процессы-загрузчики для аккаунтов пула"""
+        self._worker_pool = ProcessUploadPool(
+            self.options.worker_processes, self.api_id, self.api_hash, self.chat_id,
+            max_concurrent=self.max_concurrent,
+            retry_policy=self.retry_policy,
+            bandwidth_schedule=self.options.bandwidth_schedule,
+            use_mmap=self.options.use_mmap,
+            memory_budget_mb=self.options.memory_budget_mb,
+            keep_page_cache=self.options.keep_page_cache,
+            read_block_mb=self.options.read_block_mb if self.options.device_aware_reads else 0
+        )
+        await self._worker_pool.start(self._accounts.accounts, self._get_peer_type(int(self.chat_id)))
+        self.status_updated.emit(f"🧩 Процессов-загрузчиков: {self.options.worker_processes}")
+    
+    async def _upload_in_worker(self, client: Client, job: UploadJob, video_path: str,
+                                filename: str, metadata: dict) -> None:
+        """
+        Загружает один видео файл в процессе-загрузчике
+        
+        Args:
+            client: Клиент аккаунта, выбранного для файла
+            job: Задание на загрузку
+            video_path: Путь к видео файлу
+            filename: Подпись к видео
+            metadata: Метаданные видео
+        """
+        account = self._accounts.for_client(client)
         try:
-            print(f"[UPLOAD] Обновляем кэш пиров...")
-            
-            # Ищем целевой чат в диалогах для обновления кэша
-            dialogs_count = 0
-            target_chat_found = False
+            await self._worker_pool.upload(
+                job.index, account.session_name, video_path, filename, metadata,
+                progress=partial(self.progress_callback, job=job)
+            )
+            print(f"[UPLOAD] Успешно загружен (процесс-загрузчик): {filename}")
+        except asyncio.CancelledError:
+            print(f"[UPLOAD] Загрузка отменена: {filename}")
+            raise
+        except Exception as e:
+            print(f"[UPLOAD] Ошибка загрузки {filename}: {e}")
+            raise
+    
+    async def _resolve_target_peer(self, client: Client, user_id: int, scan_dialogs: bool = False):
+        """
+        Разрешает целевой чат и закрепляет его в хранилище сессии
+        
+        Сначала используется постоянный кэш пиров, заполненный при загрузке
+        списка чатов. При промахе выполняется точечный запрос resolve_peer /
+        get_chat, а результат сохраняется в кэш.
+        
+        Args:
+            client: Клиент Telegram
+            user_id: ID авторизованного пользователя
+            scan_dialogs: Искать чат в диалогах, если точечный запрос не помог
+                (для дополнительных аккаунтов, у которых нет списка чатов)
             
-            async for dialog in client.get_dialogs(limit=100):
-                dialogs_count += 1
-                if dialog.chat.id == int(self.chat_id):
-                    print(f"[UPLOAD] Найден целевой чат: {dialog.chat.title or dialog.chat.first_name} (ID: {dialog.chat.id})")
-                    target_chat_found = True
+        Returns:
+            InputPeer целевого чата или None, если разрешить не удалось
+        """
+        chat_id = int(self.chat_id)
+        peer_cache = PeerCache()
+        
+        entry = peer_cache.get(user_id, chat_id)
+        if entry:
+            try:
+                peer = await pin_peer(client, chat_id, entry)
+                print(f"[UPLOAD] Целевой чат {chat_id} взят из кэша пиров")
+                return peer
+            except Exception as e:
+                print(f"[UPLOAD] Запись кэша пиров для {chat_id} непригодна: {e}")
+        
+        try:
+            try:
+                peer = await client.resolve_peer(chat_id)
+            except Exception:
+                try:
+                    # Точечный запрос чата заносит пир в хранилище сессии
+                    await client.get_chat(chat_id)
+                except Exception:
+                    if not scan_dialogs:
+                        raise
+                    # Новая сессия еще не знает пиров - один раз проходим диалоги
+                    with span("scan_dialogs", "upload"):
+                        async for dialog in client.get_dialogs():
+                            if dialog.chat.id == chat_id:
+                                break
+                peer = await client.resolve_peer(chat_id)
             
-            print(f"[UPLOAD] Загружено {dialogs_count} диалогов, кэш пиров обновлен")
+            peer_type = self._get_peer_type(chat_id)
+            peer_cache.update(user_id, {chat_id: make_peer_entry(peer, peer_type)})
+            print(f"[UPLOAD] Целевой чат {chat_id} разрешен и сохранен в кэш пиров")
+            return peer
             
-            if not target_chat_found:
-                print(f"[UPLOAD] ⚠️ Целевой чат с ID {self.chat_id} не найден в диалогах")
-                
         except Exception as e:
-            print(f"[UPLOAD] Ошибка обновления кэша пиров: {e}")
-            # Не прерываем загрузку из-за этой ошибки
\ No newline at end of file
+            print(f"[UPLOAD] ⚠️ Не удалось разрешить целевой чат {chat_id}: {e}")
+            # Не прерываем загрузку: чат будет разрешен повторно при отправке
+            return None
+    
+    def _get_peer_type(self, chat_id: int) -> str:
+        """
+        Определяет тип пира по ID для записи в кэш
+        
+        Args:
+            chat_id: ID чата
+            
+        Returns:
+            Тип пира в терминах хранилища Pyrogram
+        """
+        peer_type = get_peer_type(chat_id)
+        # Для построения InputPeer каналы и супергруппы не различаются
+        return {"chat": "group", "channel": "supergroup"}.get(peer_type, peer_type)
+
+
+def _remove_cut_part(future: asyncio.Future) -> None:
+    """Удаляет часть, вырезанную заранее, но не понадобившуюся"""
+    if future.cancelled() or future.exception() is not None:
+        return
+    part_path, _ = future.result()
+    try:
+        os.remove(part_path)
+    except OSError:
+        pass
+
+
+def _remove_split_parts(uploaded: list) -> None:
+    """Удаляет нарезанные части, ожидавшие отправки"""
+    for _, part_path, _, _ in uploaded:
+        try:
+            os.remove(part_path)
+        except OSError:
+            pass
@@ -0,0 +1,60 @@
+"""
+Модуль фоновой загрузки тяжелых модулей после показа окна
+"""
+import importlib
+import time
+from typing import Sequence
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+
+# Стек Telegram: нужен для проверки авторизации, загрузки чатов и файлов
+TELEGRAM_MODULES = ("pyrogram", "core.auth", "core.chat_loader", "core.uploader")
+
+# Библиотека метаданных видео: нужна только к первой загрузке
+BACKGROUND_MODULES = ("moviepy.editor",)
+
+
+class ImportWarmup(QThread):
+    """
+    Поток, импортирующий Pyrogram и бэкенд метаданных, пока окно уже работает
+
+    Сначала загружается стек Telegram (сигнал telegram_ready), затем
+    необязательные библиотеки. Если пользователь нажмет кнопку раньше,
+    ленивый импорт в контроллере просто дождется этого потока.
+    """
+
+    telegram_ready = pyqtSignal(float)  # время загрузки, мс
+
+    def __init__(self, telegram_modules: Sequence[str] = TELEGRAM_MODULES,
+                 background_modules: Sequence[str] = BACKGROUND_MODULES):
+        """
+        Инициализация прогрева
+
+        Args:
+            telegram_modules: Модули, нужные для работы с Telegram
+            background_modules: Необязательные модули для загрузки в конце
+        """
+        super().__init__()
+        self.telegram_modules = tuple(telegram_modules)
+        self.background_modules = tuple(background_modules)
+
+    def run(self) -> None:
+        """Импортирует модули по очереди"""
+        started = time.perf_counter()
+        for name in self.telegram_modules:
+            _import_quietly(name)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        print(f"[WARMUP] Стек Telegram загружен за {elapsed_ms:.0f} мс")
+        self.telegram_ready.emit(elapsed_ms)
+
+        for name in self.background_modules:
+            _import_quietly(name)
+
+
+def _import_quietly(name: str) -> None:
+    """Импортирует модуль; ошибка будет показана при реальном использовании"""
+    try:
+        importlib.import_module(name)
+    except Exception as e:
+        print(f"[WARMUP] Модуль {name} не загружен: {e}")
@@ -0,0 +1,472 @@
+"""
+Модуль процессов-загрузчиков: передача файлов в нескольких процессах
+"""
+import asyncio
+import builtins
+import concurrent.futures
+import math
+import multiprocessing
+import queue
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from core.accounts import UploadAccount
+from core import loop_policy
+from core.bandwidth import BandwidthSchedule
+from core.metrics import BYTES_SENT
+from core.retry import RetryPolicy
+
+
+# Как часто процесс сообщает о прогрессе файла, с
+PROGRESS_INTERVAL = 0.5
+
+# Как часто планировщик проверяет, живы ли процессы, с
+EVENTS_POLL_INTERVAL = 0.5
+
+# Сколько ждать завершения процессов при остановке, с
+STOP_TIMEOUT = 10.0
+
+
+class WorkerError(Exception):
+    """
+    Ошибка Telegram, возникшая в процессе-загрузчике
+
+    Повторяет атрибуты RPCError (ID, CODE, value), поэтому классификация
+    ошибок и задержки FloodWait работают так же, как в основном процессе.
+    """
+
+    def __init__(self, message: str, error_id: Optional[str] = None,
+                 code: Optional[int] = None, value: Any = None):
+        super().__init__(message)
+        self.ID = error_id
+        self.CODE = code
+        self.value = value
+
+
+def describe_error(error: BaseException) -> Dict[str, Any]:
+    """
+    Переводит исключение в словарь для передачи между процессами
+
+    Args:
+        error: Исключение
+
+    Returns:
+        Тип, текст и атрибуты ошибки Telegram
+    """
+    return {
+        'type': type(error).__name__,
+        'message': str(error),
+        'ID': getattr(error, 'ID', None),
+        'CODE': getattr(error, 'CODE', None),
+        'value': getattr(error, 'value', None)
+    }
+
+
+def restore_error(info: Dict[str, Any]) -> BaseException:
+    """
+    Восстанавливает исключение из describe_error
+
+    Встроенные исключения (OSError, ValueError и т.д.) восстанавливаются
+    своим типом, ошибки Telegram - как WorkerError с теми же ID и CODE.
+
+    Args:
+        info: Словарь ошибки
+
+    Returns:
+        Исключение
+    """
+    if info.get('ID') is None and info.get('CODE') is None:
+        error_type = getattr(builtins, info['type'], None)
+        if isinstance(error_type, type) and issubclass(error_type, Exception):
+            try:
+                return error_type(info['message'])
+            except Exception:
+                pass
+    return WorkerError(info['message'], info.get('ID'), info.get('CODE'), info.get('value'))
+
+
+class _WorkerProcess:
+    """Процесс-загрузчик на стороне планировщика"""
+
+    def __init__(self, index: int, process: multiprocessing.Process, assignments):
+        self.index = index
+        self.process = process
+        self.assignments = assignments
+        self.jobs: Dict[int, asyncio.Future] = {}
+        self.alive = True
+
+
+class ProcessUploadPool:
+    """
+    Планировщик процессов-загрузчиков
+
+    Каждый процесс подключает собственных клиентов (по строкам сессий
+    аккаунтов пула), читает, шифрует и отправляет файлы целиком, поэтому
+    загрузка масштабируется по ядрам. Планировщик в основном процессе
+    выдает файл наименее загруженному процессу через его очередь заданий
+    и получает обратно события прогресса и результата по общей очереди
+    событий. Очередь файлов, повторы, FloodWait аккаунтов, журнал
+    отправленных файлов и сигналы UI остаются в основном процессе.
+    Лимиты скорости и памяти делятся между процессами поровну, чтение
+    по дискам каждый процесс планирует сам. Точку продолжения передачи
+    байтов процессы не записывают (журнал - файл основного процесса),
+    поэтому прерванный файл передается заново.
+    """
+
+    def __init__(self, processes: int, api_id: int, api_hash: str, chat_id: int,
+                 max_concurrent: int, retry_policy: RetryPolicy,
+                 bandwidth_schedule: BandwidthSchedule, use_mmap: bool = False,
+                 memory_budget_mb: int = 0, keep_page_cache: bool = False,
+                 read_block_mb: int = 0):
+        """
+        Инициализация планировщика
+
+        Args:
+            processes: Количество процессов-загрузчиков
+            api_id: API ID Telegram
+            api_hash: API Hash Telegram
+            chat_id: ID целевого чата
+            max_concurrent: Параллельных файлов на аккаунт (на весь пул процессов)
+            retry_policy: Политика повторов отдельных частей
+            bandwidth_schedule: Расписание общего лимита скорости
+            use_mmap: Читать файлы через отображение в память
+            memory_budget_mb: Общий лимит данных в загрузке, МБ (0 - без лимита)
+            keep_page_cache: Не сбрасывать загруженные части из кэша страниц
+            read_block_mb: Размер блока чтения по дискам, МБ (0 - без планировщика
+                чтения); у каждого процесса свой планировщик
+        """
+        self.processes_count = max(1, processes)
+        self.config: Dict[str, Any] = {
+            'api_id': api_id,
+            'api_hash': api_hash,
+            'chat_id': chat_id,
+            'max_concurrent': max(1, math.ceil(max_concurrent / self.processes_count)),
+            'retry_policy': retry_policy,
+            'bandwidth_schedule': bandwidth_schedule,
+            'share': 1 / self.processes_count,
+            'use_mmap': use_mmap,
+            'memory_budget_mb': memory_budget_mb // self.processes_count if memory_budget_mb else 0,
+            'keep_page_cache': keep_page_cache,
+            'read_block_mb': read_block_mb,
+            'event_loop': loop_policy.implementation(),
+        }
+        self._context = multiprocessing.get_context("spawn")
+        self._events = None
+        self._workers: List[_WorkerProcess] = []
+        self._progress: Dict[int, Callable] = {}
+        self._sent_bytes: Dict[int, int] = {}
+        self._events_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._pump_task: Optional[asyncio.Task] = None
+
+    async def start(self, accounts: List[UploadAccount], peer_type: str) -> None:
+        """
+        Запускает процессы
+
+        Args:
+            accounts: Подключенные аккаунты пула
+            peer_type: Тип целевого чата для записи пира в хранилище процесса
+        """
+        from core.peer_cache import make_peer_entry
+
+        self.config['accounts'] = {}
+        for account in accounts:
+            self.config['accounts'][account.session_name] = {
+                'session_string': await account.client.export_session_string(),
+                'peer': (make_peer_entry(account.target_peer, peer_type)
+                         if account.target_peer is not None else None),
+                'limit_mb': (account.rate_limiter.rate or 0) / (1024 * 1024),
+            }
+
+        self._events = self._context.Queue()
+        for index in range(self.processes_count):
+            assignments = self._context.Queue()
+            process = self._context.Process(
+                target=worker_main, args=(index, self.config, assignments, self._events),
+                name=f"upload-worker-{index}", daemon=True
+            )
+            process.start()
+            self._workers.append(_WorkerProcess(index, process, assignments))
+
+        self._events_executor = concurrent.futures.ThreadPoolExecutor(1, thread_name_prefix="worker-events")
+        self._pump_task = asyncio.get_running_loop().create_task(self._pump_events())
+        print(f"[WORKERS] Запущено процессов-загрузчиков: {self.processes_count} "
+              f"(до {self.config['max_concurrent']} файлов на аккаунт в каждом)")
+
+    async def upload(self, job_index: int, account: str, path: str, caption: str,
+                     metadata: Dict[str, Any], progress: Optional[Callable] = None) -> None:
+        """
+        Передает файл процессу и ждет его отправки
+
+        Args:
+            job_index: Номер задания в пакете
+            account: Сессия аккаунта, через который отправить файл
+            path: Путь к файлу
+            caption: Подпись к видео
+            metadata: Метаданные видео (с путем к превью в ключе thumb)
+            progress: Callback прогресса (current, total)
+
+        Raises:
+            Ошибка отправки, восстановленная из процесса
+        """
+        alive = [worker for worker in self._workers if worker.alive]
+        if not alive:
+            raise ConnectionError("Нет работающих процессов-загрузчиков")
+        worker = min(alive, key=lambda item: len(item.jobs))
+
+        future = asyncio.get_running_loop().create_future()
+        worker.jobs[job_index] = future
+        if progress:
+            self._progress[job_index] = progress
+        self._sent_bytes[job_index] = 0
+        worker.assignments.put(("upload", {
+            'job': job_index, 'account': account, 'path': path,
+            'caption': caption, 'metadata': metadata
+        }))
+        try:
+            await future
+        except asyncio.CancelledError:
+            worker.assignments.put(("cancel", job_index))
+            raise
+        finally:
+            worker.jobs.pop(job_index, None)
+            self._progress.pop(job_index, None)
+            self._sent_bytes.pop(job_index, None)
+
+    def set_schedule(self, schedule: BandwidthSchedule) -> None:
+        """
+        Передает процессам новое расписание лимита скорости (из любого потока)
+
+        Args:
+            schedule: Новое расписание
+        """
+        self.config['bandwidth_schedule'] = schedule
+        for worker in self._workers:
+            if worker.alive:
+                worker.assignments.put(("schedule", schedule))
+
+    async def stop(self) -> None:
+        """Останавливает процессы и обработку событий"""
+        for worker in self._workers:
+            if worker.alive:
+                worker.assignments.put(("stop", None))
+        loop = asyncio.get_running_loop()
+        for worker in self._workers:
+            await loop.run_in_executor(None, worker.process.join, STOP_TIMEOUT)
+            if worker.process.is_alive():
+                print(f"[WORKERS] Процесс {worker.index} не завершился за {STOP_TIMEOUT:.0f} с, остановлен")
+                worker.process.terminate()
+            self._fail_jobs(worker, ConnectionError("Процесс-загрузчик остановлен"))
+        if self._pump_task:
+            self._pump_task.cancel()
+            await asyncio.gather(self._pump_task, return_exceptions=True)
+            self._pump_task = None
+        if self._events_executor:
+            self._events_executor.shutdown(wait=False)
+            self._events_executor = None
+        self._workers.clear()
+
+    async def _pump_events(self) -> None:
+        """Получает события процессов и передает их ожидающим заданиям"""
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                event = await loop.run_in_executor(
+                    self._events_executor, self._events.get, True, EVENTS_POLL_INTERVAL
+                )
+            except queue.Empty:
+                self._check_processes()
+                continue
+            self._dispatch(event)
+
+    def _dispatch(self, event: tuple) -> None:
+        """Обрабатывает одно событие процесса"""
+        kind, job_index = event[0], event[1]
+        if kind == "progress":
+            current, total = event[2], event[3]
+            sent = self._sent_bytes.get(job_index)
+            if sent is not None and current > sent:
+                BYTES_SENT.inc(current - sent)
+                self._sent_bytes[job_index] = current
+            progress = self._progress.get(job_index)
+            if progress:
+                progress(current, total)
+            return
+
+        if kind == "done":
+            error = event[2]
+            for worker in self._workers:
+                future = worker.jobs.get(job_index)
+                if future is None or future.done():
+                    continue
+                if error is None:
+                    future.set_result(None)
+                else:
+                    future.set_exception(restore_error(error))
+
+    def _check_processes(self) -> None:
+        """Отмечает аварийно завершившиеся процессы, их файлы уходят на повтор"""
+        for worker in self._workers:
+            if worker.alive and not worker.process.is_alive():
+                worker.alive = False
+                print(f"[WORKERS] Процесс {worker.index} завершился (код {worker.process.exitcode})")
+                self._fail_jobs(worker, ConnectionError(f"Процесс-загрузчик {worker.index} завершился"))
+
+    @staticmethod
+    def _fail_jobs(worker: _WorkerProcess, error: BaseException) -> None:
+        """Завершает ошибкой файлы, выданные процессу"""
+        for future in worker.jobs.values():
+            if not future.done():
+                future.set_exception(error)
+
+
+def worker_main(index: int, config: Dict[str, Any], assignments, events) -> None:
+    """
+    Точка входа процесса-загрузчика
+
+    Args:
+        index: Номер процесса
+        config: Параметры загрузки и аккаунтов (см. ProcessUploadPool)
+        assignments: Очередь заданий этого процесса
+        events: Общая очередь событий планировщика
+    """
+    loop_policy.configure(config['event_loop'])
+    try:
+        loop_policy.run(_UploadWorker(index, config, events).serve(assignments))
+    except KeyboardInterrupt:
+        pass
+
+
+class _UploadWorker:
+    """Загрузка файлов внутри процесса-загрузчика"""
+
+    def __init__(self, index: int, config: Dict[str, Any], events):
+        from core.accounts import AccountPool
+        from core.bandwidth import BandwidthLimiter
+        from core.crypto_pool import default_crypto_workers, install_crypto_executor
+        from core.memory_budget import create_memory_budget
+        from core.part_uploader import PartUploader
+        from core.read_scheduler import ReadScheduler
+
+        self.index = index
+        self.config = config
+        self.events = events
+        install_crypto_executor(default_crypto_workers(config['max_concurrent'] * len(config['accounts'])))
+        self.rate_limiter = BandwidthLimiter(config['bandwidth_schedule'], config['share'])
+        self.accounts = {
+            name: UploadAccount(name, entry['limit_mb'] * config['share'])
+            for name, entry in config['accounts'].items()
+        }
+        self.part_uploader = PartUploader(
+            max_concurrent=config['max_concurrent'] * len(self.accounts),
+            use_mmap=config['use_mmap'],
+            retry_policy=config['retry_policy'],
+            memory_budget=create_memory_budget(config['memory_budget_mb']),
+            keep_page_cache=config['keep_page_cache'],
+            read_scheduler=(
+                ReadScheduler(config['read_block_mb'] * 1024 * 1024)
+                if config['read_block_mb'] else None
+            ),
+            rate_limiter=self.rate_limiter,
+            accounts=AccountPool(list(self.accounts.values()))
+        )
+        self._connect_locks: Dict[str, asyncio.Lock] = {}
+        self._peers: Dict[str, Any] = {}
+
+    async def serve(self, assignments) -> None:
+        """Выполняет задания, пока планировщик не пришлет stop"""
+        loop = asyncio.get_running_loop()
+        tasks: Dict[int, asyncio.Task] = {}
+        try:
+            while True:
+                kind, payload = await loop.run_in_executor(None, assignments.get)
+                if kind == "stop":
+                    break
+                if kind == "upload":
+                    job_index = payload['job']
+                    task = asyncio.create_task(self.upload(payload))
+                    tasks[job_index] = task
+                    task.add_done_callback(lambda _, job=job_index: tasks.pop(job, None))
+                elif kind == "cancel":
+                    task = tasks.get(payload)
+                    if task:
+                        task.cancel()
+                elif kind == "schedule":
+                    self.rate_limiter.set_schedule(payload)
+        finally:
+            for task in list(tasks.values()):
+                task.cancel()
+            await asyncio.gather(*list(tasks.values()), return_exceptions=True)
+            await self.close()
+
+    async def upload(self, assignment: Dict[str, Any]) -> None:
+        """Загружает и отправляет один файл, сообщая планировщику прогресс и итог"""
+        from core.media import send_video_file
+
+        job_index = assignment['job']
+        reported_at = 0.0
+
+        def progress(current: int, total: int) -> None:
+            nonlocal reported_at
+            now = time.monotonic()
+            if current < total and now - reported_at < PROGRESS_INTERVAL:
+                return
+            reported_at = now
+            self.events.put(("progress", job_index, current, total))
+
+        try:
+            client, peer = await self._client_for(assignment['account'])
+            metadata = assignment['metadata']
+            await send_video_file(
+                client, peer, assignment['path'], assignment['caption'], metadata,
+                thumb=metadata.get('thumb'), progress=progress,
+                part_uploader=self.part_uploader
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.events.put(("done", job_index, describe_error(e)))
+        else:
+            self.events.put(("done", job_index, None))
+
+    async def _client_for(self, session_name: str):
+        """Подключает клиента аккаунта при первом файле и закрепляет целевой чат"""
+        from pyrogram import Client
+        from core.peer_cache import pin_peer
+
+        account = self.accounts[session_name]
+        lock = self._connect_locks.setdefault(session_name, asyncio.Lock())
+        async with lock:
+            if account.client is None:
+                entry = self.config['accounts'][session_name]
+                client = Client(
+                    f"{session_name}_worker{self.index}",
+                    api_id=self.config['api_id'],
+                    api_hash=self.config['api_hash'],
+                    session_string=entry['session_string'],
+                    in_memory=True,
+                    no_updates=True,
+                    max_concurrent_transmissions=self.config['max_concurrent']
+                )
+                await client.connect()
+                me = await client.get_me()
+                client.me = me
+                account.attach(client, me)
+                chat_id = int(self.config['chat_id'])
+                if entry['peer']:
+                    self._peers[session_name] = await pin_peer(client, chat_id, entry['peer'])
+                else:
+                    self._peers[session_name] = await client.resolve_peer(chat_id)
+        return account.client, self._peers[session_name]
+
+    async def close(self) -> None:
+        """Закрывает соединения загрузки и отключает клиентов процесса"""
+        from core.session_pool import upload_sessions
+
+        self.part_uploader.close()
+        for account in self.accounts.values():
+            if account.client is not None:
+                try:
+                    await upload_sessions.drain(account.client)
+                    await account.client.disconnect()
+                except Exception as e:
+                    print(f"[WORKERS] Процесс {self.index}: ошибка отключения {account.session_name}: {e}")
@@ -4,6 +4,7 @@
 import sys
 import os
 import traceback
+from PyQt5.QtCore import QTimer
 from PyQt5.QtWidgets import QApplication, QMessageBox
 
 # Добавляем текущую директорию в путь для импорта модулей
@@ -11,6 +12,7 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from ui.main_window import MainWindow
 from ui.controller import MainWindowController
+from core.loop import event_loop
 
 
 def setup_exception_handler():
@@ -67,10 +69,17 @@ def main():
         # Показываем окно
         window.show()
         
+        # Pyrogram и библиотека метаданных загружаются в фоне после первой отрисовки
+        QTimer.singleShot(0, controller.start_background_warmup)
+        
         print("✅ Приложение готово к работе")
         
         # Запускаем цикл событий
-        return app.exec_()
+        exit_code = app.exec_()
+        
+        # Отменяем незавершенные операции Telegram и останавливаем общий цикл asyncio
+        event_loop.stop()
+        return exit_code
         
     except Exception as e:
         error_msg = f"Критическая ошибка при запуске:\n{str(e)}\n\n{traceback.format_exc()}"
@@ -695,6 +695,16 @@ class VideoUploader(QThread):
             video_files.sort()
             self.status_updated.emit(f"Найдено {len(video_files)} видео файлов (отправляем как видео)")
             
+            # Проверяем доступность чата один раз перед отправкой всех файлов
+            try:
+                print(f"[UPLOAD] Проверяем доступность чата ID: {self.chat_id}")
+                peer = await client.resolve_peer(self.chat_id)
+                print(f"[UPLOAD] Чат найден: {peer}")
+            except Exception as peer_error:
+                print(f"[UPLOAD] Ошибка проверки чата: {peer_error}")
+                self.finished.emit(False, f"Чат недоступен (ID: {self.chat_id})")
+                return
+            
             # Отправляем видео
             successful = 0
             for i, video_file in enumerate(video_files):
@@ -727,16 +737,6 @@ class VideoUploader(QThread):
                     self.current_file = video_file
                     self.start_time = time.time()
                     
-                    # Проверяем доступность чата перед отправкой
-                    try:
-                        print(f"[UPLOAD] Проверяем доступность чата ID: {self.chat_id}")
-                        peer = await client.resolve_peer(self.chat_id)
-                        print(f"[UPLOAD] Чат найден: {peer}")
-                    except Exception as peer_error:
-                        print(f"[UPLOAD] Ошибка проверки чата: {peer_error}")
-                        self.file_uploaded.emit(f"❌ {video_file}: Чат недоступен (ID: {self.chat_id})")
-                        continue
-                    
                     # ИСПРАВЛЕНО: Формируем caption с префиксом и без расширения файла
                     # Убираем расширение из имени файла
                     file_name_clean = os.path.splitext(video_file)[0]
@@ -0,0 +1,189 @@
+"""
+Тесты упорядоченной отправки при параллельной загрузке
+"""
+import asyncio
+import os
+
+import pytest
+
+pytest.importorskip("pyrogram")
+pytest.importorskip("PyQt5")
+
+from core import uploader as uploader_module
+from core.retry import RetryPolicy
+from core.sequencer import DeliverySequencer
+from core.upload_options import UploadOptions
+from core.upload_queue import UploadJob, UploadQueue
+from core.uploader import VideoUploader
+
+
+class FakeAccount:
+    def __init__(self):
+        self.client = object()
+        self.session_name = "main"
+
+
+class FakeAccounts:
+    def __init__(self):
+        self.account = FakeAccount()
+
+    async def acquire(self, size, pinned=None):
+        return self.account
+
+    def release(self, account):
+        pass
+
+
+class FakeSplitPlan:
+    """План из двух частей, вырезаемых в маленькие файлы"""
+
+    def __init__(self, path, max_bytes, saved=None):
+        self.labels = ["1", "2"]
+        self.parts_count = 2
+        self.restored = False
+
+    def part_label(self, index):
+        return f"{self.labels[index]}/{self.parts_count}"
+
+    def to_dict(self):
+        return {"labels": self.labels}
+
+    def cut_part(self, index, output_dir):
+        os.makedirs(output_dir, exist_ok=True)
+        part_path = os.path.join(output_dir, f"part{index + 1}.mp4")
+        with open(part_path, 'wb') as f:
+            f.write(b"x")
+        return part_path, True
+
+    def subdivide(self, index):
+        return False
+
+
+def test_split_file_does_not_block_worker_waiting_for_turn(tmp_path, monkeypatch):
+    small = tmp_path / "a.mp4"
+    large = tmp_path / "b.mp4"
+    small.write_bytes(b"a")
+    large.write_bytes(b"b")
+    sizes = {str(small): 1, str(large): 10}
+    failed_once = []
+    sent = []
+
+    async def upload_video_file(client, path, metadata, **kwargs):
+        if path == str(small) and not failed_once:
+            failed_once.append(path)
+            raise ConnectionError("сеть недоступна")
+        return path
+
+    async def send_uploaded_video(client, peer, path, media, caption, part_uploader):
+        sent.append(caption)
+
+    monkeypatch.setattr(uploader_module, "get_video_metadata", lambda path: {})
+    monkeypatch.setattr(uploader_module, "get_file_size", lambda path: sizes.get(path, 1))
+    monkeypatch.setattr(uploader_module, "is_member_path", lambda path: False)
+    monkeypatch.setattr(uploader_module, "SplitPlan", FakeSplitPlan)
+    monkeypatch.setattr(uploader_module, "upload_video_file", upload_video_file)
+    monkeypatch.setattr(uploader_module, "send_uploaded_video", send_uploaded_video)
+
+    options = UploadOptions(
+        retry_policy=RetryPolicy(base_delay=0, jitter=0),
+        generate_thumbnails=False,
+        scratch_dir=str(tmp_path / "scratch"),
+        ordered_delivery=True,
+        resume_journal=False
+    )
+    uploader = VideoUploader(1, "hash", 1, str(tmp_path), delay_seconds=0,
+                             max_concurrent=1, options=options)
+    uploader._max_file_bytes = 5
+
+    async def peer_for(client):
+        return None
+
+    uploader._peer_for = peer_for
+
+    async def run():
+        jobs = [UploadJob(0, str(small)), UploadJob(1, str(large))]
+        uploader._accounts = FakeAccounts()
+        uploader._total_files = len(jobs)
+        uploader._queue = UploadQueue(jobs, 1)
+        uploader._sequencer = DeliverySequencer(len(jobs))
+        # Единственный воркер не должен ждать очереди отправки файла 1,
+        # пока файл 0 стоит в очереди на повтор
+        await asyncio.wait_for(uploader._upload_worker(uploader._queue), timeout=5)
+        await asyncio.wait_for(asyncio.gather(*list(uploader._delivery_tasks)), timeout=5)
+
+    asyncio.run(run())
+
+    assert sent == ["a.mp4", "b.mp4 (1/2)", "b.mp4 (2/2)"]
+    assert uploader._uploaded_count == 2
+    assert not os.listdir(tmp_path / "scratch" / "split" / "1")
+
+
+def test_prepared_files_waiting_for_turn_do_not_stop_preparation(tmp_path, monkeypatch):
+    names = ["a.mp4", "b.mp4", "c.mp4", "d.mp4"]
+    for name in names:
+        (tmp_path / name).write_bytes(name.encode())
+    failed_once = []
+    sent = []
+
+    async def upload_video_file(client, path, metadata, **kwargs):
+        if os.path.basename(path) == "a.mp4" and not failed_once:
+            failed_once.append(path)
+            raise ConnectionError("сеть недоступна")
+        return path
+
+    async def send_uploaded_video(client, peer, path, media, caption, part_uploader):
+        sent.append(caption)
+
+    monkeypatch.setattr(uploader_module, "get_video_metadata", lambda path: {})
+    monkeypatch.setattr(uploader_module, "upload_video_file", upload_video_file)
+    monkeypatch.setattr(uploader_module, "send_uploaded_video", send_uploaded_video)
+
+    options = UploadOptions(
+        retry_policy=RetryPolicy(base_delay=0, jitter=0),
+        generate_thumbnails=False,
+        prepare_streaming=True,
+        transcode_workers=1,
+        transcode_lookahead=1,
+        scratch_dir=str(tmp_path / "scratch"),
+        ordered_delivery=True,
+        resume_journal=False
+    )
+    uploader = VideoUploader(1, "hash", 1, str(tmp_path), delay_seconds=0,
+                             max_concurrent=1, options=options)
+
+    async def peer_for(client):
+        return None
+
+    async def prepare_job(job):
+        # Подготовленная копия во временной папке, как у prepare_streamable
+        prepared_dir = tmp_path / "scratch" / "prepared" / str(job.index)
+        prepared_dir.mkdir(parents=True)
+        prepared_path = prepared_dir / job.filename
+        prepared_path.write_bytes(b"x")
+        job.prepare_future.set_result(str(prepared_path))
+
+    uploader._peer_for = peer_for
+    uploader._prepare_job = prepare_job
+
+    async def run():
+        jobs = [UploadJob(index, str(tmp_path / name)) for index, name in enumerate(names)]
+        uploader._accounts = FakeAccounts()
+        uploader._total_files = len(jobs)
+        uploader._queue = UploadQueue(jobs, 1)
+        uploader._sequencer = DeliverySequencer(len(jobs))
+        uploader._prepare_slots = asyncio.Semaphore(
+            options.transcode_workers + options.transcode_lookahead
+        )
+        for job in jobs:
+            job.prepare_future = asyncio.get_running_loop().create_future()
+        uploader._prepare_task = asyncio.create_task(uploader._run_prepare_stage(jobs))
+        # Файлы, ждущие очереди за файлом 0, не должны занять все места подготовки
+        await asyncio.wait_for(uploader._upload_worker(uploader._queue), timeout=5)
+        await asyncio.wait_for(asyncio.gather(*list(uploader._delivery_tasks)), timeout=5)
+        await uploader._prepare_task
+
+    asyncio.run(run())
+
+    assert sent == names
+    assert uploader._uploaded_count == len(names)
+    assert not os.listdir(tmp_path / "scratch" / "prepared")
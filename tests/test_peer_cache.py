@@ -0,0 +1,15 @@
+"""
+Тесты кэша пиров
+"""
+from core.peer_cache import PeerCache
+
+
+def test_update_replaces_file_without_leftovers(tmp_path):
+    cache = PeerCache(str(tmp_path / "peers_cache.json"))
+    entry = {"access_hash": 1, "type": "channel", "username": None}
+    cache.update(1, {-1001: entry})
+    cache.update(1, {-1002: entry})
+
+    assert cache.get(1, -1001) == entry
+    assert cache.get(1, -1002) == entry
+    assert [path.name for path in tmp_path.iterdir()] == ["peers_cache.json"]
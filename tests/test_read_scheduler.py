@@ -0,0 +1,113 @@
+"""
+Тесты блочного чтения через планировщик устройств
+"""
+import asyncio
+import os
+
+from core.memory_budget import MemoryBudget
+from core.part_source import PART_SIZE
+from core.read_scheduler import ReadScheduler
+
+BLOCK_BYTES = 2 * PART_SIZE
+
+
+def make_file(tmp_path, size):
+    path = tmp_path / "video.mp4"
+    data = os.urandom(size)
+    path.write_bytes(data)
+    return str(path), data
+
+
+async def upload_all(source, budget, workers=4):
+    """Читает все части несколькими воркерами, как PartUploader"""
+    parts = {}
+    indices = iter(range(source.first_part, source.total_parts))
+
+    async def worker():
+        for index in indices:
+            data = await source.fetch_part(index, budget)
+            try:
+                parts[index] = bytes(data)
+                await asyncio.sleep(0.001)
+            finally:
+                source.release_part(index)
+
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    return parts
+
+
+def test_blocks_are_counted_in_memory_budget(tmp_path):
+    path, data = make_file(tmp_path, 9 * PART_SIZE + 1234)
+    scheduler = ReadScheduler(BLOCK_BYTES)
+    budget = MemoryBudget(2 * BLOCK_BYTES)
+
+    async def run():
+        source = scheduler.open(path)
+        try:
+            parts = await upload_all(source, budget)
+        finally:
+            source.close()
+        return parts
+
+    try:
+        parts = asyncio.run(run())
+    finally:
+        scheduler.shutdown()
+
+    assert b"".join(parts[index] for index in sorted(parts)) == data
+    # Текущий и упреждающий блоки укладываются в бюджет и возвращаются в него
+    assert 0 < budget.peak <= budget.limit_bytes
+    assert budget.used == 0
+
+
+def test_block_buffers_are_reused(tmp_path):
+    path, _ = make_file(tmp_path, 8 * PART_SIZE)
+    scheduler = ReadScheduler(BLOCK_BYTES)
+    budget = MemoryBudget(BLOCK_BYTES)
+    allocated = []
+    take_block = scheduler.take_block
+
+    def counting_take_block():
+        buffer = take_block()
+        if all(buffer is not known for known in allocated):
+            allocated.append(buffer)
+        return buffer
+
+    scheduler.take_block = counting_take_block
+
+    async def run():
+        source = scheduler.open(path)
+        try:
+            await upload_all(source, budget)
+        finally:
+            source.close()
+
+    try:
+        asyncio.run(run())
+    finally:
+        scheduler.shutdown()
+
+    # Бюджет вмещает один блок: буфер переиспользуется для всех четырех блоков
+    assert len(allocated) == 1
+    assert budget.used == 0
+
+
+def test_close_releases_prefetched_blocks(tmp_path):
+    path, data = make_file(tmp_path, 8 * PART_SIZE)
+    scheduler = ReadScheduler(BLOCK_BYTES)
+    budget = MemoryBudget(4 * BLOCK_BYTES)
+
+    async def run():
+        source = scheduler.open(path)
+        part = await source.fetch_part(0, budget)
+        assert bytes(part) == data[:PART_SIZE]
+        # Дадим упреждающему чтению следующего блока завершиться
+        await asyncio.sleep(0.05)
+        source.close()
+        await asyncio.sleep(0)
+
+    try:
+        asyncio.run(run())
+    finally:
+        scheduler.shutdown()
+    assert budget.used == 0
@@ -0,0 +1,55 @@
+"""
+Тесты классификации ошибок загрузки
+"""
+import asyncio
+
+import pytest
+
+from core.retry import FLOOD_WAIT, PERMANENT, TRANSIENT, RetryPolicy, classify_error
+
+
+class RPCError(Exception):
+    """Ошибка с атрибутами RPCError Pyrogram"""
+
+    def __init__(self, error_id, code, value=None):
+        super().__init__(error_id)
+        self.ID = error_id
+        self.CODE = code
+        self.value = value
+
+
+@pytest.mark.parametrize("error", [
+    ConnectionError("reset"),
+    TimeoutError(),
+    asyncio.TimeoutError(),
+    OSError("network is unreachable"),
+    RPCError("RPC_CALL_FAIL", 500),
+    RPCError("INTERNAL", 500),
+    RPCError("NETWORK_MIGRATE_X", 303),
+])
+def test_network_and_server_errors_are_transient(error):
+    assert classify_error(error) == TRANSIENT
+
+
+@pytest.mark.parametrize("error", [
+    RPCError("FLOOD_WAIT_X", 420, 30),
+    RPCError("SLOWMODE_WAIT_X", 420, 10),
+])
+def test_flood_wait(error):
+    assert classify_error(error) == FLOOD_WAIT
+
+
+@pytest.mark.parametrize("error", [
+    FileNotFoundError("video.mp4"),
+    PermissionError("video.mp4"),
+    ValueError("Размер файла равен 0 Б"),
+    TypeError("bad argument"),
+    KeyError("peer"),
+    AttributeError("'NoneType' object has no attribute 'storage'"),
+    EOFError("Неожиданный конец файла: video.mp4"),
+    RuntimeError("unexpected"),
+    RPCError("CHAT_WRITE_FORBIDDEN", 403),
+])
+def test_other_errors_fail_fast(error):
+    assert classify_error(error) == PERMANENT
+    assert not RetryPolicy().should_retry(classify_error(error), 1)
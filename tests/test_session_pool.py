@@ -0,0 +1,73 @@
+"""
+Тесты пула соединений загрузки
+"""
+import asyncio
+
+import pytest
+
+pytest.importorskip("pyrogram")
+
+from core import session_pool
+from core.session_pool import UploadSessionPool
+
+
+class FakeStorage:
+    async def dc_id(self):
+        return 2
+
+    async def auth_key(self):
+        return b"key"
+
+    async def test_mode(self):
+        return False
+
+
+class FakeClient:
+    def __init__(self):
+        self.storage = FakeStorage()
+        self.max_concurrent_transmissions = 2
+
+
+class FakeSession:
+    def __init__(self, client, dc_id, auth_key, test_mode, is_media=False):
+        self.client = client
+        self.dc_id = dc_id
+        self.auth_key = auth_key
+        self.test_mode = test_mode
+        self.is_started = asyncio.Event()
+        self.stopped = False
+
+    async def start(self):
+        self.is_started.set()
+
+    async def stop(self):
+        self.stopped = True
+        self.is_started.clear()
+
+
+@pytest.fixture(autouse=True)
+def fake_sessions(monkeypatch):
+    monkeypatch.setattr(session_pool, "Session", FakeSession)
+
+
+def test_drain_closes_only_sessions_of_client():
+    async def run():
+        pool = UploadSessionPool()
+        old_client, new_client = FakeClient(), FakeClient()
+        old = await pool.acquire(old_client)
+        current = await pool.acquire(new_client)
+        await pool.release(old_client, old)
+        await pool.release(new_client, current)
+        assert pool.idle_count() == 2
+
+        assert await pool.drain(old_client) == 1
+        assert old.stopped and not current.stopped
+        # Соединение отключенного клиента не выдается новому
+        assert await pool.acquire(new_client) is current
+        await pool.release(new_client, current)
+
+        assert await pool.close_all() == 1
+        assert current.stopped
+        assert pool.idle_count() == 0
+
+    asyncio.run(run())
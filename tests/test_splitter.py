@@ -0,0 +1,82 @@
+"""
+Тесты плана разрезания больших видео
+"""
+import json
+
+import pytest
+
+from core.journal import UploadJournal
+from utils import splitter
+from utils.splitter import SplitPlan
+
+
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def plan(monkeypatch):
+    """План для видео 300 МБ на 300 с с ключевым кадром каждые 10 с (лимит 120 МБ)"""
+    monkeypatch.setattr(splitter, "get_ffmpeg_path", lambda: "ffmpeg")
+    monkeypatch.setattr(splitter, "probe_duration", lambda path, ffmpeg_path=None: 300.0)
+    monkeypatch.setattr(splitter, "find_keyframes",
+                        lambda path, ffmpeg_path=None: [float(t) for t in range(0, 300, 10)])
+    monkeypatch.setattr(splitter.os.path, "getsize", lambda path: 300 * MB)
+    return SplitPlan("video.mp4", 120 * MB)
+
+
+def test_parts_are_numbered_from_one(plan):
+    assert plan.parts_count == 3
+    assert [plan.part_label(index) for index in range(plan.parts_count)] == ["1/3", "2/3", "3/3"]
+
+
+def test_subdivide_keeps_total_in_captions(plan):
+    assert plan.subdivide(1)
+    assert plan.parts_count == 4
+    assert [plan.part_label(index) for index in range(plan.parts_count)] == ["1/3", "2a/3", "2b/3", "3/3"]
+
+    # Повторное деление половины
+    assert plan.subdivide(2)
+    assert plan.labels == ["1", "2a", "2ba", "2bb", "3"]
+    assert plan.part_label(4) == "3/3"
+
+
+def test_subdivide_keeps_ranges_contiguous(plan):
+    plan.subdivide(0)
+    for (_, end), (start, _) in zip(plan.ranges, plan.ranges[1:]):
+        assert end == start
+    assert plan.ranges[0][0] == 0.0
+    assert plan.ranges[-1][1] is None
+
+
+def test_saved_plan_is_restored_after_subdivide(plan):
+    plan.subdivide(1)
+    saved = json.loads(json.dumps(plan.to_dict()))
+
+    restored = SplitPlan("video.mp4", 120 * MB, saved)
+    assert restored.restored
+    assert restored.ranges == plan.ranges
+    assert restored.labels == ["1", "2a", "2b", "3"]
+    assert restored.part_label(3) == "3/3"
+
+
+def test_saved_plan_for_other_limit_is_ignored(plan):
+    restored = SplitPlan("video.mp4", 100 * MB, plan.to_dict())
+    assert not restored.restored
+    assert restored.labels[0] == "1"
+
+
+def test_journal_keeps_sent_parts_with_plan(plan, tmp_path):
+    video = tmp_path / "video.mp4"
+    video.write_bytes(b"x")
+    journal = UploadJournal(1, str(tmp_path / "journal.json"))
+    journal.save_split_plan(str(video), plan.to_dict(), set())
+    journal.mark_part_sent(str(video), "1")
+    plan.subdivide(1)
+    journal.save_split_plan(str(video), plan.to_dict(), {"1"})
+    journal.mark_part_sent(str(video), "2a")
+
+    reloaded = UploadJournal(1, str(tmp_path / "journal.json"))
+    restored = SplitPlan(str(video), 120 * MB, reloaded.get_split_plan(str(video)))
+    sent = reloaded.get_parts_sent(str(video))
+    unsent = [index for index in range(restored.parts_count) if restored.labels[index] not in sent]
+    assert [restored.part_label(index) for index in unsent] == ["2b/3", "3/3"]
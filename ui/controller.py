@@ -1,16 +1,34 @@
 """
 Контроллер основного окна - связывает UI с бизнес-логикой
 """
+import concurrent.futures
 import os
+import sys
 import time
 from typing import Optional
 from PyQt5.QtWidgets import QFileDialog, QMessageBox, QListWidgetItem
 from PyQt5.QtCore import QTimer, Qt
 
 from ui.main_window import MainWindow
-from core.auth import TelegramAuth, TelegramAuthChecker
-from core.chat_loader import ChatLoader
-from core.uploader import VideoUploader
+from core.accounts import DEFAULT_SESSION
+from core.auth_cache import AuthCache, display_name
+from core.bandwidth import schedule_from_settings
+from core.upload_options import UploadOptions
+from core.loop import event_loop
+from core.peer_cache import PeerCache
+from core.warmup import ImportWarmup
+from core import loop_policy, metrics, tracing
+
+# Задачи Telegram (core.auth, core.chat_loader, core.uploader) импортируются
+# при первом использовании: они тянут Pyrogram, который грузится в фоне
+# (ImportWarmup), пока окно уже показано
+
+
+# Сколько ждать кооперативного завершения фоновой задачи при ее замене, мс
+THREAD_STOP_TIMEOUT_MS = 5000
+
+# Файл сессии Pyrogram: без него сохраненной авторизации не доверяем
+SESSION_FILE = f"{DEFAULT_SESSION}.session"
 
 
 class MainWindowController:
@@ -24,8 +42,25 @@ class MainWindowController:
             window: Экземпляр главного окна
         """
         self.window = window
+        self._auth_cache = AuthCache()
+        self._showing_cached_auth = False
+        tracing.configure_from_settings(self.window.settings)
+        metrics.start_from_settings(self.window.settings)
+        # Реализация цикла выбирается до первой задачи Telegram
+        loop_policy.configure_from_settings(self.window.settings)
         self._connect_signals()
-        self._auto_check_auth()
+        
+        # Последнее известное состояние показывается сразу, без подключения к сети
+        self._restore_cached_auth()
+        
+        # Проверка авторизации стартует, когда стек Telegram загружен в фоне
+        self._warmup = ImportWarmup()
+        self._warmup.telegram_ready.connect(lambda elapsed_ms: self._auto_check_auth())
+    
+    def start_background_warmup(self) -> None:
+        """Запускает фоновую загрузку Pyrogram (вызывается после показа окна)"""
+        if not self._warmup.isRunning() and not self._warmup.isFinished():
+            self._warmup.start()
         
     def _connect_signals(self) -> None:
         """Подключает сигналы к слотам"""
@@ -39,11 +74,19 @@ class MainWindowController:
         self.window.file_mode_combo.currentTextChanged.connect(self.on_file_mode_changed)
         self.window.files_list_combo.currentTextChanged.connect(self.on_file_selected_from_list)
         self.window.prefix_input.textChanged.connect(self.on_prefix_changed)
+        self.window.thumbnails_checkbox.toggled.connect(self.on_upload_option_changed)
+        self.window.album_checkbox.toggled.connect(self.on_upload_option_changed)
+        self.window.streaming_checkbox.toggled.connect(self.on_upload_option_changed)
+        self.window.ordered_checkbox.toggled.connect(self.on_upload_option_changed)
+        self.window.order_combo.currentIndexChanged.connect(self.on_upload_option_changed)
+        self.window.bandwidth_input.editingFinished.connect(self.on_bandwidth_changed)
         self.window.load_chats_button.clicked.connect(self.load_chats)
         self.window.chat_search_input.textChanged.connect(self.filter_chats)
         self.window.chat_list_widget.itemClicked.connect(self.on_chat_selected)
         self.window.start_button.clicked.connect(self.start_upload)
         self.window.stop_button.clicked.connect(self.stop_upload)
+        self.window.tracing_checkbox.toggled.connect(self.on_tracing_toggled)
+        self.window.export_trace_button.clicked.connect(self.export_trace)
         
         # Подключаем Enter для подтверждения кода
         self.window.code_input.returnPressed.connect(self.confirm_code)
@@ -56,6 +99,34 @@ class MainWindowController:
                 self.window.phone_input.text()]):
             self.check_authorization()
     
+    def _restore_cached_auth(self) -> None:
+        """Показывает сохраненного пользователя и список чатов до проверки в сети"""
+        api_id = self.window.api_id_input.text()
+        phone = self.window.phone_input.text()
+        if not api_id or not phone or not os.path.exists(SESSION_FILE):
+            return
+        
+        cached = self._auth_cache.load(api_id, phone)
+        if not cached:
+            return
+        
+        self._showing_cached_auth = True
+        self._update_auth_ui("authorized", self._format_user(cached['user']))
+        self.window.log_message(f"👤 Авторизован как {display_name(cached['user'])} "
+                                f"(сохраненные данные, проверяем в фоне...)")
+        
+        chats = cached.get('chats') or []
+        if chats:
+            self.window.chats_list = chats
+            self._update_chat_list()
+            self.window.chat_load_status.setText(f"Из кэша: {len(chats)} чатов")
+        self._restore_selected_chat()
+    
+    def _format_user(self, user: dict) -> str:
+        """Имя пользователя для статуса авторизации (с отметкой Premium)"""
+        name = display_name(user)
+        return f"{name} ⭐ Premium" if user.get('is_premium') else name
+    
     # Методы авторизации
     def check_authorization(self) -> None:
         """Проверяет статус авторизации"""
@@ -68,16 +139,17 @@ class MainWindowController:
         
         # Останавливаем предыдущий поток если он существует
         if self.window.auth_thread and self.window.auth_thread.isRunning():
-            self.window.auth_thread.terminate()
-            self.window.auth_thread.wait()
+            self._stop_thread(self.window.auth_thread)
         
         # Используем отдельный класс для проверки
+        from core.auth import TelegramAuthChecker
         self.window.auth_thread = TelegramAuthChecker(
             int(self.window.api_id_input.text()),
             self.window.api_hash_input.text(),
             self.window.phone_input.text()
         )
         self.window.auth_thread.step_completed.connect(self._on_auth_step)
+        self.window.auth_thread.user_verified.connect(self._on_user_verified)
         self.window.auth_thread.error_occurred.connect(self._on_auth_error)
         self.window.auth_thread.finished.connect(self._on_auth_thread_finished)
         self.window.auth_thread.start()
@@ -93,16 +165,17 @@ class MainWindowController:
         
         # Останавливаем предыдущий поток если он существует
         if self.window.auth_thread and self.window.auth_thread.isRunning():
-            self.window.auth_thread.terminate()
-            self.window.auth_thread.wait()
+            self._stop_thread(self.window.auth_thread)
         
         # Создаем поток для полной авторизации
+        from core.auth import TelegramAuth
         self.window.auth_thread = TelegramAuth(
             int(self.window.api_id_input.text()),
             self.window.api_hash_input.text(),
             self.window.phone_input.text()
         )
         self.window.auth_thread.step_completed.connect(self._on_auth_step)
+        self.window.auth_thread.user_verified.connect(self._on_user_verified)
         self.window.auth_thread.error_occurred.connect(self._on_auth_error)
         self.window.auth_thread.finished.connect(self._on_auth_thread_finished)
         self.window.auth_thread.start()
@@ -133,19 +206,24 @@ class MainWindowController:
         """Сбрасывает авторизацию"""
         # Останавливаем все активные потоки
         if self.window.auth_thread and self.window.auth_thread.isRunning():
-            self.window.auth_thread.terminate()
-            self.window.auth_thread.wait()
+            self._stop_thread(self.window.auth_thread)
+            self.window.auth_thread = None
         
         if self.window.upload_thread and self.window.upload_thread.isRunning():
+            # Флаг остановки, чтобы ошибки отмены не уходили на повтор
             self.window.upload_thread.stop_upload()
-            self.window.upload_thread.wait()
+            self._stop_thread(self.window.upload_thread)
+            self.window.upload_thread = None
         
         if self.window.chat_loader_thread and self.window.chat_loader_thread.isRunning():
-            self.window.chat_loader_thread.terminate()
-            self.window.chat_loader_thread.wait()
+            self._stop_thread(self.window.chat_loader_thread)
+            self.window.chat_loader_thread = None
+        
+        # Соединения загрузки авторизованы ключом сбрасываемой сессии
+        self._close_upload_sessions()
         
         # Удаляем файл сессии
-        session_file = "uploader_session.session"
+        session_file = SESSION_FILE
         max_attempts = 5
         for attempt in range(max_attempts):
             try:
@@ -167,11 +245,17 @@ class MainWindowController:
                 print(f"[RESET] Ошибка удаления файла сессии: {e}")
                 break
         
+        # Кэши пиров и авторизации привязаны к аккаунту - очищаем вместе с сессией
+        PeerCache().clear()
+        self._auth_cache.clear()
+        self._showing_cached_auth = False
+        
         # Сбрасываем состояние UI
         self.window.phone_code_hash = None
         self._update_auth_ui("not_authorized")
         
         # Очищаем список чатов
+        self.window.chats_list = []
         self.window.chat_list_widget.clear()
         self.window.selected_chat_label.setText("Чат не выбран")
         self.window.chat_load_status.setText("Сначала авторизуйтесь")
@@ -325,6 +409,47 @@ class MainWindowController:
         """Автосохранение префикса при изменении"""
         self.window.save_settings()
     
+    def on_upload_option_changed(self) -> None:
+        """Автосохранение дополнительных параметров загрузки"""
+        self.window.save_settings()
+    
+    def on_bandwidth_changed(self) -> None:
+        """Сохраняет лимит скорости и применяет его к идущей загрузке"""
+        self.window.save_settings()
+        upload_thread = self.window.upload_thread
+        if upload_thread and upload_thread.isRunning():
+            schedule = schedule_from_settings(self.window.settings)
+            upload_thread.set_bandwidth_schedule(schedule)
+            rate = schedule.rate_at()
+            label = f"{rate / (1024 * 1024):.1f} МБ/с" if rate else "без ограничения"
+            self.window.log_message(f"📶 Лимит скорости: {label}")
+    
+    # Методы трассировки
+    def on_tracing_toggled(self, enabled: bool) -> None:
+        """Включает или выключает трассировку этапов"""
+        self.window.save_settings()
+        tracing.tracer.configure(enabled)
+        self.window.log_message("🧭 Трассировка этапов " + ("включена" if enabled else "выключена"))
+    
+    def export_trace(self) -> None:
+        """Сохраняет собранную трассировку в файл Chrome Trace"""
+        if not len(tracing.tracer):
+            QMessageBox.information(self.window, "Трассировка",
+                                    "Трассировка пуста. Включите ее и выполните загрузку.")
+            return
+        
+        file_path, _ = QFileDialog.getSaveFileName(
+            self.window, "Сохранить трассировку", "upload_trace.json", "Chrome Trace (*.json)"
+        )
+        if not file_path:
+            return
+        
+        try:
+            count = tracing.tracer.export_chrome_trace(file_path)
+            self.window.log_message(f"💾 Трассировка сохранена: {file_path} ({count} интервалов)")
+        except OSError as e:
+            QMessageBox.warning(self.window, "Ошибка", f"Не удалось сохранить трассировку:\n{e}")
+    
     # Методы работы с чатами
     def load_chats(self) -> None:
         """Загружает список чатов"""
@@ -336,9 +461,9 @@ class MainWindowController:
         self.window.load_chats_button.setText("Загружаем...")
         
         if self.window.chat_loader_thread and self.window.chat_loader_thread.isRunning():
-            self.window.chat_loader_thread.terminate()
-            self.window.chat_loader_thread.wait()
+            self._stop_thread(self.window.chat_loader_thread)
         
+        from core.chat_loader import ChatLoader
         self.window.chat_loader_thread = ChatLoader(
             int(self.window.api_id_input.text()),
             self.window.api_hash_input.text()
@@ -404,6 +529,11 @@ class MainWindowController:
         
         self.window.log_message("🚀 Начинаем загрузку видео...")
         
+        # Дополнительные параметры (повторы, превью, пул аккаунтов) из настроек
+        options = UploadOptions.from_settings(self.window.settings)
+        if options.accounts:
+            self.window.log_message(f"👥 Дополнительных аккаунтов в пуле: {len(options.accounts)}")
+        
         # Обновляем UI
         self.window.start_button.setEnabled(False)
         self.window.stop_button.setEnabled(True)
@@ -413,6 +543,7 @@ class MainWindowController:
         self.window.file_progress_bar.setValue(0)
         
         # Создаем и запускаем поток загрузки
+        from core.uploader import VideoUploader
         self.window.upload_thread = VideoUploader(
             int(self.window.api_id_input.text()),
             self.window.api_hash_input.text(),
@@ -420,7 +551,8 @@ class MainWindowController:
             video_folder,
             delay_seconds,
             max_concurrent,
-            prefix_text
+            prefix_text,
+            options=options
         )
         
         # Подключаем сигналы
@@ -439,18 +571,43 @@ class MainWindowController:
             self.window.stop_button.setEnabled(False)
             self.window.stop_button.setText("Останавливаем...")
             
-            # Останавливаем поток
+            # Отменяем задачи загрузки; интерфейс сбросится по сигналу finished,
+            # который поток отправит сам после отмены
             self.window.upload_thread.stop_upload()
-            
-            # Ждем завершения с таймаутом
-            if not self.window.upload_thread.wait(5000):  # 5 секунд
-                self.window.log_message("⚠️ Принудительное завершение потока загрузки")
-                self.window.upload_thread.terminate()
-                self.window.upload_thread.wait()
-            
-            self._reset_ui_after_stop()
     
     # Приватные методы
+    def _stop_thread(self, thread) -> None:
+        """
+        Отменяет задачу Telegram и ждет ее завершения
+        
+        Args:
+            thread: Задача в общем цикле событий (LoopTask)
+        """
+        # Обработчики завершения старого потока относятся к нему, а не к новому
+        try:
+            thread.finished.disconnect()
+        except TypeError:
+            pass
+        thread.finished.connect(thread.deleteLater)
+        
+        thread.cancel()
+        if not thread.wait(THREAD_STOP_TIMEOUT_MS):
+            print(f"[UI] Задача {type(thread).__name__} не завершилась за "
+                  f"{THREAD_STOP_TIMEOUT_MS} мс, завершится в фоне")
+    
+    def _close_upload_sessions(self) -> None:
+        """Закрывает соединения пула загрузки (если загрузка уже запускалась)"""
+        session_pool = sys.modules.get("core.session_pool")
+        if session_pool is None:
+            return
+        future = event_loop.submit(session_pool.upload_sessions.close_all())
+        try:
+            closed = future.result(THREAD_STOP_TIMEOUT_MS / 1000)
+            print(f"[RESET] Закрыто соединений загрузки: {closed}")
+        except concurrent.futures.TimeoutError:
+            print(f"[RESET] Соединения загрузки не закрылись за {THREAD_STOP_TIMEOUT_MS} мс, "
+                  f"закроются в фоне")
+    
     def _validate_api_settings(self) -> bool:
         """Проверяет настройки API"""
         valid, error_msg = self.window.settings.validate_api_settings(
@@ -572,7 +729,7 @@ class MainWindowController:
             self.window.log_message("📱 Код отправлен на ваш телефон")
             
         elif step == "auth_success":
-            self._update_auth_ui("authorized", data)
+            self._update_auth_ui("authorized", self._cached_user_label(data))
             self.window.log_message(f"✅ Успешная авторизация: {data}")
             self.window.save_settings()
             # Автоматически загружаем чаты после успешной авторизации
@@ -583,13 +740,40 @@ class MainWindowController:
             QMessageBox.information(self.window, "2FA", "Введите пароль двухфакторной аутентификации в поле '2FA' и нажмите 'OK'")
             
         elif step == "already_authorized":
-            self._update_auth_ui("authorized", data)
+            self._showing_cached_auth = False
+            self._update_auth_ui("authorized", self._cached_user_label(data))
             self.window.log_message(f"✅ Уже авторизован: {data}")
             # Автоматически загружаем чаты если уже авторизованы
             self._auto_load_chats()
             
         elif step == "not_authorized":
+            if self._showing_cached_auth:
+                # Сохраненная сессия отозвана - понижаем UI и забываем кэш
+                self._showing_cached_auth = False
+                self._auth_cache.forget(self.window.api_id_input.text(), self.window.phone_input.text())
+                self.window.chats_list = []
+                self.window.chat_list_widget.clear()
+                self.window.log_message("⚠️ Сохраненная авторизация недействительна, войдите заново")
             self._update_auth_ui("not_authorized")
+            
+        elif step == "check_failed":
+            if self._showing_cached_auth:
+                # Сеть недоступна - сохраненное состояние остается в силе
+                self._reset_auth_buttons()
+                self.window.log_message(f"⚠️ Не удалось проверить авторизацию, "
+                                        f"показаны сохраненные данные: {data}")
+            else:
+                self._update_auth_ui("not_authorized")
+                self.window.log_message(f"⚠️ Не удалось проверить авторизацию: {data}")
+    
+    def _cached_user_label(self, name: str) -> str:
+        """Имя из сигнала авторизации с отметкой Premium из кэша"""
+        cached = self._auth_cache.load(self.window.api_id_input.text(), self.window.phone_input.text())
+        return self._format_user(cached['user']) if cached else name
+    
+    def _on_user_verified(self, user: dict) -> None:
+        """Сохраняет подтвержденного пользователя для следующего запуска"""
+        self._auth_cache.save_user(self.window.api_id_input.text(), self.window.phone_input.text(), user)
     
     def _on_auth_error(self, error: str) -> None:
         """Обработка ошибок авторизации"""
@@ -632,7 +816,8 @@ class MainWindowController:
     def _on_chats_loaded(self, chats: list) -> None:
         """Обработчик загрузки чатов"""
         self.window.chats_list = chats
-        self._update_chat_list()
+        self._update_chat_list(self.window.chat_search_input.text().lower())
+        self._auth_cache.save_chats(self.window.api_id_input.text(), self.window.phone_input.text(), chats)
         self.window.log_message(f"📋 Загружено {len(chats)} чатов")
     
     def _on_chat_load_error(self, error: str) -> None:
@@ -684,7 +869,12 @@ class MainWindowController:
         # Загружаем чаты
         self.load_chats()
         
-        # Восстанавливаем выбранный чат из настроек
+        # Чат мог быть уже восстановлен из сохраненного состояния при запуске
+        if not self.window.selected_chat_id:
+            self._restore_selected_chat()
+    
+    def _restore_selected_chat(self) -> None:
+        """Восстанавливает выбранный чат из настроек"""
         saved_chat_id = self.window.settings.get("selected_chat_id")
         saved_chat_name = self.window.settings.get("selected_chat_name", "")
         
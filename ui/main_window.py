@@ -2,7 +2,7 @@
 Основное окно приложения
 """
 import os
-from typing import Optional, List, Dict, Any
+from typing import TYPE_CHECKING, Optional, List, Dict, Any
 from datetime import datetime
 from PyQt5.QtWidgets import (QMainWindow, QVBoxLayout, QHBoxLayout, QWidget, 
                              QPushButton, QLabel, QLineEdit, QTextEdit, 
@@ -12,10 +12,14 @@ from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QFont
 
 from config.settings import Settings
-from core.auth import TelegramAuth, TelegramAuthChecker  
-from core.chat_loader import ChatLoader
-from core.uploader import VideoUploader
-from ui.styles import get_main_stylesheet, get_button_style
+from core.ordering import ORDER_BY_NAME, ORDER_POLICY_LABELS
+from ui.styles import get_main_stylesheet, get_button_style, get_checkbox_style
+
+if TYPE_CHECKING:
+    # Потоки Telegram тянут Pyrogram - окно не должно ждать его загрузки
+    from core.auth import TelegramAuth
+    from core.chat_loader import ChatLoader
+    from core.uploader import VideoUploader
 
 
 class MainWindow(QMainWindow):
@@ -28,9 +32,9 @@ class MainWindow(QMainWindow):
         # Инициализация данных
         self.settings = Settings()
         self.phone_code_hash: Optional[str] = None
-        self.auth_thread: Optional[TelegramAuth] = None
-        self.upload_thread: Optional[VideoUploader] = None
-        self.chat_loader_thread: Optional[ChatLoader] = None
+        self.auth_thread: Optional["TelegramAuth"] = None
+        self.upload_thread: Optional["VideoUploader"] = None
+        self.chat_loader_thread: Optional["ChatLoader"] = None
         self.chats_list: List[Dict[str, Any]] = []
         self.code_timer: Optional[QTimer] = None
         self.time_left = 0
@@ -503,6 +507,21 @@ class MainWindow(QMainWindow):
         delay_layout.addWidget(self.delay_input)
         settings_layout.addLayout(delay_layout)
         
+        # Лимит скорости
+        bandwidth_layout = QVBoxLayout()
+        bandwidth_label = QLabel("📶 Лимит (МБ/с):")
+        bandwidth_label.setStyleSheet("color: #374151; font-weight: 600;")
+        bandwidth_layout.addWidget(bandwidth_label)
+        
+        self.bandwidth_input = QLineEdit()
+        self.bandwidth_input.setText("0")
+        self.bandwidth_input.setMaximumWidth(80)
+        self.bandwidth_input.setToolTip("Общий лимит скорости всех загрузок, 0 - без ограничения. "
+                                        "Применяется сразу, в том числе во время загрузки. "
+                                        "Расписание по дням и часам задается в settings.json (bandwidth_schedule)")
+        bandwidth_layout.addWidget(self.bandwidth_input)
+        settings_layout.addLayout(bandwidth_layout)
+        
         settings_layout.addStretch()
         
         # Скорость
@@ -522,6 +541,20 @@ class MainWindow(QMainWindow):
         speed_layout.addWidget(self.speed_combo)
         settings_layout.addLayout(speed_layout)
         
+        # Порядок загрузки
+        order_layout = QVBoxLayout()
+        order_label = QLabel("🔢 Порядок:")
+        order_label.setStyleSheet("color: #374151; font-weight: 600;")
+        order_layout.addWidget(order_label)
+        
+        self.order_combo = QComboBox()
+        for policy, label in ORDER_POLICY_LABELS.items():
+            self.order_combo.addItem(label, policy)
+        self.order_combo.setToolTip("Сначала большие - пакет завершается быстрее при нескольких потоках; "
+                                    "сначала маленькие - первые файлы появляются в чате раньше")
+        order_layout.addWidget(self.order_combo)
+        settings_layout.addLayout(order_layout)
+        
         upload_layout.addLayout(settings_layout)
         
         # Дополнительные настройки
@@ -530,29 +563,32 @@ class MainWindow(QMainWindow):
         self.send_filename_checkbox = QCheckBox("Отправлять название файла в чат")
         self.send_filename_checkbox.setChecked(True)  # По умолчанию включено
         self.send_filename_checkbox.setToolTip("Если включено, название файла с префиксом будет отправлено как сообщение в чат")
-        self.send_filename_checkbox.setStyleSheet("""
-            QCheckBox {
-                color: #374151;
-                font-weight: 600;
-                spacing: 8px;
-            }
-            QCheckBox::indicator {
-                width: 18px;
-                height: 18px;
-                border: 2px solid #d1d5db;
-                border-radius: 4px;
-                background: white;
-            }
-            QCheckBox::indicator:checked {
-                background: #10b981;
-                border-color: #059669;
-                image: url(data:image/svg+xml;base64,PHN2ZyB3aWR0aD0iMTIiIGhlaWdodD0iOSIgdmlld0JveD0iMCAwIDEyIDkiIGZpbGw9Im5vbmUiIHhtbG5zPSJodHRwOi8vd3d3LnczLm9yZy8yMDAwL3N2ZyI+CjxwYXRoIGQ9Ik0xMC42IDEuNEw0LjMgNy43TDEuNCA0LjgiIHN0cm9rZT0id2hpdGUiIHN0cm9rZS13aWR0aD0iMiIgc3Ryb2tlLWxpbmVjYXA9InJvdW5kIiBzdHJva2UtbGluZWpvaW49InJvdW5kIi8+Cjwvc3ZnPgo=);
-            }
-            QCheckBox::indicator:hover {
-                border-color: #9ca3af;
-            }
-        """)
+        self.send_filename_checkbox.setStyleSheet(get_checkbox_style())
         additional_layout.addWidget(self.send_filename_checkbox)
+        
+        self.thumbnails_checkbox = QCheckBox("Создавать превью")
+        self.thumbnails_checkbox.setChecked(True)
+        self.thumbnails_checkbox.setToolTip("Если включено, для каждого видео создается превью (ключевой кадр, до 320px) и кэшируется")
+        self.thumbnails_checkbox.setStyleSheet(get_checkbox_style())
+        additional_layout.addWidget(self.thumbnails_checkbox)
+        
+        self.album_checkbox = QCheckBox("Альбомы по 10")
+        self.album_checkbox.setChecked(False)
+        self.album_checkbox.setToolTip("Если включено, небольшие видео отправляются альбомами до 10 штук - меньше сообщений и ограничений FloodWait")
+        self.album_checkbox.setStyleSheet(get_checkbox_style())
+        additional_layout.addWidget(self.album_checkbox)
+        
+        self.streaming_checkbox = QCheckBox("Перепаковка для стриминга")
+        self.streaming_checkbox.setChecked(False)
+        self.streaming_checkbox.setToolTip("Если включено, MKV/AVI/WMV и MP4 без faststart перепаковываются в потоковый MP4 (без перекодирования, если позволяют кодеки)")
+        self.streaming_checkbox.setStyleSheet(get_checkbox_style())
+        additional_layout.addWidget(self.streaming_checkbox)
+        
+        self.ordered_checkbox = QCheckBox("Сохранять порядок в чате")
+        self.ordered_checkbox.setChecked(False)
+        self.ordered_checkbox.setToolTip("Если включено, файлы загружаются параллельно, а сообщения появляются в чате строго в порядке очереди")
+        self.ordered_checkbox.setStyleSheet(get_checkbox_style())
+        additional_layout.addWidget(self.ordered_checkbox)
         additional_layout.addStretch()
         
         upload_layout.addLayout(additional_layout)
@@ -681,6 +717,23 @@ class MainWindow(QMainWindow):
         """)
         log_layout.addWidget(self.log_output)
         
+        # Трассировка этапов загрузки (для разбора медленных пакетов)
+        trace_layout = QHBoxLayout()
+        trace_layout.setSpacing(8)
+        
+        self.tracing_checkbox = QCheckBox("Трассировка этапов")
+        self.tracing_checkbox.setChecked(False)
+        self.tracing_checkbox.setToolTip("Если включено, длительность этапов (метаданные, части, отправка, задержки) записывается в кольцевой буфер")
+        self.tracing_checkbox.setStyleSheet(get_checkbox_style())
+        trace_layout.addWidget(self.tracing_checkbox)
+        
+        self.export_trace_button = QPushButton("💾 Экспорт трассировки")
+        self.export_trace_button.setStyleSheet(get_button_style('blue'))
+        self.export_trace_button.setToolTip("Сохраняет трассировку в JSON для chrome://tracing или ui.perfetto.dev")
+        trace_layout.addWidget(self.export_trace_button)
+        
+        log_layout.addLayout(trace_layout)
+        
         self.right_layout.addWidget(log_group)
         
     def _create_right_panel(self) -> None:
@@ -829,11 +882,19 @@ class MainWindow(QMainWindow):
         # Загружаем настройки файлов
         self.file_mode_combo.setCurrentIndex(self.settings.get("file_mode", 0))
         self.send_filename_checkbox.setChecked(self.settings.get("send_filename", True))
+        self.thumbnails_checkbox.setChecked(self.settings.get("generate_thumbnails", True))
+        self.album_checkbox.setChecked(self.settings.get("album_mode", False))
+        self.streaming_checkbox.setChecked(self.settings.get("prepare_streaming", False))
+        self.ordered_checkbox.setChecked(self.settings.get("ordered_delivery", False))
+        self.tracing_checkbox.setChecked(self.settings.get("tracing_enabled", False))
         self.selected_files = self.settings.get("selected_files", [])
         
         # Загружаем настройки загрузки
         self.delay_input.setText(str(self.settings.get("delay_seconds", "2")))
+        self.bandwidth_input.setText(str(self.settings.get("bandwidth_limit_mb", 0)))
         self.speed_combo.setCurrentIndex(self.settings.get("speed_mode", 1))
+        order_index = self.order_combo.findData(self.settings.get("order_policy", ORDER_BY_NAME))
+        self.order_combo.setCurrentIndex(max(0, order_index))
         
         # Восстанавливаем отображение выбранных файлов
         if self.selected_files:
@@ -867,11 +928,21 @@ class MainWindow(QMainWindow):
         # Сохраняем настройки файлов
         self.settings.set("file_mode", self.file_mode_combo.currentIndex())
         self.settings.set("send_filename", self.send_filename_checkbox.isChecked())
+        self.settings.set("generate_thumbnails", self.thumbnails_checkbox.isChecked())
+        self.settings.set("album_mode", self.album_checkbox.isChecked())
+        self.settings.set("prepare_streaming", self.streaming_checkbox.isChecked())
+        self.settings.set("ordered_delivery", self.ordered_checkbox.isChecked())
+        self.settings.set("tracing_enabled", self.tracing_checkbox.isChecked())
         self.settings.set("selected_files", self.selected_files)
         
         # Сохраняем настройки загрузки
         self.settings.set("delay_seconds", self.delay_input.text())
+        try:
+            self.settings.set("bandwidth_limit_mb", max(0.0, float(self.bandwidth_input.text().replace(",", "."))))
+        except ValueError:
+            pass
         self.settings.set("speed_mode", self.speed_combo.currentIndex())
+        self.settings.set("order_policy", self.order_combo.currentData())
         
         # Сохраняем выбранный чат
         if hasattr(self, 'selected_chat_id') and self.selected_chat_id:
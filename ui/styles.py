@@ -209,4 +209,30 @@ def get_button_style(color_scheme: str) -> str:
             background: #d1d5db;
             color: #9ca3af;
         }}
-    """
\ No newline at end of file
+    """
+
+
+def get_checkbox_style() -> str:
+    """Возвращает стиль для чекбоксов настроек загрузки"""
+    return """
+        QCheckBox {
+            color: #374151;
+            font-weight: 600;
+            spacing: 8px;
+        }
+        QCheckBox::indicator {
+            width: 18px;
+            height: 18px;
+            border: 2px solid #d1d5db;
+            border-radius: 4px;
+            background: white;
+        }
+        QCheckBox::indicator:checked {
+            background: #10b981;
+            border-color: #059669;
+            image: url(data:image/svg+xml;base64,PHN2ZyB3aWR0aD0iMTIiIGhlaWdodD0iOSIgdmlld0JveD0iMCAwIDEyIDkiIGZpbGw9Im5vbmUiIHhtbG5zPSJodHRwOi8vd3d3LnczLm9yZy8yMDAwL3N2ZyI+CjxwYXRoIGQ9Ik0xMC42IDEuNEw0LjMgNy43TDEuNCA0LjgiIHN0cm9rZT0id2hpdGUiIHN0cm9rZS13aWR0aD0iMiIgc3Ryb2tlLWxpbmVjYXA9InJvdW5kIiBzdHJva2UtbGluZWpvaW49InJvdW5kIi8+Cjwvc3ZnPgo=);
+        }
+        QCheckBox::indicator:hover {
+            border-color: #9ca3af;
+        }
+    """
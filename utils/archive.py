@@ -0,0 +1,418 @@
+"""
+Утилиты для чтения видео прямо из архивов (zip, tar) без распаковки на диск
+
+Файл внутри архива адресуется путем, в котором архив выступает как папка:
+/data/batch.zip/day1/video.mp4. Имя, расширение и MIME-тип такого пути
+определяются как у обычного файла, а размер, чтение и метаданные берутся
+из заголовков архива.
+
+Несжатые файлы (zip с методом STORED, обычный tar) лежат в архиве одним
+непрерывным блоком: их можно читать по смещению (pread), как обычный файл.
+Сжатые файлы (deflate в zip, tar.gz/bz2/xz) читаются только потоком.
+"""
+import io
+import os
+import posixpath
+import struct
+import tarfile
+import threading
+import zipfile
+from typing import BinaryIO, Dict, Iterable, List, Optional, Tuple, Union
+
+
+# Расширения архивов, в которых ищутся видео
+ARCHIVE_EXTENSIONS = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+
+# Локальный заголовок файла zip (перед данными файла)
+_ZIP_LOCAL_HEADER = struct.Struct("<4sHHHHHIIIHH")
+_ZIP_LOCAL_SIGNATURE = b"PK\x03\x04"
+
+# Размер блока, которым пропускаются данные при потоковом чтении
+_SKIP_CHUNK = 1024 * 1024
+
+
+class ArchiveMember:
+    """
+    Файл внутри архива
+
+    data_offset задан, только если данные файла лежат в архиве без сжатия
+    одним блоком - тогда файл можно читать по смещению.
+    """
+
+    def __init__(self, archive: str, name: str, size: int,
+                 data_offset: Optional[int], info: Union[zipfile.ZipInfo, tarfile.TarInfo]):
+        """
+        Инициализация описания файла
+
+        Args:
+            archive: Путь к архиву
+            name: Имя файла в архиве (через '/')
+            size: Размер файла в байтах
+            data_offset: Смещение данных в архиве (None - файл сжат)
+            info: Заголовок файла (ZipInfo или TarInfo)
+        """
+        self.archive = archive
+        self.name = name
+        self.size = size
+        self.data_offset = data_offset
+        self.info = info
+
+    @property
+    def seekable(self) -> bool:
+        """Можно ли читать файл по смещению без распаковки предыдущих данных"""
+        return self.data_offset is not None
+
+    @property
+    def path(self) -> str:
+        """Путь файла, в котором архив выступает как папка"""
+        return os.path.join(self.archive, *self.name.split("/"))
+
+
+class _RangeReader(io.RawIOBase):
+    """Чтение непрерывного блока архива как отдельного файла"""
+
+    def __init__(self, path: str, offset: int, size: int):
+        """
+        Открывает архив
+
+        Args:
+            path: Путь к архиву
+            offset: Смещение начала блока
+            size: Размер блока
+        """
+        super().__init__()
+        self._file = open(path, 'rb', buffering=0)
+        self._offset = offset
+        self._size = size
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        """Читает данные блока с текущей позиции"""
+        view = memoryview(buffer)[:max(0, self._size - self._position)]
+        if not len(view):
+            return 0
+        self._file.seek(self._offset + self._position)
+        count = self._file.readinto(view) or 0
+        self._position += count
+        return count
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        """Переходит к позиции внутри блока"""
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self._size
+        self._position = max(0, offset)
+        return self._position
+
+    def tell(self) -> int:
+        return self._position
+
+    def close(self) -> None:
+        self._file.close()
+        super().close()
+
+
+class _TarMemberReader(io.RawIOBase):
+    """Потоковое чтение файла из сжатого tar (закрывает и сам архив)"""
+
+    def __init__(self, member: ArchiveMember):
+        """
+        Открывает архив и файл в нем
+
+        Args:
+            member: Файл в архиве
+        """
+        super().__init__()
+        self._tar = tarfile.open(member.archive, "r:*")
+        self._stream = self._tar.extractfile(member.info)
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        return self._stream.readinto(buffer)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        # Переход вперед распаковывает пропускаемые данные, назад - с начала архива
+        return self._stream.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._stream.tell()
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            self._tar.close()
+            super().close()
+
+
+# Кэш оглавлений: путь архива -> (размер и время изменения, файлы по имени)
+_indexes: Dict[str, Tuple[Tuple[int, int], Dict[str, ArchiveMember]]] = {}
+_indexes_lock = threading.Lock()
+
+
+def is_archive(path: str) -> bool:
+    """Похож ли путь на поддерживаемый архив (по расширению)"""
+    return path.lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+def read_index(archive: str) -> Dict[str, ArchiveMember]:
+    """
+    Читает оглавление архива (только заголовки файлов)
+
+    Оглавление кэшируется, пока архив не изменится. Для tar.gz/bz2/xz
+    заголовки разбросаны по сжатому потоку, поэтому первое чтение
+    оглавления распаковывает архив целиком (без записи на диск).
+
+    Args:
+        archive: Путь к архиву
+
+    Returns:
+        Файлы архива по имени (через '/', без папок)
+    """
+    stat = os.stat(archive)
+    fingerprint = (stat.st_size, stat.st_mtime_ns)
+    with _indexes_lock:
+        cached = _indexes.get(archive)
+        if cached and cached[0] == fingerprint:
+            return cached[1]
+        if archive.lower().endswith('.zip'):
+            members = _read_zip_index(archive)
+        else:
+            members = _read_tar_index(archive)
+        _indexes[archive] = (fingerprint, {member.name: member for member in members})
+        return _indexes[archive][1]
+
+
+def list_members(archive: str, extensions: Iterable[str]) -> List[str]:
+    """
+    Находит в архиве файлы с указанными расширениями
+
+    Args:
+        archive: Путь к архиву
+        extensions: Расширения в нижнем регистре (с точкой)
+
+    Returns:
+        Пути файлов (архив как папка) в порядке имен
+    """
+    extensions = tuple(extensions)
+    return [member.path for name, member in sorted(read_index(archive).items())
+            if posixpath.splitext(name)[1].lower() in extensions]
+
+
+def split_member_path(path: str) -> Optional[Tuple[str, str]]:
+    """
+    Разделяет путь файла в архиве на путь архива и имя файла в нем
+
+    Args:
+        path: Путь (архив как папка)
+
+    Returns:
+        (путь к архиву, имя в архиве) или None, если это не файл в архиве
+    """
+    if os.path.exists(path):
+        return None
+    parts = []
+    parent = path
+    while True:
+        parent, tail = os.path.split(parent)
+        if not tail:
+            return None
+        parts.append(tail)
+        if os.path.isfile(parent):
+            if not is_archive(parent):
+                return None
+            return parent, "/".join(reversed(parts))
+
+
+def find_member(path: str) -> Optional[ArchiveMember]:
+    """
+    Находит файл в архиве по пути
+
+    Args:
+        path: Путь (архив как папка)
+
+    Returns:
+        Описание файла или None, если путь не указывает на файл в архиве
+    """
+    split = split_member_path(path)
+    if split is None:
+        return None
+    archive, name = split
+    try:
+        return read_index(archive).get(name)
+    except (OSError, zipfile.BadZipFile, tarfile.TarError):
+        return None
+
+
+def is_member_path(path: str) -> bool:
+    """Указывает ли путь на файл внутри архива"""
+    return find_member(path) is not None
+
+
+def get_file_size(path: str) -> int:
+    """
+    Размер обычного файла или файла в архиве
+
+    Args:
+        path: Путь
+
+    Returns:
+        Размер в байтах (OSError, если файла нет)
+    """
+    member = find_member(path)
+    if member is not None:
+        return member.size
+    return os.path.getsize(path)
+
+
+def open_member(member: ArchiveMember) -> BinaryIO:
+    """
+    Открывает файл в архиве для чтения
+
+    Несжатый файл читается прямо из блока архива, сжатый - через
+    распаковку потока (переход назад начинает распаковку заново).
+
+    Args:
+        member: Файл в архиве
+
+    Returns:
+        Файловый объект (закрывает и архив)
+    """
+    if member.seekable:
+        return _RangeReader(member.archive, member.data_offset, member.size)
+    if isinstance(member.info, zipfile.ZipInfo):
+        # Архив остается открытым, пока открыт файл в нем
+        with zipfile.ZipFile(member.archive) as archive:
+            return archive.open(member.info)
+    return _TarMemberReader(member)
+
+
+def open_file(path: str) -> BinaryIO:
+    """
+    Открывает обычный файл или файл в архиве для чтения
+
+    Args:
+        path: Путь
+
+    Returns:
+        Файловый объект в бинарном режиме
+    """
+    member = find_member(path)
+    if member is not None:
+        return open_member(member)
+    return open(path, 'rb')
+
+
+def skip_stream(stream: BinaryIO, count: int, scratch: Optional[bytearray] = None) -> int:
+    """
+    Пропускает данные потока чтением (для потоков без быстрого перехода)
+
+    Args:
+        stream: Файловый объект
+        count: Сколько байт пропустить
+        scratch: Буфер для чтения (создается, если не передан)
+
+    Returns:
+        Сколько байт пропущено
+    """
+    scratch = scratch or bytearray(_SKIP_CHUNK)
+    view = memoryview(scratch)
+    skipped = 0
+    while skipped < count:
+        read = stream.readinto(view[:min(len(view), count - skipped)])
+        if not read:
+            break
+        skipped += read
+    return skipped
+
+
+def ffmpeg_input(path: str) -> Optional[str]:
+    """
+    Вход ffmpeg для обычного файла или файла в архиве
+
+    Несжатый файл в архиве передается через протокол subfile (диапазон
+    байт архива), сжатый ffmpeg прочитать не может.
+
+    Args:
+        path: Путь
+
+    Returns:
+        Путь или URL для ffmpeg -i, либо None
+    """
+    member = find_member(path)
+    if member is None:
+        return path
+    if not member.seekable:
+        return None
+    return (f"subfile,,start,{member.data_offset},"
+            f"end,{member.data_offset + member.size},,:{member.archive}")
+
+
+def _read_zip_index(archive: str) -> List[ArchiveMember]:
+    """Читает центральный каталог zip и смещения несжатых файлов"""
+    members = []
+    with open(archive, 'rb') as raw, zipfile.ZipFile(raw) as zf:
+        for info in zf.infolist():
+            name = _normalize_name(info.filename)
+            if info.is_dir() or not name:
+                continue
+            if info.flag_bits & 0x1:
+                print(f"[ARCHIVE] Зашифрованный файл пропущен: {os.path.basename(archive)}/{name}")
+                continue
+            data_offset = None
+            if info.compress_type == zipfile.ZIP_STORED:
+                data_offset = _zip_data_offset(raw, info)
+            members.append(ArchiveMember(archive, name, info.file_size, data_offset, info))
+    return members
+
+
+def _zip_data_offset(raw: BinaryIO, info: zipfile.ZipInfo) -> Optional[int]:
+    """Смещение данных файла zip (длины полей локального заголовка могут отличаться от каталога)"""
+    raw.seek(info.header_offset)
+    header = raw.read(_ZIP_LOCAL_HEADER.size)
+    if len(header) < _ZIP_LOCAL_HEADER.size:
+        return None
+    fields = _ZIP_LOCAL_HEADER.unpack(header)
+    if fields[0] != _ZIP_LOCAL_SIGNATURE:
+        return None
+    return info.header_offset + _ZIP_LOCAL_HEADER.size + fields[9] + fields[10]
+
+
+def _read_tar_index(archive: str) -> List[ArchiveMember]:
+    """Читает заголовки tar; в несжатом архиве данные файлов доступны по смещению"""
+    try:
+        tar = tarfile.open(archive, "r:")
+        compressed = False
+    except tarfile.ReadError:
+        tar = tarfile.open(archive, "r:*")
+        compressed = True
+
+    members = []
+    with tar:
+        for info in tar:
+            name = _normalize_name(info.name)
+            if not info.isreg() or not name:
+                continue
+            data_offset = None
+            if not compressed and not info.issparse():
+                data_offset = info.offset_data
+            members.append(ArchiveMember(archive, name, info.size, data_offset, info))
+    return members
+
+
+def _normalize_name(name: str) -> str:
+    """Имя файла в архиве без './', ведущих '/' и обратных слэшей"""
+    name = posixpath.normpath(name.replace("\\", "/")).lstrip("/")
+    return "" if name in (".", "..") or name.startswith("../") else name
@@ -0,0 +1,166 @@
+"""
+Утилиты для разбора структуры MP4/MOV файлов (ISO BMFF) без декодирования
+"""
+import struct
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+
+# Расширения контейнеров ISO BMFF
+MP4_EXTENSIONS = {".mp4", ".m4v", ".mov"}
+
+
+def iter_boxes(f: BinaryIO, start: int, end: Optional[int]) -> Iterator[Tuple[str, int, int]]:
+    """
+    Перебирает боксы MP4 на одном уровне вложенности
+
+    Args:
+        f: Файл, открытый в бинарном режиме
+        start: Смещение начала области
+        end: Смещение конца области (None - до конца файла)
+
+    Yields:
+        Кортежи (тип бокса, смещение данных, размер данных)
+    """
+    offset = start
+    while end is None or offset + 8 <= end:
+        f.seek(offset)
+        header = f.read(8)
+        if len(header) < 8:
+            return
+
+        size, box_type = struct.unpack(">I4s", header)
+        header_size = 8
+
+        if size == 1:
+            # 64-битный размер
+            large = f.read(8)
+            if len(large) < 8:
+                return
+            size = struct.unpack(">Q", large)[0]
+            header_size = 16
+        elif size == 0:
+            # Бокс до конца файла
+            if end is None:
+                f.seek(0, 2)
+                size = f.tell() - offset
+            else:
+                size = end - offset
+
+        if size < header_size:
+            return
+
+        yield box_type.decode("latin-1"), offset + header_size, size - header_size
+        offset += size
+
+
+def get_top_level_boxes(path: str) -> List[str]:
+    """
+    Возвращает список боксов верхнего уровня по порядку
+
+    Args:
+        path: Путь к файлу
+
+    Returns:
+        Список типов боксов (например, ['ftyp', 'moov', 'mdat'])
+    """
+    with open(path, 'rb') as f:
+        return [box_type for box_type, _, _ in iter_boxes(f, 0, None)]
+
+
+def is_faststart(path: str) -> Optional[bool]:
+    """
+    Проверяет, расположен ли индекс (moov) перед данными (mdat)
+
+    Только такие файлы Telegram может воспроизводить потоково,
+    не дожидаясь полной загрузки.
+
+    Args:
+        path: Путь к MP4/MOV файлу
+
+    Returns:
+        True/False или None, если файл не похож на MP4
+    """
+    try:
+        boxes = get_top_level_boxes(path)
+    except OSError:
+        return None
+
+    if "moov" not in boxes or "mdat" not in boxes:
+        return None
+    return boxes.index("moov") < boxes.index("mdat")
+
+
+def read_movie_header(f: BinaryIO, end: Optional[int] = None,
+                      skip_media: bool = True) -> Optional[Dict[str, Optional[int]]]:
+    """
+    Читает длительность и разрешение из индекса (moov) без декодирования
+
+    Читаются только заголовки боксов, mvhd и tkhd - несколько сотен байт.
+
+    Args:
+        f: Файл, открытый в бинарном режиме
+        end: Размер файла (None - до конца файла)
+        skip_media: Переходить через данные (mdat) к индексу в конце файла;
+            для потоков без быстрого перехода индекс ищется только перед данными
+
+    Returns:
+        Словарь duration, width, height или None, если индекс не найден
+    """
+    for box_type, offset, size in iter_boxes(f, 0, end):
+        if box_type == "moov":
+            return _parse_moov(f, offset, offset + size)
+        if box_type == "mdat" and not skip_media:
+            return None
+    return None
+
+
+def _parse_moov(f: BinaryIO, start: int, end: int) -> Optional[Dict[str, Optional[int]]]:
+    """Длительность из mvhd и размер кадра из tkhd первой видеодорожки"""
+    duration = width = height = None
+    for box_type, offset, size in iter_boxes(f, start, end):
+        if box_type == "mvhd":
+            f.seek(offset)
+            data = f.read(min(size, 32))
+            if len(data) < 20:
+                continue
+            if data[0] == 1:
+                if len(data) < 32:
+                    continue
+                timescale, units = struct.unpack(">IQ", data[20:32])
+            else:
+                timescale, units = struct.unpack(">II", data[12:20])
+            if timescale:
+                duration = int(units / timescale)
+        elif box_type == "trak" and width is None:
+            dimensions = _parse_track_dimensions(f, offset, offset + size)
+            if dimensions:
+                width, height = dimensions
+
+    if duration is None and width is None:
+        return None
+    return {'duration': duration, 'width': width, 'height': height}
+
+
+def _parse_track_dimensions(f: BinaryIO, start: int, end: int) -> Optional[Tuple[int, int]]:
+    """
+    Размер кадра дорожки из tkhd (у звуковых дорожек он нулевой)
+
+    Матрица поворота учитывается: для видео, снятого вертикально,
+    ширина и высота меняются местами.
+    """
+    for box_type, offset, size in iter_boxes(f, start, end):
+        if box_type != "tkhd":
+            continue
+        f.seek(offset)
+        data = f.read(min(size, 96))
+        matrix_at, size_at = (52, 88) if data[:1] == b"\x01" else (40, 76)
+        if len(data) < size_at + 8:
+            return None
+        a, b = struct.unpack(">ii", data[matrix_at:matrix_at + 8])
+        width, height = (value >> 16 for value in struct.unpack(">II", data[size_at:size_at + 8]))
+        if not width or not height:
+            return None
+        if a == 0 and b != 0:
+            width, height = height, width
+        return width, height
+    return None
@@ -0,0 +1,215 @@
+"""
+Утилиты для разрезания больших видео на части по ключевым кадрам (без перекодирования)
+"""
+import os
+import re
+import subprocess
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.video_utils import get_ffmpeg_path, probe_duration
+
+
+# Запас от лимита: битрейт неравномерен, поэтому части планируются меньше лимита
+SPLIT_SAFETY_RATIO = 0.9
+
+
+def find_keyframes(video_path: str, ffmpeg_path: Optional[str] = None) -> List[float]:
+    """
+    Находит моменты ключевых кадров первого видео потока
+
+    Декодируются только ключевые кадры (-skip_frame nokey).
+
+    Args:
+        video_path: Путь к видео файлу
+        ffmpeg_path: Путь к ffmpeg
+
+    Returns:
+        Отсортированный список моментов в секундах
+    """
+    ffmpeg_path = ffmpeg_path or get_ffmpeg_path()
+    if not ffmpeg_path:
+        return []
+
+    result = subprocess.run(
+        [ffmpeg_path, "-hide_banner", "-skip_frame", "nokey", "-i", video_path,
+         "-map", "0:v:0", "-an", "-vf", "showinfo", "-f", "null", "-"],
+        capture_output=True, text=True, errors="replace"
+    )
+    times = {float(t) for t in re.findall(r"pts_time:\s*(-?\d+(?:\.\d+)?)", result.stderr)}
+    return sorted(t for t in times if t >= 0)
+
+
+class SplitPlan:
+    """План разрезания файла на части, начинающиеся с ключевых кадров"""
+
+    def __init__(self, video_path: str, max_part_bytes: int, saved: Optional[Dict[str, Any]] = None):
+        """
+        Строит план разрезания
+
+        Args:
+            video_path: Путь к видео файлу
+            max_part_bytes: Максимальный размер одной части в байтах
+            saved: Ранее сохраненный план (to_dict) - используется, если он
+                построен для того же лимита и той же длительности
+        """
+        self.video_path = video_path
+        self.max_part_bytes = max_part_bytes
+        self.ffmpeg_path = get_ffmpeg_path()
+        if not self.ffmpeg_path:
+            raise ValueError("Для разрезания больших файлов нужен ffmpeg")
+
+        self.duration = probe_duration(video_path, self.ffmpeg_path)
+        if not self.duration:
+            raise ValueError("Не удалось определить длительность видео")
+
+        self.keyframes = find_keyframes(video_path, self.ffmpeg_path)
+        if not self.keyframes:
+            raise ValueError("Не удалось найти ключевые кадры")
+
+        # Номера частей в подписях: при делении части общее число не меняется
+        # ("2" -> "2a", "2b"), поэтому подписи отправленных частей остаются верными
+        self.restored = bool(saved and saved.get("max_part_bytes") == max_part_bytes
+                             and saved.get("duration") == self.duration)
+        if self.restored:
+            self.ranges: List[Tuple[float, Optional[float]]] = [tuple(r) for r in saved["ranges"]]
+            self.labels: List[str] = list(saved["labels"])
+            self.total_parts = saved["total_parts"]
+            return
+
+        file_size = os.path.getsize(video_path)
+        byte_rate = file_size / self.duration
+        max_seconds = max_part_bytes * SPLIT_SAFETY_RATIO / byte_rate
+        self.ranges = self._plan_ranges(0.0, None, max_seconds)
+        self.labels = [str(index + 1) for index in range(len(self.ranges))]
+        self.total_parts = len(self.ranges)
+
+    @property
+    def parts_count(self) -> int:
+        """Количество частей (с учетом поделенных)"""
+        return len(self.ranges)
+
+    def part_label(self, index: int) -> str:
+        """
+        Номер части для подписи
+
+        Args:
+            index: Номер части (с 0)
+
+        Returns:
+            Строка вида "2/3" или "2a/3" для половины поделенной части
+        """
+        return f"{self.labels[index]}/{self.total_parts}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        План для сохранения в журнал загрузки
+
+        Returns:
+            Словарь, из которого план восстанавливается параметром saved
+        """
+        return {
+            "max_part_bytes": self.max_part_bytes,
+            "duration": self.duration,
+            "ranges": [list(r) for r in self.ranges],
+            "labels": list(self.labels),
+            "total_parts": self.total_parts,
+        }
+
+    def _plan_ranges(self, start: float, end: Optional[float],
+                     max_seconds: float) -> List[Tuple[float, Optional[float]]]:
+        """
+        Жадно разбивает интервал на отрезки не длиннее max_seconds по ключевым кадрам
+
+        Args:
+            start: Начало интервала (ключевой кадр)
+            end: Конец интервала (None - до конца файла)
+            max_seconds: Максимальная длительность отрезка
+
+        Returns:
+            Список отрезков (начало, конец)
+        """
+        limit = end if end is not None else self.duration
+        ranges = []
+        current = start
+
+        while limit - current > max_seconds:
+            candidates = [t for t in self.keyframes if current < t <= current + max_seconds and t < limit]
+            if candidates:
+                cut = candidates[-1]
+            else:
+                # Группа кадров длиннее отрезка - режем на следующем ключевом кадре
+                following = [t for t in self.keyframes if current < t < limit]
+                if not following:
+                    break
+                cut = following[0]
+            ranges.append((current, cut))
+            current = cut
+
+        ranges.append((current, end))
+        return ranges
+
+    def subdivide(self, index: int) -> bool:
+        """
+        Делит часть пополам по ближайшему к середине ключевому кадру
+
+        Используется, если часть все равно превысила лимит из-за скачка битрейта.
+        Половины получают номера с буквами ("2a", "2b"), общее число частей
+        в подписях не меняется.
+
+        Args:
+            index: Номер части (с 0)
+
+        Returns:
+            True если часть удалось разделить
+        """
+        start, end = self.ranges[index]
+        limit = end if end is not None else self.duration
+        inner = [t for t in self.keyframes if start < t < limit]
+        if not inner:
+            return False
+
+        middle = start + (limit - start) / 2
+        cut = min(inner, key=lambda t: abs(t - middle))
+        self.ranges[index:index + 1] = [(start, cut), (cut, end)]
+        label = self.labels[index]
+        self.labels[index:index + 1] = [f"{label}a", f"{label}b"]
+        return True
+
+    def cut_part(self, index: int, output_dir: str) -> Tuple[str, bool]:
+        """
+        Вырезает часть без перекодирования (stream copy)
+
+        Args:
+            index: Номер части (с 0)
+            output_dir: Папка для временных файлов
+
+        Returns:
+            Кортеж (путь к части, True если часть уложилась в лимит)
+        """
+        start, end = self.ranges[index]
+        stem, extension = os.path.splitext(os.path.basename(self.video_path))
+        os.makedirs(output_dir, exist_ok=True)
+        output_path = os.path.join(output_dir, f"{stem}.part{self.labels[index]}{extension}")
+
+        command = [self.ffmpeg_path, "-hide_banner", "-loglevel", "error", "-y",
+                   "-ss", f"{start:.6f}", "-i", self.video_path]
+        if end is not None:
+            command += ["-t", f"{end - start:.6f}"]
+        command += [
+            "-map", "0:v:0", "-map", "0:a:0?",
+            "-c", "copy",
+            "-avoid_negative_ts", "make_zero",
+            # Страховка: ffmpeg прекращает запись при достижении лимита
+            "-fs", str(self.max_part_bytes),
+        ]
+        if extension.lower() in (".mp4", ".m4v", ".mov"):
+            command += ["-movflags", "+faststart"]
+        command.append(output_path)
+
+        result = subprocess.run(command, capture_output=True, text=True, errors="replace")
+        if result.returncode != 0 or not os.path.exists(output_path):
+            raise RuntimeError(f"Ошибка разрезания: {result.stderr.strip()[-500:]}")
+
+        # Если файл уперся в -fs, хвост части потерян
+        fits = os.path.getsize(output_path) < self.max_part_bytes * 0.999
+        return output_path, fits
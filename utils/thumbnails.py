@@ -0,0 +1,136 @@
+"""
+Утилиты для генерации превью (thumbnail) видео
+"""
+import os
+import subprocess
+from typing import Optional
+
+from utils.archive import ffmpeg_input
+from utils.video_utils import get_content_hash, get_ffmpeg_path, probe_duration
+
+
+# Ограничения Telegram для превью видео
+THUMB_MAX_SIDE = 320
+THUMB_MAX_BYTES = 200 * 1024
+
+# Качество JPEG для ffmpeg (-q:v): 2 - лучшее, 31 - худшее
+THUMB_QUALITY_STEPS = (3, 6, 10, 15, 22, 31)
+
+
+def get_thumbnail_position(duration: Optional[float]) -> float:
+    """
+    Выбирает момент видео для превью
+
+    Первые кадры часто черные или содержат заставку, поэтому берется
+    кадр на 10% длительности (но не дальше первой минуты).
+
+    Args:
+        duration: Длительность видео в секундах
+
+    Returns:
+        Позиция в секундах
+    """
+    if not duration or duration <= 0:
+        return 0.0
+    return min(duration * 0.1, 60.0)
+
+
+def generate_thumbnail(video_path: str, cache_dir: str) -> Optional[str]:
+    """
+    Создает JPEG превью видео (не больше 320px и 200 КБ)
+
+    Функция рассчитана на запуск в пуле процессов. Результат кэшируется
+    по хэшу содержимого, поэтому повторная отправка того же файла
+    (в том числе переименованного) использует готовое превью.
+
+    Args:
+        video_path: Путь к видео файлу
+        cache_dir: Папка кэша превью
+
+    Returns:
+        Путь к JPEG файлу превью или None, если создать его не удалось
+    """
+    try:
+        # Сжатый файл в архиве ffmpeg не прочитает - не распаковываем его ради хэша
+        source = ffmpeg_input(video_path)
+        if source is None:
+            print(f"[THUMB] Файл сжат в архиве, превью не создается: {os.path.basename(video_path)}")
+            return None
+
+        os.makedirs(cache_dir, exist_ok=True)
+        thumb_path = os.path.join(cache_dir, f"{get_content_hash(video_path)}.jpg")
+
+        if os.path.exists(thumb_path) and 0 < os.path.getsize(thumb_path) <= THUMB_MAX_BYTES:
+            return thumb_path
+
+        ffmpeg_path = get_ffmpeg_path()
+        if not ffmpeg_path:
+            print("[THUMB] ffmpeg не найден, превью не создается")
+            return None
+
+        # Файл в архиве передается ffmpeg диапазоном байт архива (source)
+        position = get_thumbnail_position(probe_duration(source, ffmpeg_path))
+
+        # Если кадр в выбранной позиции получить не удалось - пробуем начало файла
+        for seek in dict.fromkeys((position, 0.0)):
+            if _extract_frame(ffmpeg_path, source, thumb_path, seek):
+                print(f"[THUMB] Превью создано: {os.path.basename(video_path)} "
+                      f"({os.path.getsize(thumb_path) / 1024:.0f} КБ)")
+                return thumb_path
+
+        print(f"[THUMB] Не удалось создать превью: {os.path.basename(video_path)}")
+        return None
+
+    except Exception as e:
+        print(f"[THUMB] Ошибка создания превью {os.path.basename(video_path)}: {e}")
+        return None
+
+
+def _extract_frame(ffmpeg_path: str, video_path: str, thumb_path: str, seek: float) -> bool:
+    """
+    Извлекает один ключевой кадр и сжимает его до лимита размера
+
+    Args:
+        ffmpeg_path: Путь к ffmpeg
+        video_path: Путь к видео файлу
+        thumb_path: Путь для сохранения превью
+        seek: Позиция в секундах
+
+    Returns:
+        True если превью сохранено
+    """
+    tmp_path = f"{thumb_path}.{os.getpid()}.tmp.jpg"
+    scale = (f"scale='min({THUMB_MAX_SIDE},iw)':'min({THUMB_MAX_SIDE},ih)'"
+             f":force_original_aspect_ratio=decrease")
+
+    try:
+        for quality in THUMB_QUALITY_STEPS:
+            command = [
+                ffmpeg_path, "-hide_banner", "-loglevel", "error", "-y",
+                # -ss перед -i: переход к ближайшему ключевому кадру без декодирования с начала
+                "-ss", f"{seek:.3f}",
+                # Декодируем только ключевые кадры
+                "-skip_frame", "nokey",
+                "-i", video_path,
+                "-frames:v", "1",
+                "-vf", scale,
+                "-q:v", str(quality),
+                tmp_path
+            ]
+            subprocess.run(command, capture_output=True, timeout=60)
+
+            if not os.path.exists(tmp_path) or os.path.getsize(tmp_path) == 0:
+                return False
+
+            if os.path.getsize(tmp_path) <= THUMB_MAX_BYTES:
+                os.replace(tmp_path, thumb_path)
+                return True
+
+        return False
+
+    finally:
+        if os.path.exists(tmp_path):
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
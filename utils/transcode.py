@@ -0,0 +1,172 @@
+"""
+Утилиты подготовки видео к потоковому воспроизведению в Telegram (remux/transcode)
+"""
+import os
+import re
+import subprocess
+from typing import Dict, Optional
+
+from utils.archive import is_member_path
+from utils.mp4 import MP4_EXTENSIONS, is_faststart
+from utils.video_utils import get_content_hash, get_ffmpeg_path
+
+
+# Кодеки, которые Telegram воспроизводит в MP4 без перекодирования
+STREAMABLE_VIDEO_CODECS = {"h264", "hevc"}
+STREAMABLE_AUDIO_CODECS = {"aac", "mp3"}
+
+# Действия подготовки
+ACTION_NONE = "none"            # Файл уже пригоден для стриминга
+ACTION_REMUX = "remux"          # Перепаковка без перекодирования (stream copy)
+ACTION_TRANSCODE = "transcode"  # Требуется перекодирование хотя бы одного потока
+
+
+def probe_codecs(video_path: str, ffmpeg_path: Optional[str] = None) -> Dict[str, Optional[str]]:
+    """
+    Определяет кодеки первых видео и аудио потоков по заголовку файла
+
+    Args:
+        video_path: Путь к видео файлу
+        ffmpeg_path: Путь к ffmpeg
+
+    Returns:
+        Словарь с ключами video и audio (None, если поток отсутствует)
+    """
+    ffmpeg_path = ffmpeg_path or get_ffmpeg_path()
+    codecs: Dict[str, Optional[str]] = {'video': None, 'audio': None}
+    if not ffmpeg_path:
+        return codecs
+
+    result = subprocess.run(
+        [ffmpeg_path, "-hide_banner", "-i", video_path],
+        capture_output=True, text=True, errors="replace", timeout=30
+    )
+    for kind, codec in re.findall(r"Stream #\d+:\d+.*?: (Video|Audio): (\w+)", result.stderr):
+        key = kind.lower()
+        if codecs[key] is None:
+            codecs[key] = codec.lower()
+    return codecs
+
+
+def get_preparation_action(video_path: str, codecs: Dict[str, Optional[str]]) -> str:
+    """
+    Выбирает минимально необходимое действие для потокового воспроизведения
+
+    Args:
+        video_path: Путь к видео файлу
+        codecs: Результат probe_codecs
+
+    Returns:
+        ACTION_NONE, ACTION_REMUX или ACTION_TRANSCODE
+    """
+    video_ok = codecs.get('video') in STREAMABLE_VIDEO_CODECS
+    audio_ok = codecs.get('audio') is None or codecs.get('audio') in STREAMABLE_AUDIO_CODECS
+
+    if not video_ok or not audio_ok:
+        return ACTION_TRANSCODE
+
+    extension = os.path.splitext(video_path)[1].lower()
+    if extension in MP4_EXTENSIONS and is_faststart(video_path):
+        return ACTION_NONE
+
+    return ACTION_REMUX
+
+
+def prepare_streamable(video_path: str, scratch_dir: str) -> Optional[str]:
+    """
+    Готовит faststart MP4 для потокового воспроизведения
+
+    Функция рассчитана на запуск в пуле процессов. Потоки с подходящими
+    кодеками копируются без перекодирования, перекодируются только
+    несовместимые потоки.
+
+    Args:
+        video_path: Путь к исходному видео
+        scratch_dir: Папка для временных файлов
+
+    Returns:
+        Путь к подготовленному файлу или None, если исходный файл подходит
+        (или подготовить его не удалось)
+    """
+    filename = os.path.basename(video_path)
+    if is_member_path(video_path):
+        # Подготовка записала бы распакованную копию на диск - файл отправляется как есть
+        print(f"[TRANSCODE] Файл в архиве отправляется без подготовки: {filename}")
+        return None
+
+    ffmpeg_path = get_ffmpeg_path()
+    if not ffmpeg_path:
+        print("[TRANSCODE] ffmpeg не найден, файлы отправляются как есть")
+        return None
+
+    try:
+        codecs = probe_codecs(video_path, ffmpeg_path)
+        if codecs['video'] is None:
+            return None
+
+        action = get_preparation_action(video_path, codecs)
+        if action == ACTION_NONE:
+            return None
+
+        # Имя файла сохраняется, чтобы Telegram показывал исходное название
+        output_dir = os.path.join(scratch_dir, get_content_hash(video_path))
+        os.makedirs(output_dir, exist_ok=True)
+        output_path = os.path.join(output_dir, os.path.splitext(filename)[0] + ".mp4")
+        if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+            return output_path
+
+        if codecs['video'] in STREAMABLE_VIDEO_CODECS:
+            video_args = ["-c:v", "copy"]
+        else:
+            video_args = ["-c:v", "libx264", "-preset", "veryfast", "-crf", "23", "-pix_fmt", "yuv420p"]
+
+        if codecs['audio'] is None or codecs['audio'] in STREAMABLE_AUDIO_CODECS:
+            audio_args = ["-c:a", "copy"]
+        else:
+            audio_args = ["-c:a", "aac", "-b:a", "160k"]
+
+        print(f"[TRANSCODE] {action}: {filename} (video={codecs['video']}, audio={codecs['audio']})")
+
+        tmp_path = output_path + ".part.mp4"
+        command = [
+            ffmpeg_path, "-hide_banner", "-loglevel", "error", "-y",
+            "-i", video_path,
+            "-map", "0:v:0", "-map", "0:a:0?",
+            *video_args, *audio_args,
+            "-movflags", "+faststart",
+            tmp_path
+        ]
+        result = subprocess.run(command, capture_output=True, text=True, errors="replace")
+
+        if result.returncode != 0 or not os.path.exists(tmp_path):
+            print(f"[TRANSCODE] Ошибка подготовки {filename}: {result.stderr.strip()[-500:]}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return None
+
+        os.replace(tmp_path, output_path)
+        print(f"[TRANSCODE] Готово: {filename} -> {os.path.getsize(output_path) / (1024 * 1024):.1f} МБ")
+        return output_path
+
+    except Exception as e:
+        print(f"[TRANSCODE] Ошибка подготовки {filename}: {e}")
+        return None
+
+
+def remove_prepared_file(prepared_path: Optional[str]) -> None:
+    """
+    Удаляет подготовленный временный файл и его папку
+
+    Args:
+        prepared_path: Путь, возвращенный prepare_streamable
+    """
+    if not prepared_path:
+        return
+    try:
+        if os.path.exists(prepared_path):
+            os.remove(prepared_path)
+        parent = os.path.dirname(prepared_path)
+        if os.path.isdir(parent) and not os.listdir(parent):
+            os.rmdir(parent)
+    except OSError as e:
+        print(f"[TRANSCODE] Не удалось удалить временный файл {prepared_path}: {e}")
@@ -1,10 +1,19 @@
 """
 Утилиты для работы с видео файлами
 """
+import hashlib
 import os
+import re
+import shutil
+import subprocess
 from typing import Dict, Optional
 
+from core.tracing import traced
+from utils.archive import ArchiveMember, find_member, get_file_size, open_file, open_member
+from utils.mp4 import MP4_EXTENSIONS, read_movie_header
 
+
+@traced(category="io")
 def get_video_metadata(video_path: str) -> Dict[str, Optional[int]]:
     """
     Извлекает метаданные видео (длительность, разрешение) с помощью moviepy
@@ -15,6 +24,10 @@ def get_video_metadata(video_path: str) -> Dict[str, Optional[int]]:
     Returns:
         Словарь с метаданными: duration, width, height
     """
+    member = find_member(video_path)
+    if member is not None:
+        return _get_member_metadata(member)
+    
     try:
         # Используем moviepy для извлечения метаданных
         try:
@@ -40,32 +53,155 @@ def get_video_metadata(video_path: str) -> Dict[str, Optional[int]]:
         
         # Fallback: Оценка по размеру файла и расширению
         print("[VIDEO_META] Используем оценку по размеру файла...")
-        file_size = os.path.getsize(video_path)
-        file_ext = os.path.splitext(video_path)[1].lower()
+        return _estimate_metadata(os.path.getsize(video_path), os.path.splitext(video_path)[1].lower())
         
-        # Разные оценки битрейта в зависимости от формата
-        if file_ext in ['.mp4', '.mkv', '.mov']:
-            # Средний битрейт для современного HD видео
-            estimated_bitrate = 3_000_000  # 3 Мбит/с
-        elif file_ext in ['.avi', '.wmv']:
-            # Более старые форматы обычно менее эффективны
-            estimated_bitrate = 2_000_000  # 2 Мбит/с
-        elif file_ext in ['.webm']:
-            # WebM обычно более эффективен
-            estimated_bitrate = 1_500_000  # 1.5 Мбит/с
-        else:
-            # Для неизвестных форматов используем среднее значение
-            estimated_bitrate = 2_500_000  # 2.5 Мбит/с
+    except Exception as e:
+        print(f"[VIDEO_META] Ошибка извлечения метаданных: {e}")
+        return {'duration': None, 'width': None, 'height': None}
+
+
+def _get_member_metadata(member: ArchiveMember) -> Dict[str, Optional[int]]:
+    """
+    Метаданные видео из архива по заголовку MP4 (без распаковки файла)
+    
+    Из несжатого файла читаются только заголовки боксов и индекс (moov),
+    где бы он ни лежал. В сжатом файле индекс ищется только перед данными:
+    переход к индексу в конце файла распаковал бы его целиком.
+    
+    Args:
+        member: Файл в архиве
         
-        estimated_duration = max(10, int((file_size * 8) / estimated_bitrate))  # Минимум 10 секунд
+    Returns:
+        Словарь с метаданными: duration, width, height
+    """
+    file_ext = os.path.splitext(member.name)[1].lower()
+    print(f"[VIDEO_META] Читаем заголовок в архиве: {os.path.basename(member.archive)}/{member.name}")
+    if file_ext in MP4_EXTENSIONS:
+        try:
+            with open_member(member) as f:
+                header = read_movie_header(f, member.size, skip_media=member.seekable)
+            if header:
+                print(f"[VIDEO_META] Получены данные: {header['duration']}с, "
+                      f"{header['width']}x{header['height']}")
+                return header
+        except Exception as e:
+            print(f"[VIDEO_META] Ошибка чтения заголовка: {e}")
+    
+    print("[VIDEO_META] Используем оценку по размеру файла...")
+    return _estimate_metadata(member.size, file_ext)
+
+
+def _estimate_metadata(file_size: int, file_ext: str) -> Dict[str, Optional[int]]:
+    """
+    Оценка длительности по размеру файла и типичному битрейту формата
+    
+    Args:
+        file_size: Размер файла в байтах
+        file_ext: Расширение файла в нижнем регистре
         
-        print(f"[VIDEO_META] Оценка по размеру файла: {file_size/(1024*1024):.1f}МБ -> ~{estimated_duration}с ({estimated_duration//60:.0f}:{estimated_duration%60:02.0f})")
-        return {
-            'duration': estimated_duration,
-            'width': None,
-            'height': None
-        }
+    Returns:
+        Словарь с метаданными: duration (оценка), width и height = None
+    """
+    # Разные оценки битрейта в зависимости от формата
+    if file_ext in ['.mp4', '.mkv', '.mov']:
+        # Средний битрейт для современного HD видео
+        estimated_bitrate = 3_000_000  # 3 Мбит/с
+    elif file_ext in ['.avi', '.wmv']:
+        # Более старые форматы обычно менее эффективны
+        estimated_bitrate = 2_000_000  # 2 Мбит/с
+    elif file_ext in ['.webm']:
+        # WebM обычно более эффективен
+        estimated_bitrate = 1_500_000  # 1.5 Мбит/с
+    else:
+        # Для неизвестных форматов используем среднее значение
+        estimated_bitrate = 2_500_000  # 2.5 Мбит/с
+    
+    estimated_duration = max(10, int((file_size * 8) / estimated_bitrate))  # Минимум 10 секунд
+    
+    print(f"[VIDEO_META] Оценка по размеру файла: {file_size/(1024*1024):.1f}МБ -> ~{estimated_duration}с ({estimated_duration//60:.0f}:{estimated_duration%60:02.0f})")
+    return {
+        'duration': estimated_duration,
+        'width': None,
+        'height': None
+    }
+
+
+def get_ffmpeg_path() -> Optional[str]:
+    """
+    Находит исполняемый файл ffmpeg
+    
+    Сначала ищется системный ffmpeg, затем бинарник из imageio-ffmpeg,
+    который устанавливается вместе с moviepy.
+    
+    Returns:
+        Путь к ffmpeg или None, если он недоступен
+    """
+    ffmpeg_path = shutil.which("ffmpeg")
+    if ffmpeg_path:
+        return ffmpeg_path
+    
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return None
+
+
+@traced(category="io")
+def probe_duration(video_path: str, ffmpeg_path: Optional[str] = None) -> Optional[float]:
+    """
+    Определяет длительность видео по заголовку контейнера (без декодирования)
+    
+    Args:
+        video_path: Путь к видео файлу
+        ffmpeg_path: Путь к ffmpeg (если не указан - ищется автоматически)
         
+    Returns:
+        Длительность в секундах или None
+    """
+    ffmpeg_path = ffmpeg_path or get_ffmpeg_path()
+    if not ffmpeg_path:
+        return None
+    
+    try:
+        result = subprocess.run(
+            [ffmpeg_path, "-hide_banner", "-i", video_path],
+            capture_output=True, text=True, errors="replace", timeout=30
+        )
+        match = re.search(r"Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)", result.stderr)
+        if match:
+            hours, minutes, seconds = match.groups()
+            return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
     except Exception as e:
-        print(f"[VIDEO_META] Ошибка извлечения метаданных: {e}")
-        return {'duration': None, 'width': None, 'height': None}
\ No newline at end of file
+        print(f"[VIDEO_META] Ошибка определения длительности: {e}")
+    return None
+
+
+@traced(category="io")
+def get_content_hash(file_path: str, sample_size: int = 1024 * 1024) -> str:
+    """
+    Вычисляет быстрый хэш содержимого файла
+    
+    Хэшируются размер файла и три фрагмента (начало, середина, конец),
+    чтобы не читать многогигабайтные файлы целиком. Для одинаковых файлов
+    хэш совпадает независимо от имени и пути (в том числе для файла в архиве).
+    
+    Args:
+        file_path: Путь к файлу
+        sample_size: Размер каждого фрагмента в байтах
+        
+    Returns:
+        Шестнадцатеричная строка хэша
+    """
+    file_size = get_file_size(file_path)
+    digest = hashlib.sha1(str(file_size).encode())
+    
+    with open_file(file_path) as f:
+        if file_size <= sample_size * 3:
+            digest.update(f.read())
+        else:
+            for offset in (0, file_size // 2, file_size - sample_size):
+                f.seek(offset)
+                digest.update(f.read(sample_size))
+    
+    return digest.hexdigest()